@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+HTTP client shared by the API test scripts (backend_test.py,
+comprehensive_results_test.py, detailed_results_test.py, debug_scoring.py).
+
+By default they call the FastAPI app inside this process through its ASGI
+interface, on the in-memory store: no network and no MongoDB. A deployed
+API is only called when named explicitly with CASM83_API_URL (e.g. the
+preview deployment, https://evalpsych-app.preview.emergentagent.com/api).
+The target is printed on import.
+
+Scripts use `api.get` / `api.post` with the same arguments as requests and
+catch `RequestError`.
+"""
+
+import atexit
+import os
+import sys
+from pathlib import Path
+
+REMOTE_URL = os.environ.get("CASM83_API_URL")
+
+if not REMOTE_URL:
+    # Sessions live in this process only
+    os.environ["STORAGE_BACKEND"] = "memory"
+    sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+    import httpx
+    from fastapi.testclient import TestClient
+
+    import server
+
+    BASE_URL = "http://testserver/api"
+    RequestError = httpx.HTTPError
+    # Entered once: runs the app lifespan and keeps one event loop, which
+    # serves requests from several threads concurrently
+    api = TestClient(server.app)
+    api.__enter__()
+    atexit.register(api.__exit__, None, None, None)
+else:
+    import requests
+
+    BASE_URL = REMOTE_URL.rstrip("/")
+    RequestError = requests.exceptions.RequestException
+    api = requests
+
+print(f"🎯 API: {BASE_URL}" + (" (remote)" if REMOTE_URL else " (in-process, in-memory store)"))
@@ -0,0 +1,187 @@
+"""
+Admission control: separate concurrency budgets per class of endpoint.
+
+A request runs when its class has a free slot; otherwise it waits in a short
+FIFO queue and is shed with 503 + Retry-After when the queue is full or the
+wait exceeds the class timeout. Bursts of PDFs and exports then queue among
+themselves instead of slowing down save-response during a live exam.
+
+Budgets are per worker process.
+"""
+
+import asyncio
+import math
+import os
+import re
+from collections import deque
+from typing import Dict, Mapping, Optional, Pattern, Tuple
+
+from starlette.responses import JSONResponse
+
+from timing import span
+
+
+class Budget:
+    """Concurrency limit with a bounded, time-limited wait queue"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiters: deque = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting up to queue_timeout; False means shed"""
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self.waiters) >= self.max_queue or self.queue_timeout <= 0:
+            self.shed += 1
+            return False
+
+        granted = asyncio.get_running_loop().create_future()
+        self.waiters.append(granted)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(granted, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # release() may have handed the slot over as the wait timed out
+            # (wait_for can still raise then); keep it rather than leak it
+            if granted.done() and not granted.cancelled():
+                self.admitted += 1
+                return True
+            self._forget(granted)
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the client went away
+            if granted.done() and not granted.cancelled():
+                self.release()
+            else:
+                self._forget(granted)
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest waiter still waiting
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def _forget(self, waiter) -> None:
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": sum(1 for waiter in self.waiters if not waiter.done()),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+        }
+
+
+# Class of each endpoint; paths matching none are "standard"
+ROUTE_CLASSES: Tuple[Tuple[str, Pattern], ...] = (
+    ("exempt", re.compile(r"^/(api/health|metrics)?$")),
+    ("critical", re.compile(r"^/api/(save-response|questions|start-test|complete-test|test-session/[^/]+)$")),
+    ("expensive", re.compile(r"^/api/(results/[^/]+/pdf|results/batch|all-sessions|stats.*)$")),
+)
+
+# class: (limit, max_queue, queue_timeout seconds)
+DEFAULT_BUDGETS = {
+    "critical": (256, 1024, 1.0),
+    "standard": (32, 128, 2.0),
+    "expensive": (4, 16, 5.0),
+}
+
+
+class AdmissionController:
+    def __init__(self, budgets: Mapping[str, Tuple[int, int, float]] = DEFAULT_BUDGETS, enabled: bool = True):
+        self.enabled = enabled
+        self.budgets = {name: Budget(name, *budget) for name, budget in budgets.items()}
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "AdmissionController":
+        """ADMISSION_CONTROL=0 disables it; ADMISSION_<CLASS>_LIMIT/_QUEUE/_TIMEOUT tune a class"""
+        budgets = {}
+        for name, (limit, max_queue, timeout) in DEFAULT_BUDGETS.items():
+            prefix = f"ADMISSION_{name.upper()}_"
+            budgets[name] = (
+                int(environ.get(prefix + "LIMIT", limit)),
+                int(environ.get(prefix + "QUEUE", max_queue)),
+                float(environ.get(prefix + "TIMEOUT", timeout)),
+            )
+        return cls(budgets, enabled=environ.get("ADMISSION_CONTROL", "1").lower() not in ("0", "false", "no"))
+
+    def budget_for(self, path: str) -> Optional[Budget]:
+        if not self.enabled:
+            return None
+        for name, pattern in ROUTE_CLASSES:
+            if pattern.match(path):
+                return self.budgets.get(name)
+        return self.budgets.get("standard")
+
+    def stats(self) -> Dict:
+        return {"enabled": self.enabled, **{name: budget.stats() for name, budget in self.budgets.items()}}
+
+    def collect(self):
+        """Samples for the /metrics registry, read at scrape time"""
+        budgets = self.budgets.items()
+        return [
+            ("casm83_admission_active", "gauge", "Requests running per endpoint class",
+             [({"class": name}, budget.active) for name, budget in budgets]),
+            ("casm83_admission_queue_depth", "gauge", "Requests waiting for a slot per endpoint class",
+             [({"class": name}, budget.stats()["queue_depth"]) for name, budget in budgets]),
+            ("casm83_admission_shed_total", "counter", "Requests rejected with 503 per endpoint class",
+             [({"class": name}, budget.shed) for name, budget in budgets]),
+        ]
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; a slot is held until the response body is sent"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        budget = self.controller.budget_for(scope["path"]) if scope["type"] == "http" else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+        with span("admission_wait"):
+            admitted = await budget.acquire()
+        if not admitted:
+            # Routing never ran: label the request by its class for /metrics
+            scope["metrics_route"] = f"shed:{budget.name}"
+            response = JSONResponse(
+                {"detail": "Server busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(budget.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            budget.release()
@@ -0,0 +1,155 @@
+"""
+MongoDB client settings, lifecycle and connection pool statistics.
+"""
+
+import os
+import threading
+from typing import Dict, List, Mapping, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
+from pymongo import monitoring
+
+
+class MongoSettings(BaseModel):
+    url: Optional[str] = None
+    db_name: str = "casm83"
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 30000
+    connect_timeout_ms: int = 20000
+    socket_timeout_ms: Optional[int] = None
+    compressors: List[str] = []
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "MongoSettings":
+        """Read the settings from MONGO_* environment variables"""
+        def number(name: str) -> Optional[int]:
+            value = environ.get(name)
+            return int(value) if value not in (None, "") else None
+
+        values = {
+            "url": environ.get("MONGO_URL"),
+            "db_name": environ.get("MONGO_DB_NAME"),
+            "max_pool_size": number("MONGO_MAX_POOL_SIZE"),
+            "min_pool_size": number("MONGO_MIN_POOL_SIZE"),
+            "max_idle_time_ms": number("MONGO_MAX_IDLE_TIME_MS"),
+            "wait_queue_timeout_ms": number("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+            "server_selection_timeout_ms": number("MONGO_SERVER_SELECTION_TIMEOUT_MS"),
+            "connect_timeout_ms": number("MONGO_CONNECT_TIMEOUT_MS"),
+            "socket_timeout_ms": number("MONGO_SOCKET_TIMEOUT_MS"),
+        }
+        compressors = environ.get("MONGO_COMPRESSORS", "")
+        values["compressors"] = [c.strip() for c in compressors.split(",") if c.strip()]
+        return cls(**{key: value for key, value in values.items() if value is not None})
+
+    def client_options(self) -> Dict:
+        """Keyword arguments for AsyncIOMotorClient"""
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            options["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.socket_timeout_ms is not None:
+            options["socketTimeoutMS"] = self.socket_timeout_ms
+        if self.compressors:
+            # pymongo skips (with a warning) compressors whose module is missing
+            options["compressors"] = ",".join(self.compressors)
+        return options
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters per server, fed by pymongo pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[str, Dict[str, int]] = {}
+
+    def _bump(self, address, **deltas) -> None:
+        key = "%s:%s" % address
+        with self._lock:
+            counters = self._servers.setdefault(key, {
+                "open": 0, "checked_out": 0, "waiting": 0,
+                "checkouts": 0, "checkout_failures": 0, "cleared": 0,
+            })
+            for name, delta in deltas.items():
+                counters[name] += delta
+
+    def pool_created(self, event):
+        self._bump(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._bump(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._bump(event.address, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._bump(event.address, waiting=-1, checked_out=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._bump(event.address, checked_out=-1)
+
+    def snapshot(self, max_pool_size: int) -> Dict:
+        with self._lock:
+            servers = {address: dict(counters) for address, counters in self._servers.items()}
+        for counters in servers.values():
+            counters["saturated"] = counters["checked_out"] >= max_pool_size or counters["waiting"] > 0
+        return {"max_pool_size": max_pool_size, "servers": servers}
+
+
+class MongoConnection:
+    """Owns the Motor client; opened and closed by the app lifespan"""
+
+    def __init__(self, settings: MongoSettings):
+        self.settings = settings
+        self.pool_stats = PoolStats()
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db = None
+
+    def connect(self) -> None:
+        self.client = AsyncIOMotorClient(
+            self.settings.url,
+            event_listeners=[self.pool_stats],
+            **self.settings.client_options(),
+        )
+        self.db = self.client[self.settings.db_name]
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    async def health(self) -> Dict:
+        """Ping the server and report the pool counters"""
+        try:
+            await self.client.admin.command("ping")
+            status = "ok"
+        except Exception as e:
+            status = f"error: {e}"
+        return {"status": status, "pool": self.pool_stats.snapshot(self.settings.max_pool_size)}
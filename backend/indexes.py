@@ -0,0 +1,70 @@
+"""
+Indexes the API endpoints depend on, and the queries they must serve.
+"""
+
+import logging
+from typing import Dict, Iterator, List
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SESSION_INDEXES = [
+    # Every handler looks sessions up by their public id
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    # Listing/export filters and date-bounded scans (norms, archival)
+    IndexModel([("completed", ASCENDING), ("created_at", ASCENDING)], name="completed_created_at"),
+    IndexModel([("sex", ASCENDING), ("completed", ASCENDING)], name="sex_completed"),
+]
+
+# Pending events of a session in time order (ANSWER_LOG mode)
+ANSWER_EVENT_INDEXES = [
+    IndexModel([("session_id", ASCENDING), ("folded", ASCENDING), ("ts", ASCENDING)], name="session_folded_ts"),
+]
+
+# Representative query of each endpoint, used to verify the query plans.
+# The unfiltered export reads the whole collection by design.
+ENDPOINT_QUERIES: List[Dict] = [
+    {"endpoint": "POST /api/save-response", "filter": {"id": "index-probe"}, "limit": 1},
+    {"endpoint": "POST /api/complete-test", "filter": {"id": "index-probe"}, "limit": 1},
+    {"endpoint": "GET /api/test-session/{session_id}", "filter": {"id": "index-probe"}, "limit": 1},
+    {"endpoint": "GET /api/results/{session_id}", "filter": {"id": "index-probe"}, "limit": 1},
+    {"endpoint": "GET /api/results/{session_id}/pdf", "filter": {"id": "index-probe"}, "limit": 1},
+    {"endpoint": "POST /api/results/batch (session_ids)", "filter": {"id": {"$in": ["index-probe", "index-probe-2"]}}},
+    {"endpoint": "POST /api/results/batch (filter)", "filter": {"completed": True, "sex": "femenino"}},
+    {"endpoint": "GET /api/all-sessions?completed=", "filter": {"completed": True}},
+    {"endpoint": "GET /api/all-sessions?sex=", "filter": {"sex": "masculino"}},
+    {"endpoint": "GET /api/all-sessions?completed=&sex=", "filter": {"completed": True, "sex": "femenino"}},
+    {"endpoint": "GET /api/all-sessions", "filter": {}, "allow_collscan": True},
+]
+
+
+async def ensure_indexes(db) -> None:
+    """Create the session and answer event indexes; a no-op when they already exist"""
+    for collection, indexes in (("test_sessions", SESSION_INDEXES), ("answer_events", ANSWER_EVENT_INDEXES)):
+        try:
+            names = await db[collection].create_indexes(indexes)
+            logger.info("Indexes ready on %s: %s", collection, ", ".join(names))
+        except PyMongoError as e:
+            # e.g. duplicated ids in legacy data or no server; keep serving and report it
+            logger.error("Could not create indexes on %s: %s", collection, e)
+
+
+def plan_stages(plan: Dict) -> Iterator[str]:
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            if isinstance(value, (dict, list)):
+                yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+def uses_collscan(explain: Dict) -> bool:
+    """Whether the winning plan of an explain() result scans the collection"""
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    return "COLLSCAN" in plan_stages(winning_plan)
@@ -0,0 +1,214 @@
+"""
+The CASM-83 instrument: question bank, scale map, norms (baremos) and careers.
+
+The content lives in versioned JSON files under data/. They are read and
+validated once at import and compiled into read-only structures, so a broken
+file fails at startup instead of producing wrong scores. Only the standard
+library is used: scripts and workers can import this (and scoring.py)
+without FastAPI, Motor or ReportLab.
+
+Norms come as named norm sets: every data/norms/<name>.json, plus the tables
+written by scripts/build_norms.py into NORM_SETS_DIR (regional norms). A
+broken file in NORM_SETS_DIR is logged and skipped; only the bundled data
+must be valid for the app to start.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+VERSION = "R2014"
+# Edition used for sessions stored before norm sets were recorded
+LEGACY_NORM_SET = "r2014"
+
+TOTAL_QUESTIONS = 143
+ITEMS_PER_SCALE = 22
+CATEGORIES = ("desinteres", "bajo", "promedio_bajo", "indeciso", "promedio", "promedio_alto", "alto", "muy_alto")
+NORM_GROUPS = ("varones", "mujeres")
+# Category when a score falls outside every range of a baremo
+FALLBACK_CATEGORY = "indeciso"
+
+
+class InstrumentError(ValueError):
+    """A data file breaks an invariant the scoring relies on"""
+
+
+def load_json(name: str) -> Dict[str, Any]:
+    with open(DATA_DIR / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _check(condition: bool, source: str, message: str) -> None:
+    if not condition:
+        raise InstrumentError(f"{source}: {message}")
+
+
+def compile_questions(data: Dict, source: str = "questions") -> Tuple[Mapping[str, Any], ...]:
+    """Questions in order, numbered 1..TOTAL_QUESTIONS without gaps"""
+    questions = data["questions"]
+    _check(len(questions) == TOTAL_QUESTIONS, source, f"expected {TOTAL_QUESTIONS} questions, got {len(questions)}")
+    for expected, question in enumerate(questions, start=1):
+        _check(question.get("number") == expected, source, f"question #{expected} is numbered {question.get('number')}")
+        for key in ("block", "optionA", "optionB"):
+            _check(key in question, source, f"question {expected} has no {key!r}")
+    return tuple(MappingProxyType(dict(question)) for question in questions)
+
+
+def compile_scales(data: Dict, source: str = "scales") -> Mapping[str, Mapping[str, Any]]:
+    """Scale code -> {name, column (items scored on A), row (items scored on B)}"""
+    scales = {}
+    for code, scale in data["scales"].items():
+        column, row = tuple(scale["column"]), tuple(scale["row"])
+        _check(len(column) + len(row) == ITEMS_PER_SCALE, source,
+               f"{code} has {len(column) + len(row)} items, expected {ITEMS_PER_SCALE}")
+        for item in column + row:
+            _check(isinstance(item, int) and 1 <= item <= TOTAL_QUESTIONS, source,
+                   f"{code} item {item!r} is outside 1..{TOTAL_QUESTIONS}")
+        _check(len(set(column)) == len(column) and len(set(row)) == len(row), source, f"{code} repeats an item")
+        scales[code] = MappingProxyType({"name": scale["name"], "column": column, "row": row})
+    _check(bool(scales), source, "no scales")
+    return MappingProxyType(scales)
+
+
+def compile_baremos(baremos: Dict, scales: Mapping, source: str = "norms") -> Mapping[str, Mapping[str, Tuple[int, int]]]:
+    """Scale code -> category -> (min, max) for one norm group"""
+    compiled = {}
+    _check(set(baremos) == set(scales), source,
+           f"scales {sorted(set(baremos) ^ set(scales))} are missing or unknown")
+    for code in scales:
+        ranges = {}
+        for category, (low, high) in baremos[code].items():
+            _check(category in CATEGORIES, source, f"{code} has unknown category {category!r}")
+            _check(low <= high, source, f"{code} {category} range {low}..{high} is empty")
+            ranges[category] = (low, high)
+        compiled[code] = MappingProxyType(ranges)
+    return MappingProxyType(compiled)
+
+
+def compile_careers(data: Dict, scales: Mapping, source: str = "careers") -> Mapping[str, Mapping[str, Tuple[str, ...]]]:
+    careers = {}
+    for code, entry in data["careers"].items():
+        _check(code in scales, source, f"careers for unknown scale {code!r}")
+        careers[code] = MappingProxyType({
+            "ocupaciones": tuple(entry.get("ocupaciones", ())),
+            "tecnicas": tuple(entry.get("tecnicas", ())),
+        })
+    return MappingProxyType(careers)
+
+
+def item_scales(scales: Mapping) -> Mapping[int, Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """Question number -> (scales an A adds to, scales a B adds to); unscored items are absent"""
+    loadings = {}
+    for q_num in range(1, TOTAL_QUESTIONS + 1):
+        a_scales = tuple(code for code, scale in scales.items() if q_num in scale["column"])
+        b_scales = tuple(code for code, scale in scales.items() if q_num in scale["row"])
+        if a_scales or b_scales:
+            loadings[q_num] = (a_scales, b_scales)
+    return MappingProxyType(loadings)
+
+
+def lookup_category(ranges: Mapping[str, Tuple[int, int]], score: int) -> str:
+    """First category whose range contains the score"""
+    for category, (low, high) in ranges.items():
+        if low <= score <= high:
+            return category
+    return FALLBACK_CATEGORY
+
+
+def category_tables(baremos: Mapping) -> Mapping[str, Tuple[str, ...]]:
+    """Scale code -> category of every possible raw score (index = score)"""
+    return MappingProxyType({
+        code: tuple(lookup_category(ranges, score) for score in range(ITEMS_PER_SCALE + 1))
+        for code, ranges in baremos.items()
+    })
+
+
+def norm_group(sex: Optional[str]) -> str:
+    return "varones" if sex == "masculino" else "mujeres"
+
+
+class NormSet:
+    """A named edition of the baremos, compiled into per-score lookup tables"""
+
+    def __init__(self, name: str, baremos: Mapping[str, Mapping], description: str = "",
+                 instrument_version: str = VERSION):
+        self.name = name
+        self.description = description
+        self.instrument_version = instrument_version
+        self.baremos = MappingProxyType(dict(baremos))
+        self.tables = MappingProxyType({group: category_tables(b) for group, b in self.baremos.items()})
+
+    def interpret(self, score: int, sex: Optional[str], scale_code: str) -> str:
+        group = norm_group(sex)
+        table = self.tables[group].get(scale_code)
+        if table is not None and 0 <= score < len(table):
+            return table[score]
+        return lookup_category(self.baremos[group].get(scale_code, {}), score)
+
+    def __repr__(self) -> str:
+        return f"NormSet({self.name!r})"
+
+
+def compile_norm_set(name: str, data: Dict, scales: Mapping, source: str = "norms") -> NormSet:
+    """Norm set from a data/norms file or a build_norms.py table"""
+    version = data.get("instrument_version", VERSION)
+    _check(version == VERSION, source, f"norms for instrument {version}, expected {VERSION}")
+    _check(set(data.get("baremos", {})) == set(NORM_GROUPS), source, f"baremos must cover {', '.join(NORM_GROUPS)}")
+    baremos = {group: compile_baremos(data["baremos"][group], scales, source) for group in NORM_GROUPS}
+    return NormSet(data.get("name", name), baremos, data.get("description", ""), version)
+
+
+def load_norm_sets(directories: Iterable[Path], scales: Mapping,
+                   extra_directories: Iterable[Path] = ()) -> Mapping[str, NormSet]:
+    """
+    Every *.json in the directories; the set is named by its "name" or file
+    name. Files in extra_directories that fail to load are logged and skipped.
+    """
+    norm_sets = {}
+
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            norm_set = compile_norm_set(path.stem, json.load(f), scales, str(path))
+        _check(norm_set.name not in norm_sets, str(path), f"norm set {norm_set.name!r} is defined twice")
+        norm_sets[norm_set.name] = norm_set
+
+    for directory in directories:
+        for path in sorted(Path(directory).glob("*.json")):
+            load(path)
+    for directory in extra_directories:
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                load(path)
+            except Exception as e:
+                logger.error("Skipping norm set %s: %s", path, e)
+    return MappingProxyType(norm_sets)
+
+
+QUESTIONS = compile_questions(load_json(f"questions_{VERSION.lower()}.json"), f"questions_{VERSION.lower()}.json")
+SCALE_MAPPING = compile_scales(load_json(f"scales_{VERSION.lower()}.json"), f"scales_{VERSION.lower()}.json")
+ITEM_SCALES = item_scales(SCALE_MAPPING)
+
+NORM_SETS_DIR = os.environ.get("NORM_SETS_DIR")
+NORM_SETS = load_norm_sets([DATA_DIR / "norms"], SCALE_MAPPING, [Path(NORM_SETS_DIR)] if NORM_SETS_DIR else [])
+DEFAULT_NORM_SET = os.environ.get("DEFAULT_NORM_SET", LEGACY_NORM_SET)
+if DEFAULT_NORM_SET not in NORM_SETS:
+    raise InstrumentError(f"Unknown DEFAULT_NORM_SET: {DEFAULT_NORM_SET} (available: {', '.join(NORM_SETS)})")
+
+
+def get_norm_set(norm_set=None) -> NormSet:
+    """Resolve a NormSet, its name, or None (DEFAULT_NORM_SET); KeyError if unknown"""
+    if isinstance(norm_set, NormSet):
+        return norm_set
+    return NORM_SETS[norm_set or DEFAULT_NORM_SET]
+
+
+BAREMOS_VARONES = NORM_SETS[LEGACY_NORM_SET].baremos["varones"]
+BAREMOS_MUJERES = NORM_SETS[LEGACY_NORM_SET].baremos["mujeres"]
+
+CARRERAS = compile_careers(load_json("careers.json"), SCALE_MAPPING, "careers.json")
@@ -0,0 +1,103 @@
+"""
+Event-loop lag monitor and blocking-call detector.
+
+A task on the event loop sleeps LOOP_LAG_INTERVAL_MS at a time and records
+how late it wakes up (casm83_event_loop_lag_seconds). A watchdog thread
+checks the task's heartbeat; when the loop has not run it for longer than
+LOOP_BLOCK_THRESHOLD_MS, it captures the stack of the event-loop thread,
+which is the code blocking it, and logs it.
+
+With LOOP_MONITOR_STRICT=1 (the test suite) stopping the monitor raises
+EventLoopBlocked if any block was caught, so a synchronous call slipped
+into an async handler fails the test that exercised it.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Mapping, Optional
+
+from metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopBlocked(RuntimeError):
+    pass
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.25, strict: bool = False, enabled: bool = True):
+        self.interval = interval
+        self.threshold = threshold
+        self.strict = strict
+        self.enabled = enabled
+        # (seconds blocked when caught, formatted stack of the loop thread)
+        self.blocks: deque = deque(maxlen=20)
+        self._heartbeat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "LoopMonitor":
+        """LOOP_MONITOR=0 disables it; LOOP_LAG_INTERVAL_MS, LOOP_BLOCK_THRESHOLD_MS, LOOP_MONITOR_STRICT"""
+        def flag(name, default):
+            return environ.get(name, default).lower() not in ("0", "false", "no")
+        return cls(
+            float(environ.get("LOOP_LAG_INTERVAL_MS", "50")) / 1000,
+            float(environ.get("LOOP_BLOCK_THRESHOLD_MS", "250")) / 1000,
+            strict=flag("LOOP_MONITOR_STRICT", "0"),
+            enabled=flag("LOOP_MONITOR", "1"),
+        )
+
+    def start(self) -> None:
+        """Start on the running loop (from the app lifespan)"""
+        if not self.enabled:
+            return
+        self._stopped.clear()
+        self.blocks.clear()
+        self._heartbeat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch, args=(threading.get_ident(),), name="casm83-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._watchdog.join()
+        if self.strict and self.blocks:
+            raise EventLoopBlocked("\n".join(
+                f"Event loop blocked for {seconds * 1000:.0f} ms at:\n{stack}" for seconds, stack in self.blocks))
+
+    async def _measure(self) -> None:
+        while True:
+            self._heartbeat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG_SECONDS.observe(max(0.0, time.perf_counter() - self._heartbeat - self.interval))
+
+    def _watch(self, loop_thread: int) -> None:
+        reported = None
+        while not self._stopped.wait(min(self.interval, self.threshold / 2)):
+            heartbeat = self._heartbeat
+            blocked = time.perf_counter() - heartbeat - self.interval
+            if blocked < self.threshold or heartbeat == reported:
+                continue
+            frame = sys._current_frames().get(loop_thread)
+            if frame is None:
+                continue
+            reported = heartbeat  # one report per block
+            stack = "".join(traceback.format_stack(frame))
+            self.blocks.append((blocked, stack))
+            EVENT_LOOP_BLOCKS.inc()
+            logger.warning("Event loop blocked for %.0f ms at:\n%s", blocked * 1000, stack)
\ No newline at end of file
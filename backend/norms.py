@@ -0,0 +1,174 @@
+"""
+Empirical norm (baremo) building for the CASM-83 scales.
+
+Raw scale scores are integers in 0..22, so the per-scale "quantile sketch"
+is an exact frequency histogram: constant memory per scale and sex, exact
+quantiles, and merging two sketches is adding their counts. That lets each
+worker or partition build its own sketch and combine them afterwards.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_RAW_SCORE = 22
+
+# Upper bound of the baremos table, as in the R2014 manual
+TABLE_UPPER_BOUND = 99
+
+# Interpretation categories and the upper percentile (exclusive) of each band
+CATEGORY_BANDS: List[Tuple[str, float]] = [
+    ("desinteres", 10),
+    ("bajo", 25),
+    ("promedio_bajo", 40),
+    ("indeciso", 60),
+    ("promedio", 75),
+    ("promedio_alto", 85),
+    ("alto", 95),
+    ("muy_alto", 100),
+]
+
+# Sex value stored on the session -> norm group
+SEX_GROUPS = {"masculino": "varones", "femenino": "mujeres"}
+
+
+def sex_group(sex: Optional[str]) -> str:
+    """Norm group for a session's sex (same fallback as interpret_score)"""
+    return "varones" if sex == "masculino" else "mujeres"
+
+
+class ScoreSketch:
+    """Mergeable frequency sketch of the raw scores of one scale"""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: Optional[Iterable[int]] = None):
+        self.counts = list(counts) if counts is not None else [0] * (MAX_RAW_SCORE + 1)
+        if len(self.counts) != MAX_RAW_SCORE + 1:
+            raise ValueError(f"Expected {MAX_RAW_SCORE + 1} counts, got {len(self.counts)}")
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def add(self, score: int, weight: int = 1) -> None:
+        self.counts[min(max(int(score), 0), MAX_RAW_SCORE)] += weight
+
+    def merge(self, other: "ScoreSketch") -> "ScoreSketch":
+        for score, count in enumerate(other.counts):
+            self.counts[score] += count
+        return self
+
+    def quantile(self, q: float) -> int:
+        """Smallest raw score whose cumulative share reaches q (0..1)"""
+        total = self.total
+        if total == 0:
+            raise ValueError("Empty sketch")
+        target = q * total
+        cumulative = 0
+        for score, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return score
+        return MAX_RAW_SCORE
+
+    def percentile_ranks(self) -> Dict[int, float]:
+        """Mid-point percentile rank of every raw score"""
+        total = self.total
+        if total == 0:
+            return {}
+        ranks = {}
+        below = 0
+        for score, count in enumerate(self.counts):
+            ranks[score] = round(100.0 * (below + 0.5 * count) / total, 2)
+            below += count
+        return ranks
+
+    def baremos(self) -> Dict[str, Tuple[int, int]]:
+        """Baremo ranges in the same shape as BAREMOS_VARONES/BAREMOS_MUJERES"""
+        ranks = self.percentile_ranks()
+        if not ranks:
+            return {}
+
+        table: Dict[str, List[int]] = {}
+        for score in range(MAX_RAW_SCORE + 1):
+            category = next(name for name, upper in CATEGORY_BANDS
+                            if ranks[score] < upper or name == CATEGORY_BANDS[-1][0])
+            if category in table:
+                table[category][1] = score
+            else:
+                table[category] = [score, score]
+
+        # Categories without any raw score are left out; the top one is open-ended
+        ordered = [name for name, _ in CATEGORY_BANDS if name in table]
+        table[ordered[-1]][1] = TABLE_UPPER_BOUND
+        return {name: (table[name][0], table[name][1]) for name in ordered}
+
+
+class NormBuilder:
+    """Per-sex, per-scale score sketches fed one session at a time"""
+
+    def __init__(self, scales: Iterable[str]):
+        self.scales = list(scales)
+        self.sketches: Dict[str, Dict[str, ScoreSketch]] = {
+            group: {scale: ScoreSketch() for scale in self.scales}
+            for group in SEX_GROUPS.values()
+        }
+        self.sessions = {group: 0 for group in SEX_GROUPS.values()}
+
+    def add_scores(self, sex: Optional[str], scores: Dict[str, Dict]) -> None:
+        """Add the output of calculate_scores for one session"""
+        group = sex_group(sex)
+        for scale in self.scales:
+            self.sketches[group][scale].add(scores[scale]["score"])
+        self.sessions[group] += 1
+
+    def merge(self, other: "NormBuilder") -> "NormBuilder":
+        for group, sketches in other.sketches.items():
+            for scale, sketch in sketches.items():
+                self.sketches[group].setdefault(scale, ScoreSketch()).merge(sketch)
+            self.sessions[group] += other.sessions[group]
+        return self
+
+    def baremos(self, group: str) -> Dict[str, Dict[str, Tuple[int, int]]]:
+        if self.sessions[group] == 0:
+            return {}
+        return {scale: sketch.baremos() for scale, sketch in self.sketches[group].items()}
+
+    def percentile_ranks(self, group: str) -> Dict[str, Dict[int, float]]:
+        return {scale: sketch.percentile_ranks() for scale, sketch in self.sketches[group].items()}
+
+    def to_dict(self) -> Dict:
+        """Serializable sketch state, to merge partial runs later"""
+        return {
+            "scales": self.scales,
+            "sessions": dict(self.sessions),
+            "counts": {
+                group: {scale: list(sketch.counts) for scale, sketch in sketches.items()}
+                for group, sketches in self.sketches.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NormBuilder":
+        builder = cls(data["scales"])
+        for group, sketches in data["counts"].items():
+            for scale, counts in sketches.items():
+                builder.sketches[group][scale] = ScoreSketch(counts)
+        builder.sessions.update(data["sessions"])
+        return builder
+
+    def table(self) -> Dict:
+        """Full norm table: baremos and percentile ranks per sex group"""
+        return {
+            "sessions": dict(self.sessions),
+            "category_bands": [[name, upper] for name, upper in CATEGORY_BANDS],
+            "baremos": {
+                group: {scale: {name: list(bounds) for name, bounds in ranges.items()}
+                        for scale, ranges in self.baremos(group).items()}
+                for group in self.sketches
+            },
+            "percentiles": {
+                group: {scale: {str(score): rank for score, rank in ranks.items()}
+                        for scale, ranks in self.percentile_ranks(group).items()}
+                for group in self.sketches
+            },
+        }
@@ -0,0 +1,80 @@
+"""
+Static JSON payloads serialized and compressed once, served with a strong
+ETag and 304 handling.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip-only when brotli is not installed
+    brotli = None
+
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}"""
+    encodings = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[coding.lower()] = q
+    return encodings
+
+
+class PrecompressedPayload:
+    """A JSON document kept as identity, gzip and (if available) brotli bytes"""
+
+    def __init__(self, content: Any, cache_control: str = "public, max-age=86400"):
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.cache_control = cache_control
+        # Strong validators must differ per content-coding
+        self.variants: Dict[Optional[str], Tuple[bytes, str]] = {
+            None: (body, f'"{digest}"'),
+            "gzip": (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"'),
+        }
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+    def choose_encoding(self, accept_encoding: Optional[str]) -> Optional[str]:
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepted.get(coding, accepted.get("*", 0)) > 0:
+                return coding
+        return None
+
+    @staticmethod
+    def not_modified(if_none_match: Optional[str], etag: str) -> bool:
+        """True when If-None-Match holds the ETag of the variant negotiated for this request"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+                for tag in if_none_match.split(",")}
+        return etag in tags
+
+    def response(self, request: Request) -> Response:
+        encoding = self.choose_encoding(request.headers.get("accept-encoding"))
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if self.not_modified(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type="application/json", headers=headers)
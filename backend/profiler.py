@@ -0,0 +1,183 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+With PROFILE_DIR set, a fraction of the requests (PROFILE_SAMPLE_RATE) and
+every request sent with "X-Profile: 1" are sampled by a background thread
+every PROFILE_INTERVAL_MS. Each profile is written in the collapsed stack
+format (flamegraph.pl, speedscope) to PROFILE_DIR/<route>/, keeping the
+newest PROFILE_KEEP files per route.
+
+Samples are wall-clock and cover the whole worker while the request is in
+flight. Stacks are rooted at "[request]" when the request's own task is
+running, "[other task]" for any other task on the event loop (including
+the ones a streaming response spawns) and "[thread <name>]" for busy
+threadpool threads, so concurrent traffic shows up as separate towers.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+THREAD_NAME = "casm83-profiler"
+
+# Outermost frame of any task step on the event loop
+_TASK_STEP = asyncio.events.Handle._run.__code__
+
+# Innermost frames of a thread parked waiting for work
+IDLE_FRAMES = {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select")}
+
+
+def _label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+
+class Sampler:
+    """Background thread counting the stacks seen while one request runs"""
+
+    def __init__(self, loop_thread: int, task_frame, interval: float):
+        self.loop_thread = loop_thread
+        self.task_frame = task_frame
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=THREAD_NAME, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, "")
+                if ident == self.loop_thread:
+                    stack = self._task_stack(frame)
+                elif name.startswith(THREAD_NAME):
+                    continue
+                else:
+                    stack = self._thread_stack(frame, name)
+                if stack:
+                    self.samples[";".join(stack)] += 1
+
+    def _task_stack(self, frame) -> Optional[List[str]]:
+        # Frames of the running task step; none while the loop waits for I/O
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        labels, own = [], False
+        while frame is not None and frame.f_code is not _TASK_STEP:
+            own = own or frame is self.task_frame
+            labels.append(_label(frame.f_code))
+            frame = frame.f_back
+        labels.append("[request]" if own else "[other task]")
+        labels.reverse()
+        return labels
+
+    def _thread_stack(self, frame, name: str) -> Optional[List[str]]:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        labels = []
+        while frame is not None:
+            labels.append(_label(frame.f_code))
+            frame = frame.f_back
+        labels.append(f"[thread {name}]")
+        labels.reverse()
+        return labels
+
+
+class RequestProfiler:
+    def __init__(self, directory: Optional[str] = None, sample_rate: float = 0.0,
+                 interval: float = 0.005, keep: int = 20):
+        self.directory = Path(directory) if directory else None
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.keep = keep
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "RequestProfiler":
+        """PROFILE_DIR enables it; PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS and PROFILE_KEEP tune it"""
+        return cls(
+            environ.get("PROFILE_DIR") or None,
+            float(environ.get("PROFILE_SAMPLE_RATE", "0")),
+            float(environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+            int(environ.get("PROFILE_KEEP", "20")),
+        )
+
+    def wants(self, scope) -> bool:
+        if not self.enabled:
+            return False
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                return value.strip() not in (b"", b"0")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def write(self, route: str, method: str, status: int, seconds: float, samples: Counter) -> Path:
+        """Write one profile under its route and drop that route's oldest ones"""
+        folder = self.directory / _slug(route)
+        folder.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        path = folder / f"{stamp}-{method}-{status}-{round(seconds * 1000)}ms.collapsed"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in samples.most_common()), encoding="utf-8")
+        for old in sorted(folder.glob("*.collapsed"))[:-self.keep]:
+            old.unlink(missing_ok=True)
+        return path
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware sampling the requests the profiler selects"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        task = asyncio.current_task()
+        sampler = Sampler(threading.get_ident(), task.get_coro().cr_frame if task else None, self.profiler.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.profiler.write, route, scope["method"], status[0], elapsed, sampler.samples)
+            except OSError as e:
+                logger.error("Could not write profile for %s: %s", route, e)
@@ -0,0 +1,146 @@
+"""
+CASM-83 scoring: raw scale scores, their interpretation against a norm set
+and career recommendations. Depends only on instrument.py.
+
+Raw scores do not depend on the norms, so a scored cohort can be
+reinterpreted under another norm set (rescore) without reading the
+responses again.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from instrument import (
+    CARRERAS,
+    ITEM_SCALES,
+    ITEMS_PER_SCALE,
+    LEGACY_NORM_SET,
+    SCALE_MAPPING,
+    TOTAL_QUESTIONS,
+    get_norm_set,
+)
+from metrics import SCORING_SECONDS
+from timing import span
+
+RECOMMENDED_CATEGORIES = ("promedio_alto", "alto", "muy_alto")
+
+
+@SCORING_SECONDS.time("calculate_scores")
+@span("scoring")
+def calculate_scores(responses: List[Dict]) -> Dict:
+    """Calculate scores for all scales based on responses"""
+    counts = dict.fromkeys(SCALE_MAPPING, 0)
+
+    # Index responses by question once (first occurrence wins)
+    answers = {}
+    for r in responses:
+        answers.setdefault(r["question_number"], r["response"])
+
+    # A counts for the scales whose column holds the item, B for those whose row does
+    for q_num, response in answers.items():
+        loadings = ITEM_SCALES.get(q_num)
+        if loadings is None:
+            continue
+        if "A" in response:
+            for scale_code in loadings[0]:
+                counts[scale_code] += 1
+        if "B" in response:
+            for scale_code in loadings[1]:
+                counts[scale_code] += 1
+
+    return {
+        scale_code: {"name": scale_data["name"], "score": counts[scale_code], "max_score": ITEMS_PER_SCALE}
+        for scale_code, scale_data in SCALE_MAPPING.items()
+    }
+
+
+def interpret_score(score: int, sex: str, scale_code: str, norm_set=None) -> str:
+    """Interpret a score based on baremos (DEFAULT_NORM_SET unless norm_set is given)"""
+    return get_norm_set(norm_set).interpret(score, sex, scale_code)
+
+
+@SCORING_SECONDS.time("get_recommendations")
+@span("recommendations")
+def get_recommendations(scores: Dict, sex: str, norm_set=None) -> Dict:
+    """Get career recommendations based on scores"""
+    norm_set = get_norm_set(norm_set)
+    # Find top 3 scales
+    sorted_scales = sorted(scores.items(), key=lambda x: x[1]["score"], reverse=True)[:3]
+
+    recommendations = []
+    for scale_code, scale_info in sorted_scales:
+        interpretation = norm_set.interpret(scale_info["score"], sex, scale_code)
+
+        # Only recommend if score is promedio_alto, alto, or muy_alto
+        if interpretation in RECOMMENDED_CATEGORIES:
+            careers = CARRERAS.get(scale_code, {})
+            recommendations.append({
+                "scale": scale_code,
+                "name": scale_info["name"],
+                "score": scale_info["score"],
+                "interpretation": interpretation,
+                "ocupaciones": list(careers.get("ocupaciones", ())),
+                "tecnicas": list(careers.get("tecnicas", ())),
+            })
+
+    return {
+        "top_scales": recommendations,
+        "all_scores": scores
+    }
+
+
+def interpret_scores(raw_scores: Dict, sex: str, norm_set=None) -> Tuple[Dict, Dict]:
+    """Copy of the raw scores with their interpretation, and the recommendations"""
+    norm_set = get_norm_set(norm_set)
+    with span("interpretation"):
+        scores = {
+            scale_code: dict(scale_data, interpretation=norm_set.interpret(scale_data["score"], sex, scale_code))
+            for scale_code, scale_data in raw_scores.items()
+        }
+    return scores, get_recommendations(scores, sex, norm_set)
+
+
+def score_session(responses: List[Dict], sex: str, norm_set=None) -> Tuple[Dict, Dict]:
+    """Scores with their interpretation, and the recommendations, of one session"""
+    return interpret_scores(calculate_scores(responses), sex, norm_set)
+
+
+def session_norm_set(session: Dict) -> str:
+    """Norm set recorded on a session (sessions from before norm sets: r2014)"""
+    return session.get("norm_set") or LEGACY_NORM_SET
+
+
+def build_result(session: Dict, norm_set=None) -> Dict:
+    """Results document of a session, under norm_set or the one it records"""
+    norm_set = get_norm_set(norm_set or session_norm_set(session))
+    responses = session.get("responses", [])
+    sex = session.get("sex", "masculino")
+    scores, recommendations = score_session(responses, sex, norm_set)
+    return {
+        "session_id": session.get("id"),
+        "sex": sex,
+        "norm_set": norm_set.name,
+        "scores": scores,
+        "recommendations": recommendations,
+        "total_questions": TOTAL_QUESTIONS,
+        "answered_questions": len(responses),
+    }
+
+
+def score_batch(sessions: Iterable[Dict], norm_set=None) -> Iterator[Dict]:
+    """Results of many sessions (each under norm_set, or its own when None)"""
+    if norm_set is not None:
+        norm_set = get_norm_set(norm_set)  # resolve (and fail on a bad name) once
+    for session in sessions:
+        yield build_result(session, norm_set)
+
+
+def rescore(results: Iterable[Dict], norm_set) -> Iterator[Dict]:
+    """Reinterpret results from score_batch under another norm set, reusing their raw scores"""
+    norm_set = get_norm_set(norm_set)
+    for result in results:
+        raw_scores = {
+            scale_code: {k: v for k, v in scale_data.items() if k != "interpretation"}
+            for scale_code, scale_data in result["scores"].items()
+        }
+        scores, recommendations = interpret_scores(raw_scores, result["sex"], norm_set)
+        yield dict(result, norm_set=norm_set.name, scores=scores, recommendations=recommendations)
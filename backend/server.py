@@ -1,27 +1,62 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from datetime import datetime, timezone
-from io import BytesIO
-import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-import uuid
+import logging
+import orjson
 
-# PDF generation imports
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.pdfgen import canvas
+from admission import AdmissionController, AdmissionMiddleware
+from instrument import DEFAULT_NORM_SET, NORM_SETS, QUESTIONS, TOTAL_QUESTIONS, VERSION
+from loop_monitor import LoopMonitor
+from metrics import REGISTRY, MetricsMiddleware
+from precompressed import PrecompressedPayload
+from profiler import ProfilerMiddleware, RequestProfiler
+from scoring import build_result, score_session, session_norm_set
+from session_ids import new_session_id, short_session_id
+from storage import create_store
+from timing import SlowRequestMiddleware, annotate, slow_request_threshold, span
 
 load_dotenv()
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# Session storage, selected by STORAGE_BACKEND (opened/closed by the app lifespan)
+store = create_store()
+
+# Event-loop lag histogram and blocking-call detector (strict in the tests)
+loop_monitor = LoopMonitor.from_env()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor.start()
+    await store.open()
+    yield
+    await store.close()
+    await loop_monitor.stop()
+
+# orjson for every response; hot endpoints also skip jsonable_encoder by
+# returning ORJSONResponse (or pre-encoded bytes) directly
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Opt-in sampling profiler (PROFILE_DIR), innermost so queueing is not profiled
+profiler = RequestProfiler.from_env()
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+# Concurrency budgets per endpoint class (inside CORS, so 503s carry its headers)
+admission = AdmissionController.from_env()
+app.add_middleware(AdmissionMiddleware, controller=admission)
+REGISTRY.collectors.append(admission.collect)
+
+# Request count and latency per route (outside admission control, so 503s count)
+app.add_middleware(MetricsMiddleware)
+
+# Stage breakdown of requests slower than SLOW_REQUEST_MS (admission wait included)
+app.add_middleware(SlowRequestMiddleware, threshold=slow_request_threshold())
 
 # CORS configuration
 app.add_middleware(
@@ -32,231 +67,114 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB connection
-MONGO_URL = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.casm83
+# Fields the scoring handlers read from a session
+SCORING_FIELDS = ("id", "sex", "responses", "norm_set")
 
 # Pydantic models
 class TestSession(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_session_id)
     sex: str
     responses: List[Dict] = []
     created_at: str
     completed: bool = False
     completed_at: Optional[str] = None
+    norm_set: str = DEFAULT_NORM_SET
+    instrument_version: str = VERSION
 
 class StartTestRequest(BaseModel):
     sex: str
+    norm_set: Optional[str] = None  # DEFAULT_NORM_SET when omitted
 
 class SaveResponseRequest(BaseModel):
     session_id: str
-    question_number: int
+    question_number: int = Field(ge=1, le=TOTAL_QUESTIONS)
     response: List[str]  # Can be ['A'], ['B'], ['A', 'B'], or []
 
 class CompleteTestRequest(BaseModel):
     session_id: str
 
-# Questions data - CASM-83 R2014
-QUESTIONS = [
-    {"number": 1, "block": 1, "optionA": "Le gusta resolver problemas de matemáticas", "optionB": "Prefiere diseñar el modelo de casas, edificios, parques, etc."},
-    {"number": 2, "block": 1, "optionA": "Le agrada observar la conducta de las personas y opinar sobre su personalidad", "optionB": "Prefiere expresar un fenómeno concreto en una ecuación matemática"},
-    {"number": 3, "block": 1, "optionA": "Le gusta caminar por los cerros buscando piedras raras", "optionB": "Prefiere diseñar viviendas de una Urbanización"},
-    {"number": 4, "block": 1, "optionA": "Le gusta escribir artículos deportivos para un diario", "optionB": "Prefiere determinar la resistencia de los materiales para una construcción"},
-    {"number": 5, "block": 1, "optionA": "Le gusta hacer tallado en madera", "optionB": "Prefiere calcular la cantidad de materiales para una construcción"},
-    {"number": 6, "block": 1, "optionA": "Le gusta ordenar y archivar documentos", "optionB": "Prefiere proyectar el sistema eléctrico para una construcción"},
-    {"number": 7, "block": 2, "optionA": "Le agrada dedicar su tiempo en el estudio de teorías económicas", "optionB": "Prefiere dedicar su tiempo en la lectura de revistas sobre mecánica"},
-    {"number": 8, "block": 2, "optionA": "Le gusta mucho la vida militar", "optionB": "Prefiere diseñar: máquinas, motores, etc, de alto rendimiento"},
-    {"number": 9, "block": 2, "optionA": "Le gusta estudiar acerca de cómo formar una cooperativa", "optionB": "Prefiere estudiar el lenguaje de computación IBM"},
-    {"number": 10, "block": 2, "optionA": "Le agrada estudiar la gramática", "optionB": "Prefiere estudiar las matemáticas"},
-    {"number": 11, "block": 2, "optionA": "Le interesa mucho ser abogado", "optionB": "Preferiría dedicarse a escribir un tratado de física-matemática"},
-    {"number": 12, "block": 2, "optionA": "Le cuenta a su madre y a su padre todas sus cosas", "optionB": "Prefiere ocultar algunas cosas para Ud. solo (a)"},
-    {"number": 13, "block": 2, "optionA": "Le agrada estudiar la estructura atómica de los cuerpos", "optionB": "Prefiere asumir la defensa legal de alguna persona acusada por algún delito"},
-    {"number": 14, "block": 2, "optionA": "Le interesa mucho estudiar como funciona un computador", "optionB": "Prefiere el estudio de las leyes y principios de la conducta psicológica"},
-    {"number": 15, "block": 2, "optionA": "Le agrada analizar la forma como se organiza un pueblo", "optionB": "Prefiere el estudio de las leyes y principios de la conducta psicológica"},
-    {"number": 16, "block": 2, "optionA": "Le gusta analizar las rocas, piedras, tierra para averiguar su composición mineral", "optionB": "Prefiere el estudio de las organizaciones sean: campesinas, educativas, laborales, políticas, económicas o religiosas"},
-    {"number": 17, "block": 2, "optionA": "Le gusta escribir artículos culturales para un diario", "optionB": "Prefiere pensar largamente acerca de la forma como el hombre podría mejorar su existencia"},
-    {"number": 18, "block": 2, "optionA": "Le agrada diseñar: muebles, puertas, ventanas, etc", "optionB": "Prefiere dedicar su tiempo a conocer las costumbres y tradiciones de los pueblos"},
-    {"number": 19, "block": 2, "optionA": "Le gusta mucho conocer el trámite documentario de un ministerio público", "optionB": "Prefiere el estudio de las religiones"},
-    {"number": 20, "block": 2, "optionA": "Le interesa mucho conocer los mecanismos de la economía nacional", "optionB": "Prefiere ser guía espiritual de las personas"},
-    {"number": 21, "block": 2, "optionA": "Le interesa mucho tener bajo su mando a un grupo de soldados", "optionB": "Prefiere enseñar lo que sabe a un grupo de compañeros"},
-    {"number": 22, "block": 2, "optionA": "Le gusta ser parte de la administración de una cooperativa", "optionB": "Prefiere el estudio de las formas más efectivas para la enseñanza de jóvenes y niños"},
-    {"number": 23, "block": 3, "optionA": "Le interesa mucho estudiar la raíz gramatical de las palabras de su idioma", "optionB": "Prefiere dedicar su tiempo en la búsqueda de huacos y ruinas"},
-    {"number": 24, "block": 3, "optionA": "Le agrada mucho estudiar el código del derecho civil", "optionB": "Prefiere el estudio de las culturas peruanas y de otras naciones"},
-    {"number": 25, "block": 3, "optionA": "Le agrada que sus hermanos o familiares lo vigilen constantemente", "optionB": "Prefiere que confíen en su buen criterio"},
-    {"number": 26, "block": 3, "optionA": "Le gustaría escribir un tratado acerca de la historia del Perú", "optionB": "Prefiere asumir la defensa legal de un acusado por narcotráfico"},
-    {"number": 27, "block": 3, "optionA": "Le gusta proyectar las redes de agua y desagüe de una ciudad", "optionB": "Prefiere estudiar acerca de las enfermedades de la dentadura"},
-    {"number": 28, "block": 3, "optionA": "Le gusta visitar museos arqueológicos y conocer la vivienda y otros utensilios de nuestros antepasados", "optionB": "Prefiere hacer moldes para una dentadura postiza"},
-    {"number": 29, "block": 3, "optionA": "Le gusta recolectar plantas y clasificarlas por especies", "optionB": "Prefiere leer sobre el origen y funcionamiento de las plantas y animales"},
-    {"number": 30, "block": 3, "optionA": "Le gusta saber como se organiza una editorial periodística", "optionB": "Prefiere conocer las características de los órganos humanos y como funcionan"},
-    {"number": 31, "block": 3, "optionA": "Le agrada construir; muebles, puertas, ventanas, etc.", "optionB": "Prefiere estudiar acerca de las enfermedades de las personas"},
-    {"number": 32, "block": 3, "optionA": "Le agradaría trabajar en la recepción y trámite documentario de una oficina pública", "optionB": "Prefiere experimentar con las plantas para obtener nuevas especies"},
-    {"number": 33, "block": 3, "optionA": "Le gusta proyectar los mecanismos de inversión económica de una empresa", "optionB": "Prefiere analizar las tierras para obtener mayor producción agropecuaria"},
-    {"number": 34, "block": 3, "optionA": "Le agrada recibir y ejecutar órdenes de un superior", "optionB": "Prefiere el estudio de los órganos de los animales y su funcionamiento"},
-    {"number": 35, "block": 3, "optionA": "Le gusta saber mucho sobre los principios económicos de una cooperativa", "optionB": "Prefiere conocer las enfermedades que aquejan, sea: el ganado, aves, perros, etc."},
-    {"number": 36, "block": 3, "optionA": "Le agrada estudiar los fenómenos (sonidos verbales) de su idioma, o de otros", "optionB": "Prefiere dedicar mucho de su tiempo en el estudio de la química"},
-    {"number": 37, "block": 3, "optionA": "Le agrada defender pleitos judiciales de recuperación de tierras", "optionB": "Prefiere hacer mezclas de sustancias químicas para obtener derivados con fines productivos"},
-    {"number": 38, "block": 4, "optionA": "Sus amigos saben todo de usted, para ellos no tiene secretos", "optionB": "Prefiere reservar algo para usted solo (a) algunos secretos"},
-    {"number": 39, "block": 4, "optionA": "Le gusta investigar acerca de los recursos naturales de nuestro país (su fauna, su flora y suelo)", "optionB": "Prefiere estudiar derecho internacional"},
-    {"number": 40, "block": 4, "optionA": "Le gusta desarrollar programas de computación para proveer de información rápida y eficiente: a una empresa, institución, etc.", "optionB": "Prefiere obtener fotografías que hagan noticia"},
-    {"number": 41, "block": 4, "optionA": "Le gusta mucho conocer el problema de las personas y tramitar su solución", "optionB": "Prefiere dedicar su tiempo a la búsqueda de personajes que hacen noticia"},
-    {"number": 42, "block": 4, "optionA": "Le gusta estudiar las características territoriales de los continentes", "optionB": "Prefiere entrevistar a políticos con el propósito de establecer su posición frente a un problema"},
-    {"number": 43, "block": 4, "optionA": "Le gusta conocer el funcionamiento de las máquinas impresoras de periódicos", "optionB": "Prefiere trabajar en el montaje fotográfico de un diario o revista"},
-    {"number": 44, "block": 4, "optionA": "Le gusta proyectar el tipo de muebles, cortinas y adornos sea para una oficina o para un hogar", "optionB": "Prefiere trabajar como redactor en un diario o revista"},
-    {"number": 45, "block": 4, "optionA": "Le gusta redactar cartas comerciales, al igual que oficios y solicitudes", "optionB": "Prefiere averiguar lo que opina el público respecto a un producto"},
-    {"number": 46, "block": 4, "optionA": "Le gusta estudiar las leyes de la oferta y la demanda", "optionB": "Prefiere redactar el tema para un anuncio publicitario"},
-    {"number": 47, "block": 4, "optionA": "Le gusta organizar el servicio de inteligencia de un cuartel", "optionB": "Prefiere trabajar en una agencia de publicidad"},
-    {"number": 48, "block": 4, "optionA": "Le gusta trabajar buscando casas de alquiler para ofrecerlas al público", "optionB": "Prefiere estudiar las características psicológicas para lograr un buen impacto publicitario"},
-    {"number": 49, "block": 4, "optionA": "Le interesa investigar acerca de cómo se originaron los idiomas", "optionB": "Prefiere preparar y ejecutar encuestas para conocer la opinión de las personas"},
-    {"number": 50, "block": 4, "optionA": "Le agrada hacer los trámites legales de un juicio de divorcio", "optionB": "Prefiere trabajar estableciendo contactos entre una empresa y otra"},
-    {"number": 51, "block": 5, "optionA": "Cuando está dando un examen y tiene la oportunidad de verificar una respuesta, nunca lo hace", "optionB": "Prefiere aprovechar la seguridad que la ocasión le confiere"},
-    {"number": 52, "block": 5, "optionA": "Le interesa investigar sobre los problemas del lenguaje en la comunicación masiva", "optionB": "Prefiere redactar documentos legales para contratos internacionales"},
-    {"number": 53, "block": 5, "optionA": "Le gusta trabajar haciendo instalaciones eléctricas", "optionB": "Prefiere dedicar su tiempo en la lectura de las novedades en la decoración de ambientes"},
-    {"number": 54, "block": 5, "optionA": "Le agrada mucho visitar el hogar de los trabajadores con el fin de verificar su verdadera situación social y económica", "optionB": "Prefiere trabajar en el decorado de tiendas y vitrinas"},
-    {"number": 55, "block": 5, "optionA": "Le gusta estudiar los recursos geográficos", "optionB": "Prefiere observar el comportamiento de las personas e imitarlas"},
-    {"number": 56, "block": 5, "optionA": "Le gustaría dedicar su tiempo a la organización de eventos deportivos entre dos o mas centros laborales", "optionB": "Preferiría dedicarse al estudio de la vida y obra de los grandes actores del cine y del teatro"},
-    {"number": 57, "block": 5, "optionA": "Le gustaría estudiar escultura en la escuela de bellas artes", "optionB": "Preferiría ser parte de un elenco de teatro"},
-    {"number": 58, "block": 5, "optionA": "Le gusta trabajar de mecanógrafo (a)", "optionB": "Le gusta más dar forma a objetos moldeables; sea: plastilina, migas, arcilla, piedras, etc."},
-    {"number": 59, "block": 5, "optionA": "Le agrada mucho estudiar los fundamentos por los que una moneda se devalúa", "optionB": "Prefiere la lectura acerca de la vida y obra de grandes escultores como Miguel Angel, Leonardo de Vinci, etc."},
-    {"number": 60, "block": 5, "optionA": "Le agrada mucho la vida del marinero", "optionB": "Prefiere combinar colores para expresar con naturalidad y belleza un paisaje"},
-    {"number": 61, "block": 5, "optionA": "Le gustaría trabajar tramitando la compra-venta de inmuebles", "optionB": "Prefiere utilizar las líneas y colores para expresar un sentimiento"},
-    {"number": 62, "block": 5, "optionA": "Le gusta estudiar las lenguas y dialectos aborígenes", "optionB": "Prefiere combinar sonidos para obtener una nueva melodía"},
-    {"number": 63, "block": 5, "optionA": "Le agrada tramitar judicialmente el reconocimiento de sus hijos", "optionB": "Le agrada más aprender a tocar algún instrumento musical"},
-    {"number": 64, "block": 6, "optionA": "Si pasa por un cine y descubre que no hay vigilancia, no se aprovecha de la situación", "optionB": "Prefiere aprovechar la ocasión para entrar sin pagar su boleto"},
-    {"number": 65, "block": 6, "optionA": "Le interesa más diseñar y/o confeccionar artículos de cuero", "optionB": "Prefiere asumir la defensa legal en la demarcación de fronteras territoriales"},
-    {"number": 66, "block": 6, "optionA": "Prefiere estudiar acerca de cómo la energía se transforma en imágenes de radio, tv, etc.", "optionB": "Le gusta tomar apuntes textuales o didácticos de otras personas"},
-    {"number": 67, "block": 6, "optionA": "Le gusta leer sobre la vida y obra de los santos religiosos", "optionB": "Prefiere hacer catálogos o listados de los libros de una biblioteca"},
-    {"number": 68, "block": 6, "optionA": "Le gusta dedicar mucho de su tiempo en la lectura de la astronomía", "optionB": "Prefiere trabajar clasificando los libros por autores"},
-    {"number": 69, "block": 6, "optionA": "Le gusta trabajar defendiendo el prestigio de su centro laboral", "optionB": "Prefiere trabajar recibiendo y entregando documentos valorados como: cheques, giros, libretas de ahorro, etc."},
-    {"number": 70, "block": 6, "optionA": "Le interesa mucho leer sobre la vida y obra de músicos famosos", "optionB": "Prefiere el tipo de trabajo de un empleado bancario"},
-    {"number": 71, "block": 6, "optionA": "Le interesa mucho conseguir un trabajo en un banco comercial", "optionB": "Prefiere dedicarse a clasificar libros por especialidades"},
-    {"number": 72, "block": 6, "optionA": "Le gusta dedicar su tiempo en el conocimiento del por qué ocurre la inflación económica", "optionB": "Prefiere dedicarse al estudio de cómo se organiza una biblioteca"},
-    {"number": 73, "block": 6, "optionA": "Le interesa mucho el conocimiento de la organización de un buque de guerra", "optionB": "Prefiere dedicarse a la recepción y comunicación de mensajes sean verbales o por escrito"},
-    {"number": 74, "block": 6, "optionA": "Le gusta trabajar tramitando la compra-venta de vehículos motorizados", "optionB": "Prefiere transcribir los documentos de la administración pública"},
-    {"number": 75, "block": 6, "optionA": "Le gusta dedicar gran parte de su tiempo al estudio de las normas y reglas para el uso adecuado del lenguaje", "optionB": "Prefiere trabajar como secretario adjunto al jefe"},
-    {"number": 76, "block": 6, "optionA": "Le gusta dedicar su tiempo planteando la defensa de un juicio de alquiler", "optionB": "Prefiere asesorar y aconsejar en torno a tramites documentarios"},
-    {"number": 77, "block": 7, "optionA": "Si en la calle se encuentra dinero, sin documento alguno acude a la radio, TV para buscar al infortunado", "optionB": "Preferiría quedarse con el dinero, pues no se conoce al dueño"},
-    {"number": 78, "block": 7, "optionA": "Le interesa trabajar en la implementación de bibliotecas distritales", "optionB": "Prefiere asumir la responsabilidad legal para que un fugitivo, con residencia en otro país, sea devuelto a su país"},
-    {"number": 79, "block": 7, "optionA": "Le gusta estudiar acerca de cómo la energía se transforma en movimiento", "optionB": "Preferiría hacer una tesis sobre manejo económico para el país"},
-    {"number": 80, "block": 7, "optionA": "Le agrada leer sobre la vida y obra de grandes personajes de educación, sean: profesores, filósofos, psicólogos", "optionB": "Prefiere estudiar acerca de las bases económicas de un país"},
-    {"number": 81, "block": 7, "optionA": "Le gusta estudiar los astros; sus características, origen y evolución", "optionB": "Prefiere establecer comparaciones entre los sistemas y modelos económicos del mundo"},
-    {"number": 82, "block": 7, "optionA": "Le gustaría trabajar exclusivamente promocionando la imagen de su centro laboral", "optionB": "Prefiere estudiar las grandes corrientes ideológicas del mundo"},
-    {"number": 83, "block": 7, "optionA": "Le gusta y practica el baile como expresión artística", "optionB": "Prefiere estudiar las bases de la organización política del Tahuantinsuyo"},
-    {"number": 84, "block": 7, "optionA": "Le gusta mucho saber sobre el manejo de los archivos públicos", "optionB": "Prefiere establecer diferencias entre los distintos modelos políticos"},
-    {"number": 85, "block": 7, "optionA": "Le gusta investigar sobre las características de los regímenes totalitarios, democráticos, republicanos, etc.", "optionB": "Prefiere ser el representante de su país en el extranjero"},
-    {"number": 86, "block": 7, "optionA": "Le gusta ser capitán de un buque de guerra", "optionB": "Le interesa más formar y conducir grupos con fines políticos"},
-    {"number": 87, "block": 7, "optionA": "Le agrada ser visitador médico", "optionB": "Prefiere dedicar su tiempo en la lectura de la vida y obra de los grandes políticos"},
-    {"number": 88, "block": 7, "optionA": "Siente placer buscando en el diccionario el significado de palabras nuevas", "optionB": "Prefiere dedicar todo su tiempo en aras de la paz entre las naciones"},
-    {"number": 89, "block": 7, "optionA": "Le interesa mucho estudiar el código penal", "optionB": "Prefiere estudiar los sistemas políticos de otros países"},
-    {"number": 90, "block": 8, "optionA": "Le agradan que le dejen muchas tareas para su casa", "optionB": "Prefiere que estas sean lo necesario para aprender"},
-    {"number": 91, "block": 8, "optionA": "Le agrada ser miembro activo de una agrupación política", "optionB": "Prefiere escuchar acusaciones y defensas para sancionar de acuerdo a lo que la ley señala"},
-    {"number": 92, "block": 8, "optionA": "Le gusta hacer los cálculos para el diseño de telas a gran escala", "optionB": "Le interesa más la mecánica de los barcos y submarinos"},
-    {"number": 93, "block": 8, "optionA": "Le agrada observar y evaluar como se desarrolla la inteligencia y personalidad", "optionB": "Prefiere ser aviador"},
-    {"number": 94, "block": 8, "optionA": "Le gustaría dedicar su tiempo en el descubrimiento de nuevos medicamentos", "optionB": "Prefiere dedicarse a la lectura acerca de la vida y obra de reconocidos militares, que han aportado en la organización de su institución"},
-    {"number": 95, "block": 8, "optionA": "Le gusta la aventura cuando está dirigida a descubrir algo que haga noticia", "optionB": "Prefiere conocer el mecanismo de los aviones de guerra"},
-    {"number": 96, "block": 8, "optionA": "Le gusta ser parte de una agrupación de baile y danzas", "optionB": "Preferiría pertenecer a la Fuerza Aérea"},
-    {"number": 97, "block": 8, "optionA": "Le gusta el trabajo de llevar mensajes de una dependencia a otra", "optionB": "Prefiere ser miembro de la Policía"},
-    {"number": 98, "block": 8, "optionA": "Le gustaría trabajar estableciendo vínculos culturales con otros países", "optionB": "Prefiere el trabajo en la detección y comprobación del delito"},
-    {"number": 99, "block": 8, "optionA": "Le gusta trabajar custodiando el orden público", "optionB": "Prefiere ser vigilante receloso de nuestras fronteras"},
-    {"number": 100, "block": 8, "optionA": "Le gusta persuadir a los boticarios en la compra de nuevos medicamentos", "optionB": "Prefiere trabajar vigilando a los presos en las prisiones"},
-    {"number": 101, "block": 8, "optionA": "Le apasiona leer de escritores serios y famosos", "optionB": "Prefiere organizar el servicio de inteligencia en la destrucción del narcotráfico"},
-    {"number": 102, "block": 8, "optionA": "Le gusta asumir la defensa legal de una persona acusada de robo", "optionB": "Prefiere conocer el mecanismo de las armas de fuego"},
-    {"number": 103, "block": 9, "optionA": "Se aleja Ud. cuando sus amistades cuentan 'chistes colorados'", "optionB": "Prefiere quedarse gozando de la ocasión"},
-    {"number": 104, "block": 9, "optionA": "Le interesa mucho saber cómo se organiza un ejercito", "optionB": "Prefiere participar como jurado de un juicio"},
-    {"number": 105, "block": 9, "optionA": "Le gusta proyectar la extracción de metales de una mina", "optionB": "Prefiere estudiar el nombre de los medicamentos y su ventaja comercial"},
-    {"number": 106, "block": 9, "optionA": "Le gusta descifrar los diseños gráficos y escritos de culturas muy antiguas", "optionB": "Prefiere persuadir a la gente para que compre un producto"},
-    {"number": 107, "block": 9, "optionA": "Le agrada el estudio de los mecanismos de la visión y de sus enfermedades", "optionB": "Prefiere vender cosas"},
-    {"number": 108, "block": 9, "optionA": "Le gustaría ganarse la vida escribiendo para un diario o revista", "optionB": "Prefiere estudiar el mercado y descubrir el producto de mayor demanda"},
-    {"number": 109, "block": 9, "optionA": "Le gusta actuar, representando a distintos personajes", "optionB": "Le agrada más tener su propio negocio"},
-    {"number": 110, "block": 9, "optionA": "Le gusta sentirse importante sabiendo que de usted depende la rapidez o la lentitud de una solicitud", "optionB": "Prefiere trabajar en un bazar"},
-    {"number": 111, "block": 9, "optionA": "Le gusta planificar sea para una empresa local o a nivel nacional", "optionB": "Prefiere el negocio de una bodega o tienda de abarrotes"},
-    {"number": 112, "block": 9, "optionA": "Le interesa mucho utilizar sus conocimientos en la construcción de armamentos", "optionB": "Prefiere organizar empresas de finanzas y comercio"},
-    {"number": 113, "block": 9, "optionA": "Le agrada llevar la contabilidad de una empresa o negocio", "optionB": "Prefiere hacer las planillas de pago para los trabajadores de una empresa o institución"},
-    {"number": 114, "block": 9, "optionA": "Le agrada escribir cartas y luego hacer tantas correcciones como sean necesarias", "optionB": "Prefiere ser incorporado como miembros de la corporación nacional de comercio"},
-    {"number": 115, "block": 9, "optionA": "Le gusta asumir la defensa legal de una persona acusada de asesinato", "optionB": "Prefiere ser incorporado como miembro de la corporación nacional de comercio"},
-    {"number": 116, "block": 10, "optionA": "Le agrada vestir todos los días muy formalmente (con terno y corbata por ejemplo)", "optionB": "Prefiere reservar esa vestimenta para ciertas ocasiones"},
-    {"number": 117, "block": 10, "optionA": "Le gusta evaluar la producción laboral de un grupo de trabajadores", "optionB": "Prefiere plantear, previa investigación, la acusación de un sujeto que ha actuado en contra de la ley"},
-    {"number": 118, "block": 10, "optionA": "Le gusta estudiar acerca de los reactores atómicos", "optionB": "Prefiere el estudio de las distintas formas literarias"},
-    {"number": 119, "block": 10, "optionA": "Le agrada estudiar en torno de la problemática social del Perú", "optionB": "Prefiere escribir cuidando mucho ser comprendido al tiempo que sus escritos resulten agradables al lector"},
-    {"number": 120, "block": 10, "optionA": "Le gustaría escribir un tratado sobre anatomía humana", "optionB": "Prefiere recitar sus propios poemas"},
-    {"number": 121, "block": 10, "optionA": "Le gustaría incorporarse al colegio de periodistas del Perú", "optionB": "Prefiere aprender otro idioma"},
-    {"number": 122, "block": 10, "optionA": "Le gusta diseñar y/o confeccionar: adornos, utensilios, etc., en cerámica, vidrio; etc.", "optionB": "Prefiere traducir textos escritos en otros idiomas"},
-    {"number": 123, "block": 10, "optionA": "Le gustaría desarrollar técnicas de mayor eficiencia en el trámite documentario de un ministerio público", "optionB": "Prefiere escribir en otro idioma"},
-    {"number": 124, "block": 10, "optionA": "Le agradaría mucho ser secretario general de una central sindical", "optionB": "Prefiere dedicar su tiempo al estudio de lenguas extintas (muertas)"},
-    {"number": 125, "block": 10, "optionA": "Le gustaría dedicarse al estudio de normas de alta peligrosidad", "optionB": "Prefiere trabajar como traductor"},
-    {"number": 126, "block": 10, "optionA": "Le gusta llevar la estadística de ingresos y egresos mensuales de una empresa o tal vez de una nación", "optionB": "Prefiere los cursos de idiomas: Inglés, Francés, Italiano, etc."},
-    {"number": 127, "block": 10, "optionA": "Le gustaría ser incorporado como miembro de la Real Academia de la Lengua Española", "optionB": "Prefiere ser incorporado al Instituto Nacional del Idioma"},
-    {"number": 128, "block": 10, "optionA": "Le interesaría ser el asesor legal de un ministro de estado", "optionB": "Prefiere aquellas situaciones que le inspiran a escribir"},
-    {"number": 129, "block": 11, "optionA": "Nunca ha bebido licor, aún en ciertas ocasiones lo ha rechazado", "optionB": "Por lo contrario se ha adecuado a las circunstancias"},
-    {"number": 130, "block": 11, "optionA": "Le agrada dedicar mucho de su tiempo en la escritura de poemas, cuentos, etc.", "optionB": "Prefiere sentirse importante al saber que de su defensa legal depende la libertad de una persona"},
-    {"number": 131, "block": 11, "optionA": "Le agrada estudiar la estructura atómica de los cuerpos", "optionB": "Prefiere asumir la defensa legal de una persona acusada por algún delito"},
-    {"number": 132, "block": 11, "optionA": "Le gustaría escribir un tratado acerca de la historia del Perú", "optionB": "Prefiere asumir la defensa legal de un acusado por narcotráfico"},
-    {"number": 133, "block": 11, "optionA": "Le gusta investigar de los recursos naturales de nuestro país (su fauna, su flora, su suelo)", "optionB": "Prefiere estudiar el derecho internacional"},
-    {"number": 134, "block": 11, "optionA": "Le interesa investigar sobre los problemas del lenguaje en la comunicación masiva", "optionB": "Prefiere redactar documentos legales para contratos internacionales"},
-    {"number": 135, "block": 11, "optionA": "Le interesa diseñar y/o confeccionar artículos de cuero", "optionB": "Prefiere asumir la defensa legal en la demarcación de fronteras territoriales"},
-    {"number": 136, "block": 11, "optionA": "Le interesa trabajar en la implementación de bibliotecas distritales", "optionB": "Prefiere asumir la responsabilidad legal para que un fugitivo con residencia en otro país sea devuelto a su país"},
-    {"number": 137, "block": 11, "optionA": "Le agrada ser miembro activo de una agrupación política", "optionB": "Prefiere escuchar acusaciones y defensas para sancionar de acuerdo a lo que la ley señala"},
-    {"number": 138, "block": 11, "optionA": "Le interesa mucho saber como se organiza un ejército", "optionB": "Prefiere participar como jurado en un juicio"},
-    {"number": 139, "block": 11, "optionA": "Le gusta evaluar la producción laboral de un grupo de trabajadores", "optionB": "Prefiere plantear previa investigación la acusación de un sujeto que ha ido en contra de la ley"},
-    {"number": 140, "block": 11, "optionA": "Le gusta dedicar mucho de su tiempo en la escritura de poemas, cuentos", "optionB": "Prefiere sentirse importante al saber que de su defensa legal depende la libertad de una persona"},
-    {"number": 141, "block": 11, "optionA": "Le gustaría dedicarse a la legalización de documentos (contratos, cartas, partidas, títulos, etc.)", "optionB": "Prefiere ser incorporado en una comisión para redactar un proyecto de ley"},
-    {"number": 142, "block": 11, "optionA": "Le agrada viajar en un microbús repleto de gente aún cuando no tiene ningún apuro", "optionB": "Prefiere esperar otro vehículo"},
-    {"number": 143, "block": 11, "optionA": "Le gusta resolver problemas matemáticos", "optionB": "Prefiere diseñar el modelo de casas, edificios, parques, etc."}
-]
+class BatchFilter(BaseModel):
+    completed: Optional[bool] = None
+    sex: Optional[str] = None
+
+class BatchResultsRequest(BaseModel):
+    session_ids: Optional[List[str]] = None  # either the ids...
+    filter: Optional[BatchFilter] = None  # ...or the same filters as /api/all-sessions
+    norm_set: Optional[str] = None  # default: each session's own
+
+def check_norm_set(name: Optional[str]) -> Optional[str]:
+    """Reject norm sets this deployment does not have"""
+    if name is not None and name not in NORM_SETS:
+        raise HTTPException(status_code=400, detail=f"Unknown norm set: {name}")
+    return name
+
+def scoring_norm_set(session_id: str, session: Dict, name: Optional[str]) -> str:
+    """Norm set to score a session with: the requested one, else the one it records (if still loaded)"""
+    name = name or session_norm_set(session)
+    if name not in NORM_SETS:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Session {session_id} records norm set {name}, which is not loaded; "
+                   f"pass norm_set to score it with another one"
+        )
+    return name
 
 @app.get("/")
 async def root():
     return {"message": "CASM-83 R2014 API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the in-process metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/health")
+async def health():
+    """Storage connectivity (and connection pool statistics for MongoDB)"""
+    storage_health = await store.health()
+    status_code = 200 if storage_health["status"] == "ok" else 503
+    return ORJSONResponse(
+        {"backend": store.name, **storage_health, "admission": admission.stats()}, status_code=status_code
+    )
+
 @app.post("/api/start-test")
 async def start_test(request: StartTestRequest):
     """Start a new test session"""
     try:
         session = TestSession(
             sex=request.sex,
-            created_at=datetime.now(timezone.utc).isoformat()
+            created_at=datetime.now(timezone.utc).isoformat(),
+            norm_set=check_norm_set(request.norm_set) or DEFAULT_NORM_SET
         )
         
-        session_dict = session.dict()
-        await db.test_sessions.insert_one(session_dict)
+        await store.create_session(session.dict())
         
-        return {"session_id": session.id, "sex": session.sex}
+        return {"session_id": session.id, "sex": session.sex, "norm_set": session.norm_set}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Serialized and compressed once; every student loads it on page open
+QUESTIONS_PAYLOAD = PrecompressedPayload({"questions": [dict(q) for q in QUESTIONS], "total": len(QUESTIONS)})
+
 @app.get("/api/questions")
-async def get_questions():
+async def get_questions(request: Request):
     """Get all questions"""
-    return {"questions": QUESTIONS, "total": len(QUESTIONS)}
+    return QUESTIONS_PAYLOAD.response(request)
 
 @app.post("/api/save-response")
 async def save_response(request: SaveResponseRequest):
     """Save a response for a question"""
+    annotate(session_id=request.session_id)
     try:
-        # Find the session
-        session = await db.test_sessions.find_one({"id": request.session_id})
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        # Update or add response
-        responses = session.get("responses", [])
-        
-        # Remove existing response for this question if any
-        responses = [r for r in responses if r["question_number"] != request.question_number]
-        
-        # Add new response
-        responses.append({
-            "question_number": request.question_number,
-            "response": request.response
-        })
-        
-        # Update session
-        await db.test_sessions.update_one(
-            {"id": request.session_id},
-            {"$set": {"responses": responses}}
+        total_responses = await store.save_response(
+            request.session_id, request.question_number, request.response
         )
+        if total_responses is None:
+            raise HTTPException(status_code=404, detail="Session not found")
         
-        return {"success": True, "total_responses": len(responses)}
+        return {"success": True, "total_responses": total_responses}
     except HTTPException:
         raise
     except Exception as e:
@@ -265,18 +183,14 @@ async def save_response(request: SaveResponseRequest):
 @app.post("/api/complete-test")
 async def complete_test(request: CompleteTestRequest):
     """Mark test as completed"""
+    annotate(session_id=request.session_id)
     try:
-        session = await db.test_sessions.find_one({"id": request.session_id})
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        await db.test_sessions.update_one(
-            {"id": request.session_id},
-            {"$set": {
-                "completed": True,
-                "completed_at": datetime.now(timezone.utc).isoformat()
-            }}
+        found = await store.complete(
+            request.session_id,
+            datetime.now(timezone.utc).isoformat()
         )
+        if not found:
+            raise HTTPException(status_code=404, detail="Session not found")
         
         return {"success": True, "message": "Test completed"}
     except HTTPException:
@@ -288,440 +202,169 @@ async def complete_test(request: CompleteTestRequest):
 async def get_test_session(session_id: str):
     """Get test session details"""
     try:
-        session = await db.test_sessions.find_one({"id": session_id})
+        session = await store.get(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Remove MongoDB _id field
-        session.pop("_id", None)
-        return session
+        with span("serialization"):
+            return ORJSONResponse(session)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sessions encoded per export chunk
+EXPORT_CHUNK_SIZE = 200
+
+async def read_up_to(iterator, size):
+    chunk = []
+    async for item in iterator:
+        chunk.append(item)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+async def export_sessions_json(first_chunk, sessions):
+    """Stream {"sessions": [...], "total": n} encoded chunk by chunk"""
+    yield b'{"sessions":['
+    total = 0
+    chunk = first_chunk
+    try:
+        while chunk:
+            with span("serialization"):
+                encoded = b",".join(orjson.dumps(session) for session in chunk)
+            yield (b"," if total else b"") + encoded
+            total += len(chunk)
+            chunk = await read_up_to(sessions, EXPORT_CHUNK_SIZE)
+    except Exception:
+        # The 200 is already sent: re-raising aborts the connection, so the
+        # client sees a failed download instead of a short, valid-looking export
+        logger.exception("Session export failed after %d sessions", total)
+        raise
+    yield b'],"total":%d}' % total
+
 @app.get("/api/all-sessions")
-async def get_all_sessions():
+async def get_all_sessions(completed: Optional[bool] = None, sex: Optional[str] = None):
     """Get all test sessions (for data export)"""
     try:
-        sessions = await db.test_sessions.find().to_list(length=None)
-        # Remove MongoDB _id field
-        for session in sessions:
-            session.pop("_id", None)
-        return {"sessions": sessions, "total": len(sessions)}
+        query = {}
+        if completed is not None:
+            query["completed"] = completed
+        if sex is not None:
+            query["sex"] = sex
+        sessions = store.iterate(query)
+        # Read the first chunk here so early storage errors still become a 500
+        first_chunk = await read_up_to(sessions, EXPORT_CHUNK_SIZE)
+        return StreamingResponse(export_sessions_json(first_chunk, sessions), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# CASM-83 Scoring System
-# Mapeo de preguntas a escalas
-SCALE_MAPPING = {
-    "CCFM": {
-        "name": "Ciencias Físicas Matemáticas",
-        "column": [1, 14, 27, 40, 53, 66, 79, 92, 105, 118, 131],  # Opción A
-        "row": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]  # Opción B
-    },
-    "CCSS": {
-        "name": "Ciencias Sociales",
-        "column": [2, 15, 28, 41, 54, 67, 80, 93, 106, 119, 132],
-        "row": [14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24]
-    },
-    "CCNA": {
-        "name": "Ciencias Naturales",
-        "column": [3, 16, 29, 42, 55, 68, 81, 94, 107, 120, 133],
-        "row": [27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37]
-    },
-    "CCCO": {
-        "name": "Ciencias de la Comunicación",
-        "column": [4, 17, 30, 43, 56, 69, 82, 95, 108, 121, 134],
-        "row": [40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50]
-    },
-    "ARTE": {
-        "name": "Artes",
-        "column": [5, 18, 31, 44, 57, 70, 83, 96, 109, 122, 135],
-        "row": [53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63]
-    },
-    "BURO": {
-        "name": "Burocracia",
-        "column": [6, 19, 32, 45, 58, 71, 84, 97, 110, 123, 136],
-        "row": [66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76]
-    },
-    "CCEP": {
-        "name": "Ciencias Económicas Políticas",
-        "column": [7, 20, 33, 46, 59, 72, 85, 98, 111, 124, 137],
-        "row": [79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89]
-    },
-    "IIAA": {
-        "name": "Institutos Armados",
-        "column": [8, 21, 34, 47, 60, 73, 86, 99, 112, 125, 138],
-        "row": [92, 93, 94, 95, 96, 97, 98, 99, 100, 101, 102]
-    },
-    "FINA": {
-        "name": "Finanzas",
-        "column": [9, 22, 35, 48, 61, 74, 87, 100, 113, 126, 139],
-        "row": [105, 106, 107, 108, 109, 110, 111, 112, 113, 114, 115]
-    },
-    "LING": {
-        "name": "Lingüística",
-        "column": [10, 23, 36, 49, 62, 75, 88, 101, 114, 127, 140],
-        "row": [118, 119, 120, 121, 122, 123, 124, 125, 126, 127, 128]
-    },
-    "JURI": {
-        "name": "Jurisprudencia",
-        "column": [11, 24, 37, 50, 63, 76, 89, 102, 115, 128, 141],
-        "row": [131, 132, 133, 134, 135, 136, 137, 138, 139, 140, 141]
-    }
-}
-
-# Baremos para interpretación (Varones)
-BAREMOS_VARONES = {
-    "CCFM": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 10), "promedio": (11, 13), "promedio_alto": (14, 15), "alto": (16, 17), "muy_alto": (18, 22)},
-    "CCSS": {"desinteres": (1, 3), "bajo": (4, 6), "promedio_bajo": (7, 8), "indeciso": (9, 12), "promedio": (13, 14), "promedio_alto": (15, 16), "alto": (17, 22), "muy_alto": (23, 99)},
-    "CCNA": {"desinteres": (0, 4), "bajo": (5, 7), "promedio_bajo": (8, 9), "indeciso": (10, 13), "promedio": (14, 15), "promedio_alto": (16, 18), "alto": (19, 22), "muy_alto": (23, 99)},
-    "CCCO": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 10), "promedio": (11, 13), "promedio_alto": (14, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "ARTE": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 10), "promedio": (11, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "BURO": {"desinteres": (0, 3), "bajo": (4, 5), "promedio_bajo": (6, 7), "indeciso": (8, 11), "promedio": (12, 13), "promedio_alto": (14, 16), "alto": (17, 22), "muy_alto": (23, 99)},
-    "CCEP": {"desinteres": (0, 3), "bajo": (4, 5), "promedio_bajo": (6, 7), "indeciso": (8, 12), "promedio": (13, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "IIAA": {"desinteres": (0, 3), "bajo": (4, 5), "promedio_bajo": (6, 7), "indeciso": (8, 12), "promedio": (13, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "FINA": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 10), "promedio": (11, 12), "promedio_alto": (13, 16), "alto": (17, 22), "muy_alto": (23, 99)},
-    "LING": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 9), "promedio": (10, 12), "promedio_alto": (13, 15), "alto": (16, 22), "muy_alto": (23, 99)},
-    "JURI": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 10), "promedio": (11, 13), "promedio_alto": (14, 16), "alto": (17, 22), "muy_alto": (23, 99)}
-}
-
-# Baremos para interpretación (Mujeres)
-BAREMOS_MUJERES = {
-    "CCFM": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 11), "promedio": (12, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "CCSS": {"desinteres": (0, 4), "bajo": (5, 7), "promedio_bajo": (8, 9), "indeciso": (10, 14), "promedio": (15, 16), "promedio_alto": (17, 19), "alto": (20, 22), "muy_alto": (23, 99)},
-    "CCNA": {"desinteres": (0, 3), "bajo": (4, 5), "promedio_bajo": (6, 7), "indeciso": (8, 12), "promedio": (13, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "CCCO": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 11), "promedio": (12, 13), "promedio_alto": (14, 16), "alto": (17, 22), "muy_alto": (23, 99)},
-    "ARTE": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 11), "promedio": (12, 13), "promedio_alto": (14, 16), "alto": (17, 22), "muy_alto": (23, 99)},
-    "BURO": {"desinteres": (0, 4), "bajo": (5, 7), "promedio_bajo": (8, 9), "indeciso": (10, 14), "promedio": (15, 16), "promedio_alto": (17, 19), "alto": (20, 22), "muy_alto": (23, 99)},
-    "CCEP": {"desinteres": (0, 2), "bajo": (3, 5), "promedio_bajo": (6, 7), "indeciso": (8, 12), "promedio": (13, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "IIAA": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 9), "promedio": (10, 12), "promedio_alto": (13, 15), "alto": (16, 22), "muy_alto": (23, 99)},
-    "FINA": {"desinteres": (0, 2), "bajo": (3, 5), "promedio_bajo": (6, 7), "indeciso": (8, 12), "promedio": (13, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "LING": {"desinteres": (0, 2), "bajo": (3, 5), "promedio_bajo": (6, 7), "indeciso": (8, 12), "promedio": (13, 14), "promedio_alto": (15, 17), "alto": (18, 22), "muy_alto": (23, 99)},
-    "JURI": {"desinteres": (0, 2), "bajo": (3, 4), "promedio_bajo": (5, 6), "indeciso": (7, 11), "promedio": (12, 13), "promedio_alto": (14, 16), "alto": (17, 22), "muy_alto": (23, 99)}
-}
-
-# Carreras profesionales por escala
-CARRERAS = {
-    "CCFM": {
-        "ocupaciones": ["Ingenierías (Civil, de Sistemas, Industrial, Electrónica, de Minas, Sanitaria, Textil, Química, Mecánica)", "Arquitectura", "Matemáticas", "Física", "Meteorología", "Geografía", "Geología"],
-        "tecnicas": ["Técnico en TV y radio", "Electricista", "Mecánico automotriz", "Construcción civil", "Computación e informática", "Redes"]
-    },
-    "CCSS": {
-        "ocupaciones": ["Educación (inicial, primaria, secundaria)", "Antropología", "Sociología", "Trabajo social", "Historia", "Arqueología", "Filosofía", "Teología", "Psicología"],
-        "tecnicas": ["Auxiliar de educación"]
-    },
-    "CCNA": {
-        "ocupaciones": ["Medicina Humana", "Obstetricia", "Enfermería", "Nutrición", "Biología", "Odontología", "Químico-Farmacéutico", "Medicina Veterinaria", "Agronomía", "Zootécnia", "Psicología"],
-        "tecnicas": ["Agrotécnia", "Auxiliar de Enfermería", "Técnicos Laboratorista", "Prótesis Dental", "Visitador médico"]
-    },
-    "CCCO": {
-        "ocupaciones": ["Ciencias de la comunicación", "Periodismo", "Publicidad", "Comunicación audiovisual", "Relaciones Públicas", "Turismo", "Bibliotecología"],
-        "tecnicas": ["Publicista gráfico", "Locutor de radio y televisión", "Fotografía", "Guía turístico"]
-    },
-    "ARTE": {
-        "ocupaciones": ["Pintor", "Actor", "Escultor", "Decorador", "Diseñador de modas", "Director de cine y televisión", "Músico", "Profesor de música", "Arquitectura"],
-        "tecnicas": ["Artesanías en cerámica, cueros, tejido", "Técnico en dibujo lineal", "Ebanistería", "Decoración de Interiores", "Fotografía Profesional"]
-    },
-    "BURO": {
-        "ocupaciones": ["Bibliotecología"],
-        "tecnicas": ["Empleado de Oficina", "Bibliotecario", "Secretario(a)", "Archivero"]
-    },
-    "CCEP": {
-        "ocupaciones": ["Economista", "Estadista", "Político", "Diplomático", "Administrador de empresas", "Marketing"],
-        "tecnicas": ["Auxiliar de contabilidad", "Bancario", "Secretario contable", "Vendedor"]
-    },
-    "IIAA": {
-        "ocupaciones": ["Oficial del Ejército", "Oficial de la FAP", "Oficial de la Marina", "Oficial de la Policía"],
-        "tecnicas": ["CITEN", "ETE"]
-    },
-    "FINA": {
-        "ocupaciones": ["Contabilidad de finanzas", "Banca y seguros", "Administrador de empresas", "Marketing"],
-        "tecnicas": ["Auxiliar de contabilidad", "Bancario", "Secretario contable", "Vendedor", "Visitador médico"]
-    },
-    "LING": {
-        "ocupaciones": ["Escritor", "Lingüista", "Traductor e Intérprete de Idiomas"],
-        "tecnicas": ["Secretario Bilingüe"]
-    },
-    "JURI": {
-        "ocupaciones": ["Derecho (Penal, Civil, Laboral)", "Notario Público"],
-        "tecnicas": ["Escribano", "Secretario legal"]
-    }
-}
-
-def calculate_scores(responses: List[Dict]) -> Dict:
-    """Calculate scores for all scales based on responses"""
-    scores = {}
-    
-    for scale_code, scale_data in SCALE_MAPPING.items():
-        score = 0
-        
-        # Count A responses in column questions
-        for q_num in scale_data["column"]:
-            response = next((r for r in responses if r["question_number"] == q_num), None)
-            if response and "A" in response["response"]:
-                score += 1
-        
-        # Count B responses in row questions
-        for q_num in scale_data["row"]:
-            response = next((r for r in responses if r["question_number"] == q_num), None)
-            if response and "B" in response["response"]:
-                score += 1
-        
-        scores[scale_code] = {
-            "name": scale_data["name"],
-            "score": score,
-            "max_score": 22
-        }
-    
-    return scores
-
-def interpret_score(score: int, sex: str, scale_code: str) -> str:
-    """Interpret a score based on baremos"""
-    baremos = BAREMOS_VARONES if sex == "masculino" else BAREMOS_MUJERES
-    scale_baremos = baremos.get(scale_code, {})
-    
-    for category, (min_val, max_val) in scale_baremos.items():
-        if min_val <= score <= max_val:
-            return category
-    
-    return "indeciso"
-
-def get_recommendations(scores: Dict, sex: str) -> Dict:
-    """Get career recommendations based on scores"""
-    # Find top 3 scales
-    sorted_scales = sorted(scores.items(), key=lambda x: x[1]["score"], reverse=True)[:3]
-    
-    recommendations = []
-    for scale_code, scale_info in sorted_scales:
-        interpretation = interpret_score(scale_info["score"], sex, scale_code)
-        
-        # Only recommend if score is promedio_alto, alto, or muy_alto
-        if interpretation in ["promedio_alto", "alto", "muy_alto"]:
-            careers = CARRERAS.get(scale_code, {})
-            recommendations.append({
-                "scale": scale_code,
-                "name": scale_info["name"],
-                "score": scale_info["score"],
-                "interpretation": interpretation,
-                "ocupaciones": careers.get("ocupaciones", []),
-                "tecnicas": careers.get("tecnicas", [])
-            })
-    
-    return {
-        "top_scales": recommendations,
-        "all_scores": scores
-    }
+# Sessions scored (vectorized) and written per chunk of the batch response
+BATCH_CHUNK_SIZE = 500
+MAX_BATCH_IDS = 10000
+
+async def score_batch_chunk(chunk, norm_set):
+    """Results of a chunk of sessions; 409 if one records a norm set that is not loaded"""
+    from batch_scoring import score_sessions  # numpy, only for this endpoint
+    if norm_set is None:
+        for session in chunk:
+            scoring_norm_set(session.get("id"), session, None)
+    # CPU-bound; keep the event loop serving other requests meanwhile
+    return await run_in_threadpool(score_sessions, chunk, norm_set) if chunk else []
+
+async def batch_results_json(first_results, sessions, norm_set, session_ids):
+    """Stream {"results": {id: result}, "missing": [...], "total": n} chunk by chunk"""
+    yield b'{"results":{'
+    total = 0
+    found = set()
+    results = first_results
+    try:
+        while results:
+            with span("serialization"):
+                encoded = b",".join(orjson.dumps(result["session_id"]) + b":" + orjson.dumps(result) for result in results)
+            yield (b"," if total else b"") + encoded
+            total += len(results)
+            found.update(result["session_id"] for result in results)
+            results = await score_batch_chunk(await read_up_to(sessions, BATCH_CHUNK_SIZE), norm_set)
+    except Exception:
+        # As in the export: abort the response rather than end it with a short, valid-looking body
+        logger.exception("Batch results failed after %d sessions", total)
+        raise
+    missing = [i for i in dict.fromkeys(session_ids) if i not in found] if session_ids is not None else []
+    yield b'},"missing":' + orjson.dumps(missing) + b',"total":%d}' % total
+
+@app.post("/api/results/batch")
+async def get_batch_results(request: BatchResultsRequest):
+    """Calculate results of many sessions in one call, keyed by session id"""
+    try:
+        check_norm_set(request.norm_set)
+        if (request.session_ids is None) == (request.filter is None):
+            raise HTTPException(status_code=400, detail="Provide either session_ids or filter")
+        if request.session_ids is not None:
+            if len(request.session_ids) > MAX_BATCH_IDS:
+                raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} session_ids per call")
+            sessions = store.get_many(request.session_ids, SCORING_FIELDS, BATCH_CHUNK_SIZE)
+        else:
+            sessions = store.iterate(request.filter.dict(exclude_none=True), SCORING_FIELDS, BATCH_CHUNK_SIZE)
+        # Read and score the first chunk here so storage errors and unknown
+        # norm sets still get a proper status code
+        first_results = await score_batch_chunk(await read_up_to(sessions, BATCH_CHUNK_SIZE), request.norm_set)
+        return StreamingResponse(
+            batch_results_json(first_results, sessions, request.norm_set, request.session_ids),
+            media_type="application/json"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/results/{session_id}")
-async def get_results(session_id: str):
-    """Calculate and return test results"""
+async def get_results(session_id: str, norm_set: Optional[str] = None):
+    """Calculate and return test results (under the session's norm set unless norm_set is given)"""
     try:
-        session = await db.test_sessions.find_one({"id": session_id})
+        check_norm_set(norm_set)
+        session = await store.get(session_id, SCORING_FIELDS)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        responses = session.get("responses", [])
-        sex = session.get("sex", "masculino")
-        
-        # Calculate scores
-        scores = calculate_scores(responses)
-        
-        # Add interpretation to each score
-        for scale_code, scale_data in scores.items():
-            scale_data["interpretation"] = interpret_score(scale_data["score"], sex, scale_code)
-        
-        # Get recommendations
-        recommendations = get_recommendations(scores, sex)
-        
-        return {
-            "session_id": session_id,
-            "sex": sex,
-            "scores": scores,
-            "recommendations": recommendations,
-            "total_questions": 143,
-            "answered_questions": len(responses)
-        }
+        result = build_result(session, scoring_norm_set(session_id, session, norm_set))
+        with span("serialization"):
+            return ORJSONResponse(result)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def generate_pdf(session_id: str, sex: str, scores: Dict, recommendations: Dict) -> BytesIO:
-    """Generate PDF report with test results"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    
-    # Container for PDF elements
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#667eea'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#555555'),
-        spaceAfter=6
-    )
-    
-    # Title
-    elements.append(Paragraph("CASM-83 R2014", title_style))
-    elements.append(Paragraph("Inventario de Intereses Vocacionales y Ocupacionales", normal_style))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Session info
-    elements.append(Paragraph(f"<b>ID de Sesión:</b> {session_id}", normal_style))
-    elements.append(Paragraph(f"<b>Sexo:</b> {'Masculino' if sex == 'masculino' else 'Femenino'}", normal_style))
-    elements.append(Paragraph(f"<b>Fecha:</b> {datetime.now(timezone.utc).strftime('%d/%m/%Y %H:%M')}", normal_style))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Results table
-    elements.append(Paragraph("Resultados por Escala", heading_style))
-    
-    # Interpretation labels
-    interp_labels = {
-        'desinteres': 'Desinterés',
-        'bajo': 'Bajo',
-        'promedio_bajo': 'Promedio Bajo',
-        'indeciso': 'Indeciso',
-        'promedio': 'Promedio',
-        'promedio_alto': 'Promedio Alto',
-        'alto': 'Alto',
-        'muy_alto': 'Muy Alto'
-    }
-    
-    # Create table data
-    table_data = [['Escala', 'Puntuación', 'Interpretación']]
-    
-    for scale_code, scale_info in scores.items():
-        interpretation = interp_labels.get(scale_info['interpretation'], scale_info['interpretation'])
-        table_data.append([
-            scale_info['name'],
-            f"{scale_info['score']}/22",
-            interpretation
-        ])
-    
-    # Create table
-    results_table = Table(table_data, colWidths=[3.5*inch, 1*inch, 1.5*inch])
-    results_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-    ]))
-    
-    elements.append(results_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Recommendations
-    if recommendations['top_scales'] and len(recommendations['top_scales']) > 0:
-        elements.append(PageBreak())
-        elements.append(Paragraph("Recomendaciones Profesionales", heading_style))
-        elements.append(Paragraph("Basado en tus resultados, estas son las áreas donde mostraste mayor interés:", normal_style))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        for i, rec in enumerate(recommendations['top_scales'], 1):
-            # Recommendation header
-            rec_title = f"{i}. {rec['name']}"
-            elements.append(Paragraph(rec_title, heading_style))
-            
-            score_text = f"<b>Puntuación:</b> {rec['score']}/22 - {interp_labels.get(rec['interpretation'], rec['interpretation'])}"
-            elements.append(Paragraph(score_text, normal_style))
-            elements.append(Spacer(1, 0.1*inch))
-            
-            # Professional careers
-            if rec.get('ocupaciones') and len(rec['ocupaciones']) > 0:
-                elements.append(Paragraph("<b>Carreras Profesionales:</b>", normal_style))
-                for career in rec['ocupaciones']:
-                    elements.append(Paragraph(f"• {career}", normal_style))
-                elements.append(Spacer(1, 0.1*inch))
-            
-            # Technical careers
-            if rec.get('tecnicas') and len(rec['tecnicas']) > 0:
-                elements.append(Paragraph("<b>Carreras Técnicas:</b>", normal_style))
-                for career in rec['tecnicas']:
-                    elements.append(Paragraph(f"• {career}", normal_style))
-                elements.append(Spacer(1, 0.1*inch))
-            
-            elements.append(Spacer(1, 0.2*inch))
-    
-    # Footer
-    elements.append(Spacer(1, 0.5*inch))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor('#999999'),
-        alignment=TA_CENTER
-    )
-    elements.append(Paragraph("Este documento es un reporte automático generado por el sistema CASM-83 R2014", footer_style))
-    elements.append(Paragraph(f"Generado el {datetime.now(timezone.utc).strftime('%d/%m/%Y a las %H:%M UTC')}", footer_style))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+def render_pdf(session_id, sex, scores, recommendations):
+    # ReportLab is imported by the first PDF request, not at worker startup
+    from pdf_report import generate_pdf
+    return generate_pdf(session_id, sex, scores, recommendations)
 
 @app.get("/api/results/{session_id}/pdf")
-async def download_results_pdf(session_id: str):
+async def download_results_pdf(session_id: str, norm_set: Optional[str] = None):
     """Generate and download PDF report with test results"""
     try:
-        session = await db.test_sessions.find_one({"id": session_id})
+        check_norm_set(norm_set)
+        session = await store.get(session_id, SCORING_FIELDS)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
         responses = session.get("responses", [])
         sex = session.get("sex", "masculino")
         
-        # Calculate scores
-        scores = calculate_scores(responses)
-        
-        # Add interpretation to each score
-        for scale_code, scale_data in scores.items():
-            scale_data["interpretation"] = interpret_score(scale_data["score"], sex, scale_code)
-        
-        # Get recommendations
-        recommendations = get_recommendations(scores, sex)
+        # Scores with their interpretation, and recommendations
+        scores, recommendations = score_session(responses, sex, scoring_norm_set(session_id, session, norm_set))
         
-        # Generate PDF
-        pdf_buffer = generate_pdf(session_id, sex, scores, recommendations)
+        # Generate PDF off the event loop (it takes tens of milliseconds)
+        pdf_buffer = await run_in_threadpool(render_pdf, session_id, sex, scores, recommendations)
         
-        # Return PDF as streaming response
+        # Return PDF as streaming response (time-ordered ids share their
+        # leading characters, so the file name uses the random tail)
         return StreamingResponse(
             pdf_buffer,
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename=CASM83_Resultados_{session_id[:8]}.pdf"
+                "Content-Disposition": f"attachment; filename=CASM83_Resultados_{short_session_id(session_id)}.pdf"
             }
         )
     except HTTPException:
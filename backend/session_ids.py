@@ -0,0 +1,80 @@
+"""
+Session identifier schemes.
+
+uuid4 (the original default) scatters inserts across the `id` index. uuid7
+and objectid start with a timestamp, so new sessions land at the right edge
+of the index and sorting by id follows creation time. All schemes produce
+plain strings and existing uuid4 ids keep working everywhere.
+"""
+
+import os
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import ObjectId
+
+SCHEMES = ("uuid4", "uuid7", "objectid")
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> str:
+    """RFC 9562 UUIDv7, monotonic within this process"""
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms <= _last_ms:
+            # Same millisecond (or clock went back): count up in rand_a,
+            # borrowing the next millisecond if the counter overflows
+            ms = _last_ms
+            _counter += 1
+            if _counter > 0xFFF:
+                ms += 1
+                _counter = 0
+        else:
+            # Random start, leaving room to count within the millisecond
+            _counter = secrets.randbits(11)
+        _last_ms = ms
+        counter = _counter
+    value = (ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62)
+    return str(uuid.UUID(int=value))
+
+
+def new_session_id(scheme: Optional[str] = None) -> str:
+    scheme = scheme or SESSION_ID_SCHEME
+    if scheme == "uuid7":
+        return uuid7()
+    if scheme == "objectid":
+        return str(ObjectId())
+    return str(uuid.uuid4())
+
+
+def session_id_time(session_id: str) -> Optional[datetime]:
+    """Creation time embedded in a uuid7/objectid id; None for uuid4"""
+    if len(session_id) == 24 and ObjectId.is_valid(session_id):
+        return ObjectId(session_id).generation_time
+    try:
+        parsed = uuid.UUID(session_id)
+    except ValueError:
+        return None
+    if parsed.version != 7:
+        return None
+    return datetime.fromtimestamp((parsed.int >> 80) / 1000, tz=timezone.utc)
+
+
+def short_session_id(session_id: str) -> str:
+    """Eight characters for file names: the end of uuid7/objectid ids (their start is the time)"""
+    if session_id_time(session_id) is None:
+        return session_id[:8]
+    return session_id.replace("-", "")[-8:]
+
+
+SESSION_ID_SCHEME = os.environ.get("SESSION_ID_SCHEME", "uuid4").lower()
+if SESSION_ID_SCHEME not in SCHEMES:
+    raise ValueError(f"Unknown SESSION_ID_SCHEME: {SESSION_ID_SCHEME} (expected one of {', '.join(SCHEMES)})")
@@ -0,0 +1,779 @@
+"""
+Session storage backends.
+
+The handlers only talk to a SessionStore. Three implementations exist:
+MongoDB (production), in-memory (tests, load tests on a laptop) and SQLite
+in WAL mode (single-box deployments). STORAGE_BACKEND selects one;
+ANSWER_LOG=1 wraps it in the append-only answer log (AnswerLogStore) and
+SESSION_CACHE_TTL in a read-through cache (CachedSessionStore). The
+backend itself is always timed (TimedSessionStore) for /metrics.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional
+
+from pymongo import ReturnDocument
+
+from cache import TTLCache
+from database import MongoConnection, MongoSettings
+from indexes import ensure_indexes
+from metrics import STORE_OPERATION_SECONDS
+from timing import record
+
+
+def merge_responses(responses: List[Dict], new_responses: List[Dict]) -> List[Dict]:
+    """Replace the answers of the given questions; new ones go last"""
+    latest = {}
+    for r in new_responses:
+        latest.pop(r["question_number"], None)
+        latest[r["question_number"]] = r
+    kept = [r for r in responses if r["question_number"] not in latest]
+    return kept + [{"question_number": r["question_number"], "response": list(r["response"])}
+                   for r in latest.values()]
+
+
+def project(doc: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    if fields is None:
+        return doc
+    return {field: doc[field] for field in fields if field in doc}
+
+
+def matches(doc: Dict, filter: Optional[Mapping]) -> bool:
+    """Equality match on top-level fields, the only filters the API uses"""
+    return all(doc.get(key) == value for key, value in (filter or {}).items())
+
+
+class SessionStore(ABC):
+    """Storage interface for test sessions"""
+
+    name = "abstract"
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def create_session(self, session: Dict) -> None:
+        ...
+
+    @abstractmethod
+    async def save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        """Upsert answers; returns the number of answered questions, None if no session"""
+
+    async def save_response(self, session_id: str, question_number: int, response: List[str]) -> Optional[int]:
+        return await self.save_responses(
+            session_id, [{"question_number": question_number, "response": response}]
+        )
+
+    @abstractmethod
+    async def complete(self, session_id: str, completed_at: str) -> bool:
+        """Mark the session completed; False if it does not exist"""
+
+    @abstractmethod
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def iterate(self, filter: Optional[Mapping] = None, fields: Optional[Iterable[str]] = None,
+                batch_size: int = 1000) -> AsyncIterator[Dict]:
+        """Stream sessions matching an equality filter"""
+
+    async def get_many(self, session_ids: Iterable[str], fields: Optional[Iterable[str]] = None,
+                       batch_size: int = 1000) -> AsyncIterator[Dict]:
+        """Stream the sessions with these ids in any order; unknown ids are skipped"""
+        for session_id in dict.fromkeys(session_ids):
+            session = await self.get(session_id, fields)
+            if session is not None:
+                yield session
+
+    async def health(self) -> Dict:
+        return {"status": "ok"}
+
+    # Answer event log (see AnswerLogStore)
+
+    async def append_answer_events(self, events: List[Dict]) -> None:
+        raise NotImplementedError(f"{self.name} store has no answer event log")
+
+    async def answer_events(self, session_ids: List[str], pending_only: bool = True) -> Dict[str, List[Dict]]:
+        """Events per session in timestamp order, each with an event_id"""
+        raise NotImplementedError(f"{self.name} store has no answer event log")
+
+    async def mark_answer_events_folded(self, event_ids: List) -> None:
+        raise NotImplementedError(f"{self.name} store has no answer event log")
+
+
+class MongoSessionStore(SessionStore):
+    name = "mongo"
+
+    def __init__(self, connection: MongoConnection):
+        self.connection = connection
+
+    @property
+    def collection(self):
+        return self.connection.db.test_sessions
+
+    @staticmethod
+    def projection(fields: Optional[Iterable[str]]) -> Dict:
+        # Never ship MongoDB's _id
+        projection = {"_id": 0}
+        if fields is not None:
+            projection.update({field: 1 for field in fields})
+        return projection
+
+    async def open(self) -> None:
+        self.connection.connect()
+        await ensure_indexes(self.connection.db)
+
+    async def close(self) -> None:
+        self.connection.close()
+
+    async def create_session(self, session: Dict) -> None:
+        # insert_one adds _id to the document it is given
+        await self.collection.insert_one(dict(session))
+
+    async def save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        new_responses = merge_responses([], responses)
+        numbers = [r["question_number"] for r in new_responses]
+        # Drop the previous answers and append the new ones in a single
+        # pipeline update; $literal keeps user data from being read as
+        # field paths
+        session = await self.collection.find_one_and_update(
+            {"id": session_id},
+            [{"$set": {"responses": {"$concatArrays": [
+                {"$filter": {
+                    "input": {"$ifNull": ["$responses", []]},
+                    "as": "r",
+                    "cond": {"$not": [{"$in": ["$$r.question_number", numbers]}]}
+                }},
+                [{"$literal": r} for r in new_responses]
+            ]}}}],
+            projection={"_id": 0, "responses.question_number": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return len(session["responses"]) if session else None
+
+    async def complete(self, session_id: str, completed_at: str) -> bool:
+        result = await self.collection.update_one(
+            {"id": session_id},
+            {"$set": {"completed": True, "completed_at": completed_at}}
+        )
+        return result.matched_count > 0
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        return await self.collection.find_one({"id": session_id}, self.projection(fields))
+
+    async def iterate(self, filter=None, fields=None, batch_size=1000):
+        cursor = self.collection.find(dict(filter or {}), self.projection(fields), batch_size=batch_size)
+        async for doc in cursor:
+            yield doc
+
+    async def get_many(self, session_ids, fields=None, batch_size=1000):
+        # A single $in query on the id index, streamed in cursor batches
+        query = {"id": {"$in": list(dict.fromkeys(session_ids))}}
+        async for doc in self.collection.find(query, self.projection(fields), batch_size=batch_size):
+            yield doc
+
+    async def health(self) -> Dict:
+        return await self.connection.health()
+
+    async def append_answer_events(self, events: List[Dict]) -> None:
+        await self.connection.db.answer_events.insert_many(
+            [dict(event, folded=False) for event in events], ordered=True
+        )
+
+    async def answer_events(self, session_ids, pending_only=True):
+        query = {"session_id": {"$in": list(session_ids)}}
+        if pending_only:
+            query["folded"] = False
+        grouped = {session_id: [] for session_id in session_ids}
+        cursor = self.connection.db.answer_events.find(query, {"folded": 0}).sort([("ts", 1), ("_id", 1)])
+        async for event in cursor:
+            event["event_id"] = event.pop("_id")
+            grouped[event["session_id"]].append(event)
+        return grouped
+
+    async def mark_answer_events_folded(self, event_ids) -> None:
+        await self.connection.db.answer_events.update_many(
+            {"_id": {"$in": list(event_ids)}}, {"$set": {"folded": True}}
+        )
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store; documents are copied in and out"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict] = {}
+        self.events: List[Dict] = []
+
+    async def create_session(self, session: Dict) -> None:
+        self.sessions[session["id"]] = copy.deepcopy(session)
+
+    async def save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        session["responses"] = merge_responses(session.get("responses", []), responses)
+        return len(session["responses"])
+
+    async def complete(self, session_id: str, completed_at: str) -> bool:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        session.update(completed=True, completed_at=completed_at)
+        return True
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        session = self.sessions.get(session_id)
+        return copy.deepcopy(project(session, fields)) if session is not None else None
+
+    async def iterate(self, filter=None, fields=None, batch_size=1000):
+        for session in list(self.sessions.values()):
+            if matches(session, filter):
+                yield copy.deepcopy(project(session, fields))
+
+    async def get_many(self, session_ids, fields=None, batch_size=1000):
+        for session_id in dict.fromkeys(session_ids):
+            session = self.sessions.get(session_id)
+            if session is not None:
+                yield copy.deepcopy(project(session, fields))
+
+    async def append_answer_events(self, events: List[Dict]) -> None:
+        for event in events:
+            self.events.append(dict(copy.deepcopy(event), event_id=len(self.events), folded=False))
+
+    async def answer_events(self, session_ids, pending_only=True):
+        grouped = {session_id: [] for session_id in session_ids}
+        for event in sorted(self.events, key=lambda e: (e["ts"], e["event_id"])):
+            if event["session_id"] in grouped and not (pending_only and event["folded"]):
+                grouped[event["session_id"]].append({k: v for k, v in event.items() if k != "folded"})
+        return copy.deepcopy(grouped)
+
+    async def mark_answer_events_folded(self, event_ids) -> None:
+        for event_id in event_ids:
+            self.events[event_id]["folded"] = True
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite store in WAL mode. All statements run on one dedicated thread, so
+    the connection is never shared between threads; WAL lets other worker
+    processes read while one writes.
+    """
+
+    name = "sqlite"
+
+    COLUMNS = ("id", "sex", "created_at", "completed", "completed_at")
+    # Bound parameters per statement (older SQLite builds allow 999)
+    MAX_PARAMETERS = 900
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _connect(self) -> None:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS test_sessions ("
+            " id TEXT PRIMARY KEY,"
+            " sex TEXT,"
+            " created_at TEXT,"
+            " completed INTEGER NOT NULL DEFAULT 0,"
+            " completed_at TEXT,"
+            " responses TEXT NOT NULL DEFAULT '[]',"
+            " extra TEXT NOT NULL DEFAULT '{}')"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS completed_created_at ON test_sessions (completed, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sex_completed ON test_sessions (sex, completed)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS answer_events ("
+            " event_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT NOT NULL,"
+            " question_number INTEGER NOT NULL,"
+            " response TEXT NOT NULL,"
+            " ts TEXT NOT NULL,"
+            " folded INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS session_folded_ts ON answer_events (session_id, folded, ts)")
+        self._conn = conn
+
+    @classmethod
+    def _to_doc(cls, row) -> Dict:
+        doc = dict(zip(cls.COLUMNS, row[:5]))
+        doc["completed"] = bool(doc["completed"])
+        doc["responses"] = json.loads(row[5])
+        doc.update(json.loads(row[6]))
+        return doc
+
+    async def open(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-store")
+        await self._run(self._connect)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _insert(self, session: Dict) -> None:
+        extra = {k: v for k, v in session.items() if k not in self.COLUMNS and k != "responses"}
+        self._conn.execute(
+            "INSERT INTO test_sessions (id, sex, created_at, completed, completed_at, responses, extra)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session["id"], session.get("sex"), session.get("created_at"),
+             int(bool(session.get("completed"))), session.get("completed_at"),
+             json.dumps(session.get("responses", [])), json.dumps(extra)),
+        )
+
+    async def create_session(self, session: Dict) -> None:
+        await self._run(self._insert, session)
+
+    def _save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        conn = self._conn
+        # IMMEDIATE takes the write lock up front so other processes cannot
+        # interleave between the read and the write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT responses FROM test_sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            merged = merge_responses(json.loads(row[0]), responses)
+            conn.execute("UPDATE test_sessions SET responses = ? WHERE id = ?", (json.dumps(merged), session_id))
+            conn.execute("COMMIT")
+            return len(merged)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        return await self._run(self._save_responses, session_id, responses)
+
+    def _complete(self, session_id: str, completed_at: str) -> bool:
+        cursor = self._conn.execute(
+            "UPDATE test_sessions SET completed = 1, completed_at = ? WHERE id = ?", (completed_at, session_id)
+        )
+        return cursor.rowcount > 0
+
+    async def complete(self, session_id: str, completed_at: str) -> bool:
+        return await self._run(self._complete, session_id, completed_at)
+
+    def _get(self, session_id: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT id, sex, created_at, completed, completed_at, responses, extra"
+            " FROM test_sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return self._to_doc(row) if row else None
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        doc = await self._run(self._get, session_id)
+        return project(doc, fields) if doc is not None else None
+
+    def _page(self, filter: Mapping, after: int, batch_size: int) -> List:
+        clauses, params = ["rowid > ?"], [after]
+        for key, value in filter.items():
+            if key in self.COLUMNS:
+                clauses.append(f"{key} = ?")
+                params.append(int(value) if key == "completed" else value)
+        params.append(batch_size)
+        return self._conn.execute(
+            "SELECT id, sex, created_at, completed, completed_at, responses, extra, rowid"
+            f" FROM test_sessions WHERE {' AND '.join(clauses)} ORDER BY rowid LIMIT ?", params
+        ).fetchall()
+
+    async def iterate(self, filter=None, fields=None, batch_size=1000):
+        filter = dict(filter or {})
+        after = 0
+        while True:
+            rows = await self._run(self._page, filter, after, batch_size)
+            for row in rows:
+                doc = self._to_doc(row)
+                # Fields kept in the JSON column are filtered here
+                if matches(doc, filter):
+                    yield project(doc, fields)
+            if len(rows) < batch_size:
+                break
+            after = rows[-1][7]
+
+    def _get_many(self, session_ids: List[str]) -> List:
+        placeholders = ",".join("?" * len(session_ids))
+        return self._conn.execute(
+            "SELECT id, sex, created_at, completed, completed_at, responses, extra"
+            f" FROM test_sessions WHERE id IN ({placeholders})", session_ids
+        ).fetchall()
+
+    async def get_many(self, session_ids, fields=None, batch_size=1000):
+        session_ids = list(dict.fromkeys(session_ids))
+        size = min(batch_size, self.MAX_PARAMETERS)
+        for start in range(0, len(session_ids), size):
+            for row in await self._run(self._get_many, session_ids[start:start + size]):
+                yield project(self._to_doc(row), fields)
+
+    def _append_events(self, events: List[Dict]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO answer_events (session_id, question_number, response, ts) VALUES (?, ?, ?, ?)",
+                [(e["session_id"], e["question_number"], json.dumps(e["response"]), e["ts"]) for e in events],
+            )
+
+    async def append_answer_events(self, events: List[Dict]) -> None:
+        await self._run(self._append_events, events)
+
+    def _events(self, session_ids: List[str], pending_only: bool) -> Dict[str, List[Dict]]:
+        placeholders = ", ".join("?" for _ in session_ids)
+        pending = " AND folded = 0" if pending_only else ""
+        rows = self._conn.execute(
+            "SELECT event_id, session_id, question_number, response, ts FROM answer_events"
+            f" WHERE session_id IN ({placeholders}){pending} ORDER BY ts, event_id", session_ids
+        ).fetchall()
+        grouped = {session_id: [] for session_id in session_ids}
+        for event_id, session_id, question_number, response, ts in rows:
+            grouped[session_id].append({"event_id": event_id, "session_id": session_id, "ts": ts,
+                                        "question_number": question_number, "response": json.loads(response)})
+        return grouped
+
+    async def answer_events(self, session_ids, pending_only=True):
+        return await self._run(self._events, list(session_ids), pending_only)
+
+    def _mark_folded(self, event_ids: List) -> None:
+        with self._conn:
+            self._conn.executemany("UPDATE answer_events SET folded = 1 WHERE event_id = ?",
+                                   [(event_id,) for event_id in event_ids])
+
+    async def mark_answer_events_folded(self, event_ids) -> None:
+        await self._run(self._mark_folded, list(event_ids))
+
+
+class AnswerLogStore(SessionStore):
+    """
+    Records save_response as append-only answer events instead of rewriting
+    the responses array. Events are folded into the session snapshot when
+    the test completes, or once a session has `compact_every` pending events
+    in this worker. Reads fold pending events in on the fly, and folded
+    events are kept (flagged) for per-item answer timing.
+
+    The session existence check and the answered-question count come from a
+    bounded per-worker cache, so the hot path is a single append once a
+    session is known; with several workers the count is this worker's view.
+    """
+
+    def __init__(self, inner: SessionStore, compact_every: int = 50, tracked_sessions: int = 10000):
+        self.inner = inner
+        self.name = inner.name
+        self.compact_every = compact_every
+        self.tracked_sessions = tracked_sessions
+        # session_id -> [answered question numbers, pending events]
+        self._tracked: "OrderedDict[str, List]" = OrderedDict()
+
+    def _track(self, session_id: str, responses: Iterable[Dict], pending: int = 0) -> List:
+        self._tracked[session_id] = entry = [{r["question_number"] for r in responses}, pending]
+        self._tracked.move_to_end(session_id)
+        while len(self._tracked) > self.tracked_sessions:
+            self._tracked.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _fold(session: Dict, events: List[Dict]) -> Dict:
+        if events:
+            session["responses"] = merge_responses(session.get("responses", []), events)
+        return session
+
+    async def open(self) -> None:
+        await self.inner.open()
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    async def health(self) -> Dict:
+        return await self.inner.health()
+
+    async def create_session(self, session: Dict) -> None:
+        await self.inner.create_session(session)
+        self._track(session["id"], session.get("responses", []))
+
+    async def save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        entry = self._tracked.get(session_id)
+        if entry is None:
+            session = await self.get(session_id, ["responses"])
+            if session is None:
+                return None
+            entry = self._track(session_id, session["responses"])
+        else:
+            self._tracked.move_to_end(session_id)
+
+        ts = datetime.now(timezone.utc).isoformat()
+        await self.inner.append_answer_events([
+            {"session_id": session_id, "question_number": r["question_number"],
+             "response": list(r["response"]), "ts": ts}
+            for r in responses
+        ])
+        entry[0].update(r["question_number"] for r in responses)
+        entry[1] += len(responses)
+
+        if entry[1] >= self.compact_every:
+            await self.compact(session_id)
+        return len(entry[0])
+
+    async def compact(self, session_id: str) -> Optional[int]:
+        """Fold the pending events of a session into its snapshot"""
+        events = (await self.inner.answer_events([session_id]))[session_id]
+        total = await self.inner.save_responses(session_id, events) if events else None
+        if events:
+            # Folding again after a crash here is harmless: answers replace
+            # by question number and events are applied in time order
+            await self.inner.mark_answer_events_folded([e["event_id"] for e in events])
+        entry = self._tracked.get(session_id)
+        if entry is not None:
+            entry[1] = 0
+        return total
+
+    async def complete(self, session_id: str, completed_at: str) -> bool:
+        await self.compact(session_id)
+        return await self.inner.complete(session_id, completed_at)
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        session = await self.inner.get(session_id, fields)
+        if session is None or (fields is not None and "responses" not in fields):
+            return session
+        events = (await self.inner.answer_events([session_id]))[session_id]
+        return self._fold(session, events)
+
+    async def iterate(self, filter=None, fields=None, batch_size=1000):
+        async for session in self._fold_stream(self.inner.iterate, filter, fields, batch_size):
+            yield session
+
+    async def get_many(self, session_ids, fields=None, batch_size=1000):
+        async for session in self._fold_stream(self.inner.get_many, session_ids, fields, batch_size):
+            yield session
+
+    async def _fold_stream(self, read, selector, fields, batch_size):
+        fold = fields is None or "responses" in fields
+        if fold and fields is not None and "id" not in fields:
+            fields = [*fields, "id"]
+        batch = []
+        async for session in read(selector, fields, batch_size):
+            batch.append(session)
+            if len(batch) >= batch_size:
+                for folded in await self._fold_batch(batch, fold):
+                    yield folded
+                batch = []
+        for folded in await self._fold_batch(batch, fold):
+            yield folded
+
+    async def _fold_batch(self, batch: List[Dict], fold: bool) -> List[Dict]:
+        if not batch or not fold:
+            return batch
+        # One events query per page of sessions
+        events = await self.inner.answer_events([session["id"] for session in batch])
+        return [self._fold(session, events[session["id"]]) for session in batch]
+
+    async def append_answer_events(self, events: List[Dict]) -> None:
+        await self.inner.append_answer_events(events)
+
+    async def answer_events(self, session_ids, pending_only=True):
+        return await self.inner.answer_events(session_ids, pending_only)
+
+    async def mark_answer_events_folded(self, event_ids) -> None:
+        await self.inner.mark_answer_events_folded(event_ids)
+
+
+class CachedSessionStore(SessionStore):
+    """
+    Read-through cache of whole session documents in front of another store.
+    Writes go to the store first and are then applied to the cached copy;
+    entries expire after `ttl` seconds so that writes made by other workers
+    become visible. Cached documents are shared: callers must not mutate
+    what get() returns.
+    """
+
+    def __init__(self, inner: SessionStore, maxsize: int = 10000, ttl: float = 5.0):
+        self.inner = inner
+        self.name = inner.name
+        self.cache = TTLCache(maxsize, ttl)
+        # Keys with a read in flight; True once written during that read
+        self._reading: Dict[str, bool] = {}
+
+    async def open(self) -> None:
+        await self.inner.open()
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    async def health(self) -> Dict:
+        return dict(await self.inner.health(), cache=self.cache.stats())
+
+    def _written(self, session_id: str) -> None:
+        if session_id in self._reading:
+            self._reading[session_id] = True
+
+    async def create_session(self, session: Dict) -> None:
+        await self.inner.create_session(session)
+        self.cache.set(session["id"], copy.deepcopy(session))
+
+    async def save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        total = await self.inner.save_responses(session_id, responses)
+        self._written(session_id)
+        cached = self.cache.peek(session_id)
+        if total is None:
+            self.cache.pop(session_id)
+        elif cached is not None:
+            # Copy on write: documents already handed out stay unchanged
+            self.cache.replace(session_id, dict(
+                cached, responses=merge_responses(cached.get("responses", []), responses)
+            ))
+        return total
+
+    async def complete(self, session_id: str, completed_at: str) -> bool:
+        found = await self.inner.complete(session_id, completed_at)
+        self._written(session_id)
+        cached = self.cache.peek(session_id)
+        if cached is not None:
+            self.cache.replace(session_id, dict(cached, completed=True, completed_at=completed_at))
+        return found
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        session = self.cache.get(session_id)
+        if session is None:
+            first_reader = session_id not in self._reading
+            if first_reader:
+                self._reading[session_id] = False
+            try:
+                session = await self.inner.get(session_id)
+            finally:
+                written = self._reading.pop(session_id, False) if first_reader else True
+            # A write that landed while we were reading may not be in `session`
+            if session is not None and not written:
+                self.cache.set(session_id, session)
+        return project(session, fields) if session is not None else None
+
+    def iterate(self, filter=None, fields=None, batch_size=1000):
+        return self.inner.iterate(filter, fields, batch_size)
+
+    def get_many(self, session_ids, fields=None, batch_size=1000):
+        # Writes reach the inner store first, so it is never behind the cache
+        return self.inner.get_many(session_ids, fields, batch_size)
+
+    async def append_answer_events(self, events: List[Dict]) -> None:
+        await self.inner.append_answer_events(events)
+
+    async def answer_events(self, session_ids, pending_only=True):
+        return await self.inner.answer_events(session_ids, pending_only)
+
+    async def mark_answer_events_folded(self, event_ids) -> None:
+        await self.inner.mark_answer_events_folded(event_ids)
+
+
+class TimedSessionStore(SessionStore):
+    """Records the duration of every call to the wrapped backend"""
+
+    def __init__(self, inner: SessionStore):
+        self.inner = inner
+        self.name = inner.name
+
+    async def _timed(self, operation: str, call):
+        start = time.perf_counter()
+        try:
+            return await call
+        finally:
+            elapsed = time.perf_counter() - start
+            STORE_OPERATION_SECONDS.observe(elapsed, self.name, operation)
+            record("store." + operation, elapsed)
+
+    async def _timed_stream(self, operation: str, stream):
+        # Only the time spent waiting on the backend, not on the consumer
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    doc = await stream.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield doc
+        finally:
+            STORE_OPERATION_SECONDS.observe(elapsed, self.name, operation)
+            record("store." + operation, elapsed)
+
+    async def open(self) -> None:
+        await self.inner.open()
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    async def health(self) -> Dict:
+        return await self.inner.health()
+
+    async def create_session(self, session: Dict) -> None:
+        await self._timed("create_session", self.inner.create_session(session))
+
+    async def save_responses(self, session_id: str, responses: List[Dict]) -> Optional[int]:
+        return await self._timed("save_responses", self.inner.save_responses(session_id, responses))
+
+    async def complete(self, session_id: str, completed_at: str) -> bool:
+        return await self._timed("complete", self.inner.complete(session_id, completed_at))
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        return await self._timed("get", self.inner.get(session_id, fields))
+
+    def iterate(self, filter=None, fields=None, batch_size=1000):
+        return self._timed_stream("iterate", self.inner.iterate(filter, fields, batch_size))
+
+    def get_many(self, session_ids, fields=None, batch_size=1000):
+        return self._timed_stream("get_many", self.inner.get_many(session_ids, fields, batch_size))
+
+    async def append_answer_events(self, events: List[Dict]) -> None:
+        await self._timed("append_answer_events", self.inner.append_answer_events(events))
+
+    async def answer_events(self, session_ids, pending_only=True):
+        return await self._timed("answer_events", self.inner.answer_events(session_ids, pending_only))
+
+    async def mark_answer_events_folded(self, event_ids) -> None:
+        await self._timed("mark_answer_events_folded", self.inner.mark_answer_events_folded(event_ids))
+
+
+def create_store(environ: Mapping[str, str] = os.environ) -> SessionStore:
+    """Build the store selected by STORAGE_BACKEND (mongo, memory or sqlite)"""
+    backend = environ.get("STORAGE_BACKEND", "mongo").lower()
+    if backend == "mongo":
+        store = MongoSessionStore(MongoConnection(MongoSettings.from_env(environ)))
+    elif backend == "memory":
+        store = MemorySessionStore()
+    elif backend == "sqlite":
+        store = SQLiteSessionStore(environ.get("SQLITE_PATH", "casm83.sqlite3"))
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    store = TimedSessionStore(store)
+
+    # ANSWER_LOG=1 records answers as append-only events
+    if environ.get("ANSWER_LOG", "").lower() in ("1", "true", "yes"):
+        store = AnswerLogStore(store, compact_every=int(environ.get("ANSWER_LOG_COMPACT_EVERY", "50")))
+
+    # SESSION_CACHE_TTL > 0 (seconds) enables the read-through session cache
+    cache_ttl = float(environ.get("SESSION_CACHE_TTL", "0"))
+    if cache_ttl > 0:
+        store = CachedSessionStore(store, maxsize=int(environ.get("SESSION_CACHE_SIZE", "10000")), ttl=cache_ttl)
+    return store
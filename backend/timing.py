@@ -0,0 +1,138 @@
+"""
+Per-request stage timings and the slow request log.
+
+While SlowRequestMiddleware handles a request, a RequestTimings lives in a
+context variable and span("stage") adds the time spent in a block or a
+decorated function to that stage. Outside a request a span costs a context
+variable lookup. Tasks and threadpool calls started by the handler inherit
+the context, so their spans count towards the same request.
+
+Requests slower than SLOW_REQUEST_MS (default 1000, 0 disables) are logged
+as one JSON line: route, session id, total time and time per stage.
+"""
+
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    __slots__ = ("stages", "fields")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.fields: Dict = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_CURRENT: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record(stage: str, seconds: float) -> None:
+    """Add an already measured duration to a stage of the current request"""
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def annotate(**fields) -> None:
+    """Attach fields (e.g. session_id) to the current request's log line"""
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.fields.update(fields)
+
+
+class span:
+    """Time a block (with span("stage"):) or every call of a function (@span("stage"))"""
+
+    __slots__ = ("stage", "timings", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.timings = None
+
+    def __enter__(self) -> "span":
+        self.timings = _CURRENT.get()
+        if self.timings is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        if self.timings is not None:
+            self.timings.add(self.stage, time.perf_counter() - self.start)
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        stage = self.stage
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            timings = _CURRENT.get()
+            if timings is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timings.add(stage, time.perf_counter() - start)
+        return wrapper
+
+
+def slow_request_threshold(environ: Mapping[str, str] = os.environ) -> float:
+    """SLOW_REQUEST_MS in seconds"""
+    return float(environ.get("SLOW_REQUEST_MS", "1000")) / 1000
+
+
+class SlowRequestMiddleware:
+    """Pure ASGI middleware logging the stage breakdown of slow requests"""
+
+    def __init__(self, app, threshold: float):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        # An enclosing SlowRequestMiddleware already times this request
+        if scope["type"] != "http" or self.threshold <= 0 or _CURRENT.get() is not None:
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        timings = RequestTimings()
+        token = _CURRENT.set(timings)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _CURRENT.reset(token)
+            if elapsed >= self.threshold:
+                logger.warning(json.dumps(self.line(scope, status[0], elapsed, timings)))
+
+    @staticmethod
+    def line(scope, status: int, elapsed: float, timings: RequestTimings) -> Dict:
+        stages = {stage: round(seconds * 1000, 3) for stage, seconds in sorted(timings.stages.items())}
+        return {
+            "event": "slow_request",
+            "method": scope["method"],
+            "route": getattr(scope.get("route"), "path", "unmatched"),
+            "path": scope["path"],
+            "status": status,
+            "session_id": timings.fields.pop("session_id", None) or scope.get("path_params", {}).get("session_id"),
+            "total_ms": round(elapsed * 1000, 3),
+            "stages_ms": stages,
+            "unaccounted_ms": round(max(0.0, elapsed * 1000 - sum(stages.values())), 3),
+            **timings.fields,
+        }
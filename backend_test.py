@@ -4,13 +4,12 @@ Backend API Test Suite for CASM-83 R2014 Psychological Test
 Tests all backend endpoints with comprehensive scenarios
 """
 
-import requests
 import json
 import sys
 from datetime import datetime
 
-# Use the production URL from frontend/.env
-BASE_URL = "https://evalpsych-app.preview.emergentagent.com/api"
+# The app in-process, or a deployed API with CASM83_API_URL (see api_client.py)
+from api_client import BASE_URL, RequestError, api
 
 class BackendTester:
     def __init__(self):
@@ -38,7 +37,7 @@ class BackendTester:
     def test_get_questions(self):
         """Test GET /api/questions endpoint"""
         try:
-            response = requests.get(f"{BASE_URL}/questions", timeout=10)
+            response = api.get(f"{BASE_URL}/questions", timeout=10)
             
             if response.status_code != 200:
                 self.log_test("GET /api/questions", False, 
@@ -81,7 +80,7 @@ class BackendTester:
                         f"Retrieved {len(questions)} questions in {len(blocks)} blocks")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except RequestError as e:
             self.log_test("GET /api/questions", False, "", str(e))
             return False
         except Exception as e:
@@ -92,7 +91,7 @@ class BackendTester:
         """Test POST /api/start-test endpoint"""
         try:
             payload = {"sex": "masculino"}
-            response = requests.post(f"{BASE_URL}/start-test", 
+            response = api.post(f"{BASE_URL}/start-test", 
                                    json=payload, timeout=10)
             
             if response.status_code != 200:
@@ -126,7 +125,7 @@ class BackendTester:
                         f"Created session: {self.session_id}")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except RequestError as e:
             self.log_test("POST /api/start-test", False, "", str(e))
             return False
         except Exception as e:
@@ -158,7 +157,7 @@ class BackendTester:
                     "response": test_case["response"]
                 }
                 
-                response = requests.post(f"{BASE_URL}/save-response", 
+                response = api.post(f"{BASE_URL}/save-response", 
                                        json=payload, timeout=10)
                 
                 if response.status_code != 200:
@@ -178,7 +177,7 @@ class BackendTester:
                 self.log_test(f"POST /api/save-response ({test_case['description']})", 
                             True, f"Saved response for question {test_case['question_number']}")
                             
-            except requests.exceptions.RequestException as e:
+            except RequestError as e:
                 self.log_test(f"POST /api/save-response ({test_case['description']})", 
                             False, "", str(e))
                 all_passed = False
@@ -197,7 +196,7 @@ class BackendTester:
             return False
             
         try:
-            response = requests.get(f"{BASE_URL}/test-session/{self.session_id}", 
+            response = api.get(f"{BASE_URL}/test-session/{self.session_id}", 
                                   timeout=10)
             
             if response.status_code != 200:
@@ -233,7 +232,7 @@ class BackendTester:
                         f"Retrieved session with {len(responses)} responses")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except RequestError as e:
             self.log_test("GET /api/test-session/{session_id}", False, "", str(e))
             return False
         except Exception as e:
@@ -249,7 +248,7 @@ class BackendTester:
             
         try:
             payload = {"session_id": self.session_id}
-            response = requests.post(f"{BASE_URL}/complete-test", 
+            response = api.post(f"{BASE_URL}/complete-test", 
                                    json=payload, timeout=10)
             
             if response.status_code != 200:
@@ -265,7 +264,7 @@ class BackendTester:
                 return False
                 
             # Verify test is marked as completed
-            session_response = requests.get(f"{BASE_URL}/test-session/{self.session_id}", 
+            session_response = api.get(f"{BASE_URL}/test-session/{self.session_id}", 
                                           timeout=10)
             if session_response.status_code == 200:
                 session_data = session_response.json()
@@ -283,7 +282,7 @@ class BackendTester:
                         "Test marked as completed successfully")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except RequestError as e:
             self.log_test("POST /api/complete-test", False, "", str(e))
             return False
         except Exception as e:
@@ -293,7 +292,7 @@ class BackendTester:
     def test_get_all_sessions(self):
         """Test GET /api/all-sessions endpoint"""
         try:
-            response = requests.get(f"{BASE_URL}/all-sessions", timeout=10)
+            response = api.get(f"{BASE_URL}/all-sessions", timeout=10)
             
             if response.status_code != 200:
                 self.log_test("GET /api/all-sessions", False, 
@@ -331,7 +330,7 @@ class BackendTester:
                         f"Retrieved {len(sessions)} sessions including our test session")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except RequestError as e:
             self.log_test("GET /api/all-sessions", False, "", str(e))
             return False
         except Exception as e:
@@ -350,7 +349,7 @@ class BackendTester:
         try:
             # Create a new session for results testing
             payload = {"sex": "masculino"}
-            response = requests.post(f"{BASE_URL}/start-test", 
+            response = api.post(f"{BASE_URL}/start-test", 
                                    json=payload, timeout=10)
             
             if response.status_code != 200:
@@ -403,7 +402,7 @@ class BackendTester:
                     "response": resp["response"]
                 }
                 
-                save_response = requests.post(f"{BASE_URL}/save-response", 
+                save_response = api.post(f"{BASE_URL}/save-response", 
                                            json=save_payload, timeout=10)
                 
                 if save_response.status_code != 200:
@@ -413,7 +412,7 @@ class BackendTester:
             
             # Mark test as completed
             complete_payload = {"session_id": results_session_id}
-            complete_response = requests.post(f"{BASE_URL}/complete-test", 
+            complete_response = api.post(f"{BASE_URL}/complete-test", 
                                            json=complete_payload, timeout=10)
             
             if complete_response.status_code != 200:
@@ -422,7 +421,7 @@ class BackendTester:
                 return False
             
             # Now test the results endpoint
-            results_response = requests.get(f"{BASE_URL}/results/{results_session_id}", 
+            results_response = api.get(f"{BASE_URL}/results/{results_session_id}", 
                                           timeout=10)
             
             if results_response.status_code != 200:
@@ -508,7 +507,7 @@ class BackendTester:
             
             # Verify sex-specific interpretation (test with female)
             female_payload = {"sex": "femenino"}
-            female_response = requests.post(f"{BASE_URL}/start-test", 
+            female_response = api.post(f"{BASE_URL}/start-test", 
                                          json=female_payload, timeout=10)
             
             if female_response.status_code == 200:
@@ -521,10 +520,10 @@ class BackendTester:
                         "question_number": resp["question_number"],
                         "response": resp["response"]
                     }
-                    requests.post(f"{BASE_URL}/save-response", json=save_payload, timeout=10)
+                    api.post(f"{BASE_URL}/save-response", json=save_payload, timeout=10)
                 
                 # Get female results
-                female_results_response = requests.get(f"{BASE_URL}/results/{female_session_id}", 
+                female_results_response = api.get(f"{BASE_URL}/results/{female_session_id}", 
                                                      timeout=10)
                 
                 if female_results_response.status_code == 200:
@@ -558,7 +557,7 @@ class BackendTester:
                         f"Results calculated for all 11 scales, {len(top_scales)} recommendations provided")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except RequestError as e:
             self.log_test("GET /api/results/{session_id}", False, "", str(e))
             return False
         except Exception as e:
@@ -572,7 +571,7 @@ class BackendTester:
         # Test invalid session_id
         try:
             payload = {"session_id": "invalid-uuid"}
-            response = requests.post(f"{BASE_URL}/save-response", 
+            response = api.post(f"{BASE_URL}/save-response", 
                                    json={"session_id": "invalid-uuid", 
                                         "question_number": 1, "response": ["A"]}, 
                                    timeout=10)
@@ -591,7 +590,7 @@ class BackendTester:
             
         # Test non-existent session for get
         try:
-            response = requests.get(f"{BASE_URL}/test-session/non-existent-uuid", 
+            response = api.get(f"{BASE_URL}/test-session/non-existent-uuid", 
                                   timeout=10)
             
             if response.status_code == 404:
@@ -608,7 +607,7 @@ class BackendTester:
             
         # Test results endpoint with invalid session
         try:
-            response = requests.get(f"{BASE_URL}/results/invalid-session-id", 
+            response = api.get(f"{BASE_URL}/results/invalid-session-id", 
                                   timeout=10)
             
             if response.status_code == 404:
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks de la calificación y del reporte, con línea base guardada y
+umbral de regresión. No usa MongoDB ni el servidor.
+
+Casos, sobre respuestas completas, parciales, vacías y adversas (preguntas
+repetidas, fuera de rango, opciones desconocidas, miles de entradas):
+    calculate_scores, interpret_score (las 11 escalas de una sesión),
+    get_recommendations, generate_pdf
+y calificación en lote de 1k, 10k y 100k sesiones (vectorizada con
+batch_scoring.score_sessions; scoring.score_batch, una por una, como
+referencia).
+
+Cada caso reporta la mediana del tiempo por llamada de varias repeticiones.
+Sin --save-baseline compara con benchmarks/baselines/scoring.json y termina
+con código 1 si algún caso es más lento que la línea base más su umbral (más
+amplio para los casos de menos de 10 µs). Se compara el costo relativo: el
+tiempo del caso dividido por el de una carga fija de Python puro
+(calibración) medida en la misma repetición, alternando con el caso, para
+que la línea base sirva en otra máquina o con la máquina cargada; aun así
+conviene regenerarla donde se compare.
+
+Ejemplos:
+    python benchmarks/bench_scoring.py
+    python benchmarks/bench_scoring.py --filter calculate_scores --repeat 10
+    python benchmarks/bench_scoring.py --sizes 1k,10k
+    python benchmarks/bench_scoring.py --save-baseline
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from batch_scoring import score_sessions  # noqa: E402
+from instrument import TOTAL_QUESTIONS  # noqa: E402
+from pdf_report import generate_pdf  # noqa: E402
+from scoring import calculate_scores, get_recommendations, interpret_score, score_batch, score_session  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "scoring.json"
+DEFAULT_THRESHOLD = 0.25
+# Casos con más variación entre corridas (asignación de memoria, ReportLab)
+THRESHOLDS = {"generate_pdf": 0.5, "score_sessions": 0.4, "score_batch": 0.4}
+# Casos de menos de 10 µs: unas pocas asignaciones de más ya son un 20-30 %
+SMALL_CASE_SECONDS = 10e-6
+SMALL_CASE_THRESHOLD = 0.6
+BATCH_SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+
+def response_sets(rng):
+    """Conjuntos de respuestas de una sesión"""
+    def answer():
+        return rng.choice([["A"], ["B"], ["A", "B"], []])
+
+    adversarial = [{"question_number": q, "response": answer()} for q in range(1, TOTAL_QUESTIONS + 1)] * 5
+    adversarial += [{"question_number": q, "response": ["A", "B", "C", "Z"]}
+                    for q in (0, -1, 144, 10 ** 9) for _ in range(500)]
+    rng.shuffle(adversarial)
+    return {
+        "full": [{"question_number": q, "response": answer()} for q in range(1, TOTAL_QUESTIONS + 1)],
+        "partial": [{"question_number": q, "response": answer()} for q in range(1, TOTAL_QUESTIONS + 1, 2)],
+        "empty": [],
+        "adversarial": adversarial,
+    }
+
+
+def make_sessions(rng, count):
+    return [
+        {
+            "id": f"s-{i}",
+            "sex": rng.choice(["masculino", "femenino"]),
+            "responses": [{"question_number": q, "response": rng.choice([["A"], ["B"], ["A", "B"], []])}
+                          for q in range(1, TOTAL_QUESTIONS + 1)],
+        }
+        for i in range(count)
+    ]
+
+
+def cases(rng, batches):
+    """{nombre: función sin argumentos}; batches: {etiqueta: sesiones}"""
+    found = {}
+    for name, responses in response_sets(rng).items():
+        sex = "femenino"
+        raw = calculate_scores(responses)
+        scores, recommendations = score_session(responses, sex)
+        found[f"calculate_scores/{name}"] = lambda responses=responses: calculate_scores(responses)
+        found[f"interpret_score/{name}"] = lambda raw=raw: [
+            interpret_score(data["score"], sex, code) for code, data in raw.items()]
+        found[f"get_recommendations/{name}"] = lambda raw=raw: get_recommendations(raw, sex)
+        found[f"generate_pdf/{name}"] = lambda scores=scores, recs=recommendations: generate_pdf(
+            "bench", sex, scores, recs)
+    for label, sessions in batches.items():
+        found[f"score_sessions/{label}"] = lambda sessions=sessions: score_sessions(sessions)
+        found[f"score_batch/{label}"] = lambda sessions=sessions: list(score_batch(sessions))
+    return found
+
+
+def calibration():
+    """Carga fija de Python puro (dicts, listas, ordenamiento) para normalizar"""
+    counts = {}
+    for i in range(2000):
+        counts[i % 97] = counts.get(i % 97, 0) + 1
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:3]
+
+
+def measure(fn, repeat):
+    """Mediana del tiempo por llamada (s) y del costo relativo a la calibración.
+
+    Calibración y caso se alternan en cada repetición (de al menos ~0.2 s
+    cada una), así que una racha de carga en la máquina afecta a ambos.
+    """
+    timer, reference = timeit.Timer(fn), timeit.Timer(calibration)
+    # La medición de autorange cuenta como la primera repetición (100k tarda segundos)
+    number, elapsed = timer.autorange()
+    reference_number, reference_elapsed = reference.autorange()
+    times = [elapsed / number]
+    ratios = [times[0] / (reference_elapsed / reference_number)]
+    for _ in range(repeat - 1):
+        unit = reference.timeit(reference_number) / reference_number
+        seconds = timer.timeit(number) / number
+        times.append(seconds)
+        ratios.append(seconds / unit)
+    return statistics.median(times), statistics.median(ratios)
+
+
+def threshold_for(case, default, seconds):
+    """Umbral de un caso; los de pocos µs varían más entre corridas"""
+    threshold = max(THRESHOLDS.get(case.split("/")[0], 0.0), default)
+    if seconds < SMALL_CASE_SECONDS:
+        threshold = max(threshold, SMALL_CASE_THRESHOLD)
+    return threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de la calificación y del PDF")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="Solo los casos que contienen este texto")
+    parser.add_argument("--sizes", default=",".join(BATCH_SIZES), help="Lotes a medir (1k,10k,100k)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Regresión tolerada (0.25 = 25%% más lento)")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los tiempos como nueva línea base")
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    # Solo se generan los lotes de los casos seleccionados
+    batches = {
+        label: make_sessions(random.Random(count), count) for label, count in BATCH_SIZES.items()
+        if label in args.sizes.split(",") and any(args.filter in f"{kind}/{label}" for kind in ("score_sessions", "score_batch"))
+    }
+    selected = {name: fn for name, fn in cases(random.Random(0), batches).items() if args.filter in name}
+
+    baseline_path = Path(args.baseline)
+    stored = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    baseline = stored.get("cases", {})
+    generate_pdf("calentar", "femenino", *score_session([], "femenino"))  # primera carga de fuentes
+
+    results, regressions = {}, []
+    for name, fn in selected.items():
+        seconds, relative = measure(fn, args.repeat)
+        results[name] = {"seconds": seconds, "relative": relative}
+        line = f"   {name:>32}: {seconds * 1e6:>12.1f} µs"
+        if name in baseline and not args.save_baseline:
+            limit = threshold_for(name, args.threshold, baseline[name]["seconds"])
+            change = results[name]["relative"] / baseline[name]["relative"] - 1
+            line += f"  ({change:+.0%} vs línea base)"
+            if change > limit:
+                regressions.append(name)
+                line += f"  ❌ supera el umbral de {limit:.0%}"
+        print(line)
+
+    if args.save_baseline:
+        baseline.update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cases": {name: baseline[name] for name in sorted(baseline)},
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"✅ Línea base guardada en {baseline_path}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({name: round(result["seconds"] * 1e6, 2) for name, result in results.items()}, f, indent=2)
+
+    if regressions:
+        print(f"❌ {len(regressions)} caso(s) más lentos que la línea base: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
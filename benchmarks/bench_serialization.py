@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización JSON: ruta por defecto de FastAPI
+(jsonable_encoder + json) frente a orjson, para una sesión completa, un
+resultado y una página de 1000 sesiones.
+
+Ejemplo:
+    python benchmarks/bench_serialization.py --repeat 20
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from scoring import build_result  # noqa: E402
+
+
+def make_session(rng, index):
+    return {
+        "id": f"00000000-0000-4000-8000-{index:012d}",
+        "sex": rng.choice(["masculino", "femenino"]),
+        "responses": [
+            {"question_number": q, "response": rng.choice([["A"], ["B"], ["A", "B"], []])}
+            for q in range(1, 144)
+        ],
+        "created_at": "2025-10-08T06:26:28.461039+00:00",
+        "completed": True,
+        "completed_at": "2025-10-08T06:46:28.754558+00:00",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar serializadores JSON")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    session = make_session(rng, 0)
+    payloads = {
+        "session": session,
+        "results": build_result(session),
+        f"page_{args.page_size}": {"sessions": [make_session(rng, i) for i in range(args.page_size)],
+                                   "total": args.page_size},
+    }
+    serializers = {
+        "fastapi_default": lambda p: JSONResponse(jsonable_encoder(p)).body,
+        "stdlib_json": lambda p: json.dumps(p, ensure_ascii=False).encode("utf-8"),
+        "orjson_response": lambda p: ORJSONResponse(p).body,
+        "orjson_bytes": orjson.dumps,
+    }
+
+    results = {}
+    for name, payload in payloads.items():
+        number = 1 if name.startswith("page") else 200
+        results[name] = {}
+        for serializer, fn in serializers.items():
+            best = min(timeit.repeat(lambda: fn(payload), number=number, repeat=args.repeat)) / number
+            results[name][serializer] = round(best * 1e6, 1)
+        baseline = results[name]["fastapi_default"]
+        print(f"{name}:")
+        for serializer, micros in results[name].items():
+            print(f"   {serializer:>16}: {micros:>10.1f} µs  (x{baseline / micros:.1f})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark de esquemas de ID de sesión: rendimiento de inserción y tamaño del
+índice único `id` en MongoDB para uuid4, uuid7 y objectid.
+
+Usa colecciones temporales (bench_ids_<esquema>) que se eliminan al final.
+
+Ejemplo:
+    python benchmarks/bench_session_ids.py --sessions 200000 --json resultados.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import ASCENDING, IndexModel, MongoClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from session_ids import SCHEMES, new_session_id  # noqa: E402
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+def session_doc(scheme):
+    return {
+        "id": new_session_id(scheme),
+        "sex": "masculino",
+        "responses": [],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "completed": False,
+        "completed_at": None,
+    }
+
+
+def bench_scheme(db, scheme, sessions, batch_size):
+    collection = db[f"bench_ids_{scheme}"]
+    collection.drop()
+    collection.create_indexes([IndexModel([("id", ASCENDING)], name="id_unique", unique=True)])
+
+    # Inserciones de a una (como start-test) y en lotes (como el seed)
+    single = min(sessions // 10, 20000)
+    start = time.perf_counter()
+    for _ in range(single):
+        collection.insert_one(session_doc(scheme))
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    remaining = sessions - single
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        collection.insert_many([session_doc(scheme) for _ in range(count)], ordered=False)
+        remaining -= count
+    batch_seconds = time.perf_counter() - start
+
+    stats = db.command("collStats", collection.name)
+    result = {
+        "scheme": scheme,
+        "sessions": sessions,
+        "insert_one_per_second": round(single / single_seconds, 1) if single else None,
+        "insert_many_per_second": round((sessions - single) / batch_seconds, 1),
+        "id_index_bytes": stats["indexSizes"]["id_unique"],
+        "total_index_bytes": stats["totalIndexSize"],
+    }
+    collection.drop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar esquemas de ID de sesión en MongoDB")
+    parser.add_argument("--mongo-url", default=MONGO_URL)
+    parser.add_argument("--database", default="casm83_bench")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--schemes", nargs="+", default=list(SCHEMES), choices=SCHEMES)
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_url)
+    db = client[args.database]
+    results = []
+    for scheme in args.schemes:
+        result = bench_scheme(db, scheme, args.sessions, args.batch_size)
+        results.append(result)
+        print(f"{scheme:>9}: {result['insert_one_per_second']} insert_one/s, "
+              f"{result['insert_many_per_second']} docs/s en lotes, "
+              f"índice id {result['id_index_bytes'] / 1024:.0f} KiB")
+    client.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
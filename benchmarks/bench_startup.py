@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque de un worker: tiempo de importación (python -X
+importtime) y memoria residente (RSS) tras importar el servidor, con y sin
+el subsistema de PDF (ReportLab), y solo la calificación.
+
+Cada medición se hace en un proceso nuevo, como un worker de uvicorn recién
+lanzado; se reporta la mediana.
+
+Ejemplo:
+    python benchmarks/bench_startup.py --runs 10 --top 15 --json arranque.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+SCENARIOS = {
+    "server": "import server",
+    "server+pdf": "import server, pdf_report",
+    "scoring": "import scoring",
+}
+
+# Imprime el pico de RSS del proceso (KiB en Linux) al terminar de importar
+RSS_SNIPPET = "; import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+
+def parse_importtime(stderr):
+    """{módulo: (self µs, acumulado µs, profundidad)} de la salida de -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def measure(code, env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code + RSS_SNIPPET],
+        cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    modules = parse_importtime(result.stderr)
+    return {
+        "wall_ms": wall * 1000,
+        "import_ms": sum(self_us for self_us, _, _ in modules.values()) / 1000,
+        "rss_mib": int(result.stdout.split()[-1]) / 1024,
+        "modules": modules,
+    }
+
+
+def top_level_packages(modules, top):
+    """Paquetes de primer nivel con mayor tiempo acumulado"""
+    packages = {}
+    for name, (_, cumulative_us, depth) in modules.items():
+        if depth == 1:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + cumulative_us
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medir el arranque de un worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Paquetes más lentos a mostrar")
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    env = dict(os.environ, STORAGE_BACKEND=os.environ.get("STORAGE_BACKEND", "memory"))
+    # Calentar la caché de bytecode para no medir la compilación
+    subprocess.run([sys.executable, "-c", "import server, pdf_report"], cwd=BACKEND, env=env, check=True)
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        runs = [measure(code, env) for _ in range(args.runs)]
+        results[name] = {
+            key: round(statistics.median(run[key] for run in runs), 1)
+            for key in ("wall_ms", "import_ms", "rss_mib")
+        }
+        results[name]["slowest_packages_ms"] = {
+            package: round(us / 1000, 1) for package, us in top_level_packages(runs[-1]["modules"], args.top)
+        }
+        print(f"{name}: proceso {results[name]['wall_ms']} ms, importación {results[name]['import_ms']} ms, "
+              f"RSS {results[name]['rss_mib']} MiB")
+        for package, ms in results[name]["slowest_packages_ms"].items():
+            print(f"   {package:>24}: {ms:>8.1f} ms")
+
+    pdf = {key: round(results["server+pdf"][key] - results["server"][key], 1) for key in ("import_ms", "rss_mib")}
+    print(f"ReportLab diferido: ahorra {pdf['import_ms']} ms y {pdf['rss_mib']} MiB por worker al arrancar")
+    results["deferred_pdf"] = pdf
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga: N estudiantes concurrentes recorren el flujo de App.js
+(preguntas, start-test, un save-response por clic con tiempo de reflexión y
+cambios de opinión, complete-test, resultados y PDF) contra un servidor
+local, con un cliente HTTP asíncrono y un pool de conexiones.
+
+Cada estudiante usa su propio generador aleatorio (--seed), así que dos
+corridas envían exactamente las mismas solicitudes. El reporte JSON incluye
+throughput y p50/p95/p99 por endpoint, y el commit medido, para comparar
+entre commits.
+
+Ejemplos:
+    python benchmarks/load_test.py --serve --students 200 --json carga.json
+    python benchmarks/load_test.py --url http://localhost:8001 --students 50 --think-ms 0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+TOTAL_QUESTIONS = 143
+# Respuesta final de cada pregunta (opciones marcadas)
+ANSWERS = [["A"], ["B"], ["A", "B"], []]
+ANSWER_WEIGHTS = [0.4, 0.4, 0.15, 0.05]
+
+
+def percentile(sorted_values, q):
+    """Percentil q (0-100) por interpolación lineal"""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[q - 1]
+
+
+def clicks(rng, toggle_rate):
+    """Clics de un estudiante sobre una pregunta: cada clic alterna una opción"""
+    final = rng.choices(ANSWERS, ANSWER_WEIGHTS)[0]
+    sequence = list(final)
+    if rng.random() < toggle_rate:
+        # Marca una opción y la desmarca (o desmarca una marcada y la vuelve a marcar)
+        option = rng.choice(["A", "B"])
+        position = rng.randint(0, len(sequence))
+        sequence[position:position] = [option, option]
+    return sequence
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    async def call(self, client, endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return response if ok else None
+
+    def report(self, duration):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "rps": round(len(values) / duration, 1),
+                "mean_ms": round(statistics.fmean(values) * 1000, 2),
+                **{f"p{q}_ms": round(percentile(values, q) * 1000, 2) for q in (50, 95, 99)},
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {"requests": total, "errors": sum(self.errors.values()),
+                "throughput_rps": round(total / duration, 1), "endpoints": endpoints}
+
+
+async def student(client, recorder, index, args):
+    rng = random.Random(f"{args.seed}-{index}")
+    think = args.think_ms / 1000
+
+    async def pause():
+        if think > 0:
+            await asyncio.sleep(rng.expovariate(1 / think))
+
+    await asyncio.sleep(rng.uniform(0, args.ramp_up))
+    await recorder.call(client, "questions", "GET", "/api/questions")
+    started = await recorder.call(client, "start-test", "POST", "/api/start-test",
+                                  json={"sex": rng.choice(["masculino", "femenino"])})
+    if started is None:
+        return False
+    session_id = started.json()["session_id"]
+
+    for q_num in range(1, TOTAL_QUESTIONS + 1):
+        marked = []
+        for option in clicks(rng, args.toggle_rate):
+            await pause()
+            marked = [o for o in marked if o != option] if option in marked else marked + [option]
+            await recorder.call(client, "save-response", "POST", "/api/save-response",
+                                json={"session_id": session_id, "question_number": q_num, "response": marked})
+
+    await recorder.call(client, "complete-test", "POST", "/api/complete-test", json={"session_id": session_id})
+    await recorder.call(client, "results", "GET", f"/api/results/{session_id}")
+    await pause()
+    pdf = await recorder.call(client, "pdf", "GET", f"/api/results/{session_id}/pdf")
+    return pdf is not None
+
+
+def start_server(port):
+    """uvicorn con el almacenamiento en memoria (salvo STORAGE_BACKEND definido)"""
+    env = dict(os.environ, STORAGE_BACKEND=os.environ.get("STORAGE_BACKEND", "memory"))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(url + "/api/health").status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("❌ El servidor no respondió en /api/health")
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(url, args):
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    recorder = Recorder()
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        start = time.perf_counter()
+        finished = await asyncio.gather(*(student(client, recorder, i, args) for i in range(args.students)))
+        duration = time.perf_counter() - start
+    return {"duration_s": round(duration, 2), "students_completed": sum(finished), **recorder.report(duration)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con el flujo completo de estudiantes")
+    parser.add_argument("--url", default="http://localhost:8001", help="Servidor a probar")
+    parser.add_argument("--serve", action="store_true", help="Levantar un uvicorn local (almacenamiento en memoria)")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto para --serve")
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--think-ms", type=float, default=200, help="Tiempo medio entre clics (0: sin pausa)")
+    parser.add_argument("--toggle-rate", type=float, default=0.15, help="Probabilidad de cambiar de opinión")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Segundos en los que llegan los estudiantes")
+    parser.add_argument("--connections", type=int, default=100, help="Conexiones máximas del pool")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if args.serve:
+        process, url = start_server(args.port)
+    try:
+        results = asyncio.run(run(url, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("json", "serve", "port", "url")}
+    results = {"commit": current_commit(), "url": url, "config": config, **results}
+
+    print(f"{results['students_completed']}/{args.students} estudiantes completos en {results['duration_s']} s, "
+          f"{results['requests']} solicitudes ({results['throughput_rps']} req/s), {results['errors']} errores")
+    for endpoint, stats in results["endpoints"].items():
+        print(f"   {endpoint:>14}: {stats['count']:>7} req  p50 {stats['p50_ms']:>8.2f} ms  "
+              f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms  errores {stats['errors']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
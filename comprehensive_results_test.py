@@ -4,10 +4,10 @@ Comprehensive test for CASM-83 Results Calculation Endpoint
 Tests all requirements from the review request with correct scoring
 """
 
-import requests
 import json
 
-BASE_URL = "https://evalpsych-app.preview.emergentagent.com/api"
+# The app in-process, or a deployed API with CASM83_API_URL (see api_client.py)
+from api_client import BASE_URL, api
 
 # Scale mapping (copied from backend for reference)
 SCALE_MAPPING = {
@@ -35,7 +35,7 @@ def test_comprehensive_results():
     print("="*60)
     
     # Create session
-    session_response = requests.post(f"{BASE_URL}/start-test", 
+    session_response = api.post(f"{BASE_URL}/start-test", 
                                    json={"sex": "masculino"}, timeout=10)
     session_id = session_response.json()["session_id"]
     print(f"✅ Session created: {session_id}")
@@ -96,7 +96,7 @@ def test_comprehensive_results():
             "response": resp["response"]
         }
         
-        save_response = requests.post(f"{BASE_URL}/save-response", 
+        save_response = api.post(f"{BASE_URL}/save-response", 
                                    json=save_payload, timeout=10)
         
         if save_response.status_code != 200:
@@ -106,7 +106,7 @@ def test_comprehensive_results():
     print("✅ All responses saved")
     
     # Complete test
-    complete_response = requests.post(f"{BASE_URL}/complete-test", 
+    complete_response = api.post(f"{BASE_URL}/complete-test", 
                                    json={"session_id": session_id}, timeout=10)
     
     if complete_response.status_code != 200:
@@ -117,7 +117,7 @@ def test_comprehensive_results():
     
     # Get results
     print("\n📊 Calculating results...")
-    results_response = requests.get(f"{BASE_URL}/results/{session_id}", timeout=10)
+    results_response = api.get(f"{BASE_URL}/results/{session_id}", timeout=10)
     
     if results_response.status_code != 200:
         print(f"❌ Results endpoint failed: {results_response.status_code}")
@@ -263,7 +263,7 @@ def test_comprehensive_results():
     print(f"\n6️⃣ SEX-SPECIFIC BAREMOS CHECK:")
     
     # Create female session with same responses
-    female_session_response = requests.post(f"{BASE_URL}/start-test", 
+    female_session_response = api.post(f"{BASE_URL}/start-test", 
                                          json={"sex": "femenino"}, timeout=10)
     female_session_id = female_session_response.json()["session_id"]
     
@@ -274,10 +274,10 @@ def test_comprehensive_results():
             "question_number": resp["question_number"],
             "response": resp["response"]
         }
-        requests.post(f"{BASE_URL}/save-response", json=save_payload, timeout=10)
+        api.post(f"{BASE_URL}/save-response", json=save_payload, timeout=10)
     
     # Get female results
-    female_results_response = requests.get(f"{BASE_URL}/results/{female_session_id}", timeout=10)
+    female_results_response = api.get(f"{BASE_URL}/results/{female_session_id}", timeout=10)
     
     if female_results_response.status_code == 200:
         female_results = female_results_response.json()
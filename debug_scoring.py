@@ -3,69 +3,17 @@
 Debug the CASM-83 scoring system to understand the calculation
 """
 
-import requests
+import sys
+from pathlib import Path
+
 import json
 
-BASE_URL = "https://evalpsych-app.preview.emergentagent.com/api"
+# Same scale map the backend scores with
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from instrument import SCALE_MAPPING  # noqa: E402
 
-# Copy the scale mapping from the backend
-SCALE_MAPPING = {
-    "CCFM": {
-        "name": "Ciencias Físicas Matemáticas",
-        "column": [1, 14, 27, 40, 53, 66, 79, 92, 105, 118, 131],  # Opción A
-        "row": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]  # Opción B
-    },
-    "CCSS": {
-        "name": "Ciencias Sociales",
-        "column": [2, 15, 28, 41, 54, 67, 80, 93, 106, 119, 132],
-        "row": [14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24]
-    },
-    "CCNA": {
-        "name": "Ciencias Naturales",
-        "column": [3, 16, 29, 42, 55, 68, 81, 94, 107, 120, 133],
-        "row": [27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37]
-    },
-    "CCCO": {
-        "name": "Ciencias de la Comunicación",
-        "column": [4, 17, 30, 43, 56, 69, 82, 95, 108, 121, 134],
-        "row": [40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50]
-    },
-    "ARTE": {
-        "name": "Artes",
-        "column": [5, 18, 31, 44, 57, 70, 83, 96, 109, 122, 135],
-        "row": [53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63]
-    },
-    "BURO": {
-        "name": "Burocracia",
-        "column": [6, 19, 32, 45, 58, 71, 84, 97, 110, 123, 136],
-        "row": [66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76]
-    },
-    "CCEP": {
-        "name": "Ciencias Económicas Políticas",
-        "column": [7, 20, 33, 46, 59, 72, 85, 98, 111, 124, 137],
-        "row": [79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89]
-    },
-    "IIAA": {
-        "name": "Institutos Armados",
-        "column": [8, 21, 34, 47, 60, 73, 86, 99, 112, 125, 138],
-        "row": [92, 93, 94, 95, 96, 97, 98, 99, 100, 101, 102]
-    },
-    "FINA": {
-        "name": "Finanzas",
-        "column": [9, 22, 35, 48, 61, 74, 87, 100, 113, 126, 139],
-        "row": [105, 106, 107, 108, 109, 110, 111, 112, 113, 114, 115]
-    },
-    "LING": {
-        "name": "Lingüística",
-        "column": [10, 23, 36, 49, 62, 75, 88, 101, 114, 127, 140],
-        "row": [118, 119, 120, 121, 122, 123, 124, 125, 126, 127, 128]
-    },
-    "JURI": {
-        "name": "Jurisprudencia",
-        "column": [11, 24, 37, 50, 63, 76, 89, 102, 115, 128, 141],
-        "row": [131, 132, 133, 134, 135, 136, 137, 138, 139, 140, 141]
-    }
-}
+# The app in-process, or a deployed API with CASM83_API_URL (see api_client.py)
+from api_client import BASE_URL, api  # noqa: E402
 
 def debug_scoring():
     """Debug the scoring system"""
@@ -74,7 +22,7 @@ def debug_scoring():
     print("="*50)
     
     # Create session
-    session_response = requests.post(f"{BASE_URL}/start-test", 
+    session_response = api.post(f"{BASE_URL}/start-test", 
                                    json={"sex": "masculino"}, timeout=10)
     session_id = session_response.json()["session_id"]
     print(f"Session created: {session_id}")
@@ -117,7 +65,7 @@ def debug_scoring():
             "response": resp["response"]
         }
         
-        save_response = requests.post(f"{BASE_URL}/save-response", 
+        save_response = api.post(f"{BASE_URL}/save-response", 
                                    json=save_payload, timeout=10)
         
         if save_response.status_code != 200:
@@ -125,11 +73,11 @@ def debug_scoring():
             return False
     
     # Complete test
-    requests.post(f"{BASE_URL}/complete-test", 
+    api.post(f"{BASE_URL}/complete-test", 
                  json={"session_id": session_id}, timeout=10)
     
     # Get results
-    results_response = requests.get(f"{BASE_URL}/results/{session_id}", timeout=10)
+    results_response = api.get(f"{BASE_URL}/results/{session_id}", timeout=10)
     results = results_response.json()
     
     ccfm_score = results["scores"]["CCFM"]["score"]
@@ -142,7 +90,7 @@ def debug_scoring():
         print("❌ Score calculation mismatch")
         
         # Let's debug by checking what responses were actually saved
-        session_response = requests.get(f"{BASE_URL}/test-session/{session_id}", timeout=10)
+        session_response = api.get(f"{BASE_URL}/test-session/{session_id}", timeout=10)
         session_data = session_response.json()
         
         print(f"\n🔍 Saved responses: {len(session_data['responses'])}")
@@ -4,10 +4,10 @@ Detailed test for CASM-83 Results Calculation Endpoint
 Focuses on testing the specific requirements from the review request
 """
 
-import requests
 import json
 
-BASE_URL = "https://evalpsych-app.preview.emergentagent.com/api"
+# The app in-process, or a deployed API with CASM83_API_URL (see api_client.py)
+from api_client import BASE_URL, api
 
 def test_results_detailed():
     """Detailed test of the results endpoint with comprehensive scoring"""
@@ -15,7 +15,7 @@ def test_results_detailed():
     print("🧪 Creating test session with strategic responses...")
     
     # Create session
-    session_response = requests.post(f"{BASE_URL}/start-test", 
+    session_response = api.post(f"{BASE_URL}/start-test", 
                                    json={"sex": "masculino"}, timeout=10)
     session_id = session_response.json()["session_id"]
     print(f"✅ Session created: {session_id}")
@@ -70,7 +70,7 @@ def test_results_detailed():
             "response": resp["response"]
         }
         
-        save_response = requests.post(f"{BASE_URL}/save-response", 
+        save_response = api.post(f"{BASE_URL}/save-response", 
                                    json=save_payload, timeout=10)
         
         if save_response.status_code != 200:
@@ -80,7 +80,7 @@ def test_results_detailed():
     print("✅ All responses saved successfully")
     
     # Complete the test
-    complete_response = requests.post(f"{BASE_URL}/complete-test", 
+    complete_response = api.post(f"{BASE_URL}/complete-test", 
                                    json={"session_id": session_id}, timeout=10)
     
     if complete_response.status_code != 200:
@@ -91,7 +91,7 @@ def test_results_detailed():
     
     # Get results
     print("📊 Calculating results...")
-    results_response = requests.get(f"{BASE_URL}/results/{session_id}", timeout=10)
+    results_response = api.get(f"{BASE_URL}/results/{session_id}", timeout=10)
     
     if results_response.status_code != 200:
         print(f"❌ Results endpoint failed: {results_response.status_code}")
@@ -168,9 +168,16 @@ def test_results_detailed():
     print("🔍 SCORE CALCULATION VERIFICATION:")
     print("-" * 40)
     
+    # A later save replaces the answer to a question (1, 5 and 53 are saved twice)
+    final_responses = {resp["question_number"]: resp["response"] for resp in strategic_responses}
+    
+    def expected_score(column, row):
+        return (sum("A" in final_responses.get(q, []) for q in column)
+                + sum("B" in final_responses.get(q, []) for q in row))
+    
     # Manual verification for CCFM
     ccfm_score = scores["CCFM"]["score"]
-    expected_ccfm = 8 + 6  # 8 A responses in column + 6 B responses in row
+    expected_ccfm = expected_score(ccfm_column_questions, ccfm_row_questions)
     print(f"CCFM calculated score: {ccfm_score}")
     print(f"CCFM expected score: {expected_ccfm}")
     
@@ -182,7 +189,7 @@ def test_results_detailed():
     
     # Manual verification for ARTE
     arte_score = scores["ARTE"]["score"]
-    expected_arte = 7 + 5  # 7 A responses in column + 5 B responses in row
+    expected_arte = expected_score(arte_column_questions, arte_row_questions)
     print(f"ARTE calculated score: {arte_score}")
     print(f"ARTE expected score: {expected_arte}")
     
@@ -199,7 +206,7 @@ def test_results_detailed():
     print("-" * 40)
     
     # Create female session with same responses
-    female_session_response = requests.post(f"{BASE_URL}/start-test", 
+    female_session_response = api.post(f"{BASE_URL}/start-test", 
                                          json={"sex": "femenino"}, timeout=10)
     female_session_id = female_session_response.json()["session_id"]
     
@@ -210,10 +217,10 @@ def test_results_detailed():
             "question_number": resp["question_number"],
             "response": resp["response"]
         }
-        requests.post(f"{BASE_URL}/save-response", json=save_payload, timeout=10)
+        api.post(f"{BASE_URL}/save-response", json=save_payload, timeout=10)
     
     # Get female results
-    female_results_response = requests.get(f"{BASE_URL}/results/{female_session_id}", timeout=10)
+    female_results_response = api.get(f"{BASE_URL}/results/{female_session_id}", timeout=10)
     
     if female_results_response.status_code == 200:
         female_results = female_results_response.json()
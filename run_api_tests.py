@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Run the API test scripts (backend_test.py, comprehensive_results_test.py,
+detailed_results_test.py, debug_scoring.py) as one suite.
+
+By default the app runs in this process (ASGI, in-memory store) and the
+scripts, which do not depend on each other, run concurrently against it:
+no network and no MongoDB, a few seconds, so it can run before every
+deploy. Each script's output is printed in one piece when it finishes.
+
+Examples:
+    python run_api_tests.py
+    python run_api_tests.py --only backend_test --only debug_scoring
+    python run_api_tests.py --url https://evalpsych-app.preview.emergentagent.com/api
+"""
+
+import argparse
+import importlib
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Script -> entry point (True when the scenario passes)
+SCENARIOS = {
+    "backend_test": lambda module: module.BackendTester().run_all_tests(),
+    "comprehensive_results_test": lambda module: module.test_comprehensive_results(),
+    "detailed_results_test": lambda module: module.test_results_detailed(),
+    "debug_scoring": lambda module: module.debug_scoring(),
+}
+
+
+class ThreadOutput(io.TextIOBase):
+    """sys.stdout that keeps the output of each scenario thread apart"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def write(self, text):
+        return getattr(self.local, "buffer", self.fallback).write(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+
+def run_scenario(name, module, output):
+    output.local.buffer = buffer = io.StringIO()
+    start = time.perf_counter()
+    try:
+        passed = bool(SCENARIOS[name](module))
+    except Exception:
+        traceback.print_exc(file=buffer)
+        passed = False
+    return name, passed, time.perf_counter() - start, buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API test scripts")
+    parser.add_argument("--url", help="Deployed API to test instead of the in-process app")
+    parser.add_argument("--only", action="append", choices=list(SCENARIOS), help="Run only these scripts")
+    parser.add_argument("--sequential", action="store_true", help="One script at a time")
+    args = parser.parse_args()
+
+    if args.url:
+        os.environ["CASM83_API_URL"] = args.url
+    else:
+        os.environ.pop("CASM83_API_URL", None)
+    # The client (and the in-process app) is set up once, before the threads start
+    import api_client  # noqa: F401
+    names = args.only or list(SCENARIOS)
+    modules = {name: importlib.import_module(name) for name in names}
+
+    print(f"🧪 {len(names)} scripts")
+    output = ThreadOutput(sys.stdout)
+    sys.stdout = output
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=1 if args.sequential else len(names)) as pool:
+            results = list(pool.map(lambda name: run_scenario(name, modules[name], output), names))
+    finally:
+        sys.stdout = output.fallback
+    elapsed = time.perf_counter() - start
+
+    for name, passed, seconds, text in results:
+        print("=" * 60)
+        print(f"{name}.py")
+        print("=" * 60)
+        print(text)
+    print("=" * 60)
+    for name, passed, seconds, _ in results:
+        print(f"{'✅' if passed else '❌'} {name:<28} {seconds:6.2f} s")
+    failed = [name for name, passed, _, _ in results if not passed]
+    print(f"{len(names) - len(failed)}/{len(names)} passed in {elapsed:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Script para archivar sesiones abandonadas (no completadas) y restaurarlas.
+
+Las sesiones incompletas con más de N días se mueven de `test_sessions` a la
+colección comprimida `test_sessions_archive` (zstd de WiredTiger) o a
+archivos NDJSON comprimidos (.ndjson.zst, o .ndjson.gz si no está instalado
+`zstandard`). Así la colección activa y sus índices se mantienen pequeños.
+La colección de archivo conserva la misma estructura de documento, por lo
+que se puede exportar con mongoexport/Compass igual que la principal.
+
+Con ANSWER_LOG=1 parte de las respuestas de una sesión puede estar todavía
+en `answer_events` (eventos sin consolidar): antes de archivar cada lote se
+consolidan en la sesión, como al completar el test, y los eventos de las
+sesiones archivadas se borran junto con ellas. Una sesión que recibe una
+respuesta o se completa mientras se archiva no se borra: se deja para la
+próxima ejecución.
+
+Solo funciona con MongoDB (STORAGE_BACKEND=mongo): con `memory` las sesiones
+no sobreviven a un reinicio y con `sqlite` no hay colección de archivo.
+
+Ejemplos:
+    python scripts/archive_sessions.py archive --older-than-days 7
+    python scripts/archive_sessions.py archive --older-than-days 30 --to-files archivo/
+    python scripts/archive_sessions.py restore --id 894a7645-aeb8-4314-b0f9-671413a07ed9
+    python scripts/archive_sessions.py restore --from-files archivo/
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pymongo import ASCENDING, IndexModel, MongoClient
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from storage import merge_responses  # noqa: E402
+
+try:
+    import zstandard
+except ImportError:  # gzip is always available
+    zstandard = None
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "7"))
+ARCHIVE_COLLECTION = "test_sessions_archive"
+DUPLICATE_KEY = 11000
+
+
+def archive_collection(db):
+    """Colección de archivo con compresión zstd a nivel de bloque"""
+    try:
+        db.create_collection(
+            ARCHIVE_COLLECTION,
+            storageEngine={"wiredTiger": {"configString": "block_compressor=zstd"}},
+        )
+    except CollectionInvalid:
+        pass  # ya existe
+    collection = db[ARCHIVE_COLLECTION]
+    collection.create_indexes([
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING)], name="created_at"),
+    ])
+    return collection
+
+
+def insert_ignoring_duplicates(collection, docs):
+    """insert_many desordenado; los duplicados (reintentos) no son error"""
+    try:
+        return len(collection.insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        errors = [err for err in e.details["writeErrors"] if err["code"] != DUPLICATE_KEY]
+        if errors:
+            raise
+        return e.details["nInserted"]
+
+
+def open_archive_file(path, mode):
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError("Instala zstandard para leer/escribir archivos .zst")
+        if mode == "w":
+            return zstandard.open(path, "wt", encoding="utf-8")
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return gzip.open(path, mode + "t", encoding="utf-8")
+
+
+def fold_pending_events(db, batch):
+    """Consolidar en cada sesión sus eventos de respuesta pendientes (ANSWER_LOG=1).
+
+    Devuelve los _id de todos los eventos leídos de cada sesión.
+    """
+    seen, pending = {}, {}
+    cursor = db.answer_events.find(
+        {"session_id": {"$in": [doc["id"] for doc in batch]}},
+        {"session_id": 1, "question_number": 1, "response": 1, "folded": 1},
+    ).sort([("ts", ASCENDING), ("_id", ASCENDING)])
+    for event in cursor:
+        seen.setdefault(event["session_id"], []).append(event["_id"])
+        if not event["folded"]:
+            pending.setdefault(event["session_id"], []).append(event)
+    for doc in batch:
+        if doc["id"] in pending:
+            doc["responses"] = merge_responses(doc.get("responses", []), pending[doc["id"]])
+    return seen
+
+
+def delete_if_unchanged(db, doc, snapshot, events):
+    """Borrar una sesión copiada solo si nadie la tocó desde la lectura.
+
+    `snapshot` son sus respuestas tal como se leyeron y `events` los _id de
+    sus eventos leídos. Si llegó un evento nuevo, o las respuestas o
+    `completed` cambiaron, la sesión se queda para la próxima ejecución.
+    """
+    if db.answer_events.count_documents({"session_id": doc["id"], "_id": {"$nin": events}}):
+        return False
+    result = db.test_sessions.delete_one({"id": doc["id"], "completed": False, "responses": snapshot})
+    if not result.deleted_count:
+        return False
+    if events:
+        db.answer_events.delete_many({"_id": {"$in": events}})
+    return True
+
+
+def archive(args, client=None):
+    """Mover las sesiones incompletas antiguas al archivo"""
+    client = client or MongoClient(args.mongo_url)
+    db = client.casm83
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=args.older_than_days)).isoformat()
+
+    if args.to_files:
+        directory = Path(args.to_files)
+        directory.mkdir(parents=True, exist_ok=True)
+        suffix = ".ndjson.zst" if zstandard is not None else ".ndjson.gz"
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = directory / f"sessions-{stamp}{suffix}"
+        out = open_archive_file(path, "w")
+        target = str(path)
+    else:
+        collection = archive_collection(db)
+        target = ARCHIVE_COLLECTION
+
+    print(f"📦 Archivando sesiones incompletas creadas antes de {cutoff} en {target}")
+    moved = 0
+    skipped = []
+    try:
+        while True:
+            # Cada lote se copia primero y se borra después: si el proceso se
+            # interrumpe, repetirlo no pierde ni duplica sesiones
+            query = {"completed": False, "created_at": {"$lt": cutoff}, "id": {"$nin": skipped}}
+            batch = list(db.test_sessions.find(query, {"_id": 0}).limit(args.batch_size))
+            if not batch:
+                break
+            snapshots = {doc["id"]: doc.get("responses", []) for doc in batch}
+            events = fold_pending_events(db, batch)
+            if args.to_files:
+                for doc in batch:
+                    out.write(json.dumps(doc, ensure_ascii=False) + "\n")
+                out.flush()
+            else:
+                # Reemplazar: la copia de una sesión que se saltó antes puede estar vieja
+                for doc in batch:
+                    collection.replace_one({"id": doc["id"]}, doc, upsert=True)
+            # Se borran solo las que no cambiaron mientras tanto (una respuesta
+            # guardada entre la copia y el borrado no se pierde)
+            for doc in batch:
+                if delete_if_unchanged(db, doc, snapshots[doc["id"]], events.get(doc["id"], [])):
+                    moved += 1
+                else:
+                    skipped.append(doc["id"])
+                    if not args.to_files:
+                        collection.delete_one({"id": doc["id"]})
+            print(f"   {moved} sesiones archivadas...")
+            if len(batch) < args.batch_size:
+                break
+    finally:
+        if args.to_files:
+            out.close()
+        client.close()
+
+    if skipped:
+        print(f"⚠️  {len(skipped)} sesiones cambiaron durante el archivado; quedan para la próxima ejecución")
+    print(f"✅ {moved} sesiones archivadas en {target}")
+
+
+def restore(args):
+    """Devolver sesiones archivadas a test_sessions"""
+    client = MongoClient(args.mongo_url)
+    db = client.casm83
+    restored = 0
+
+    if args.from_files:
+        # Del más nuevo al más antiguo: si una sesión se copió en dos
+        # ejecuciones, gana la última copia (las demás son duplicados)
+        paths = sorted(Path(args.from_files).glob("sessions-*.ndjson.*"), reverse=True)
+        wanted = set(args.id or [])
+        for path in paths:
+            with open_archive_file(path, "r") as f:
+                batch = []
+                for line in f:
+                    doc = json.loads(line)
+                    if wanted and doc["id"] not in wanted:
+                        continue
+                    batch.append(doc)
+                    if len(batch) >= args.batch_size:
+                        restored += insert_ignoring_duplicates(db.test_sessions, batch)
+                        batch = []
+                if batch:
+                    restored += insert_ignoring_duplicates(db.test_sessions, batch)
+            print(f"   {path.name}: {restored} sesiones restauradas hasta ahora")
+    else:
+        collection = db[ARCHIVE_COLLECTION]
+        query = {"id": {"$in": args.id}} if args.id else {}
+        while True:
+            batch = list(collection.find(query, {"_id": 0}).limit(args.batch_size))
+            if not batch:
+                break
+            restored += insert_ignoring_duplicates(db.test_sessions, batch)
+            collection.delete_many({"id": {"$in": [d["id"] for d in batch]}})
+
+    client.close()
+    print(f"✅ {restored} sesiones restauradas en test_sessions")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Archivar y restaurar sesiones incompletas (solo MongoDB, STORAGE_BACKEND=mongo)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help="Archivar sesiones incompletas antiguas")
+    archive_parser.add_argument("--older-than-days", type=float, default=ARCHIVE_AFTER_DAYS)
+    archive_parser.add_argument("--to-files", help="Directorio de archivos NDJSON comprimidos")
+
+    restore_parser = subparsers.add_parser("restore", help="Restaurar sesiones archivadas")
+    restore_parser.add_argument("--id", action="append", help="ID de sesión (se puede repetir); por defecto todas")
+    restore_parser.add_argument("--from-files", help="Directorio de archivos NDJSON comprimidos")
+
+    for sub in (archive_parser, restore_parser):
+        sub.add_argument("--mongo-url", default=MONGO_URL)
+        sub.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    if args.command == "archive":
+        archive(args)
+    else:
+        restore(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Script para construir baremos locales (regionales) a partir de las sesiones
+completadas en MongoDB.
+
+Recorre las sesiones con un cursor (memoria acotada), acumula un histograma
+de puntajes por escala y sexo, y genera una tabla de baremos con la misma
+forma que BAREMOS_VARONES/BAREMOS_MUJERES más el percentil de cada puntaje.
+
+Ejemplos:
+    # Construir la tabla directamente
+    python scripts/build_norms.py build --out baremos_region.json --name lima_2025
+
+    # Dividir el trabajo en particiones y combinarlas después
+    python scripts/build_norms.py build --query '{"created_at": {"$lt": "2025-06-01"}}' --sketch-out parte1.json
+    python scripts/build_norms.py build --query '{"created_at": {"$gte": "2025-06-01"}}' --sketch-out parte2.json
+    python scripts/build_norms.py merge parte1.json parte2.json --out baremos_region.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from instrument import SCALE_MAPPING, VERSION  # noqa: E402
+from norms import NormBuilder  # noqa: E402
+from scoring import calculate_scores  # noqa: E402
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+def build(args):
+    """Recorrer las sesiones completadas y acumular los histogramas"""
+    from pymongo import MongoClient
+
+    client = MongoClient(args.mongo_url)
+    collection = client.casm83.test_sessions
+
+    query = {"completed": True}
+    if args.query:
+        query.update(json.loads(args.query))
+
+    builder = NormBuilder(SCALE_MAPPING.keys())
+    cursor = collection.find(
+        query,
+        projection={"_id": 0, "sex": 1, "responses": 1},
+        batch_size=args.batch_size,
+    )
+    processed = 0
+    for session in cursor:
+        builder.add_scores(session.get("sex"), calculate_scores(session.get("responses", [])))
+        processed += 1
+        if processed % 10000 == 0:
+            print(f"   {processed} sesiones procesadas...")
+
+    client.close()
+    print(f"✅ {processed} sesiones procesadas")
+    return builder
+
+
+def merge(args):
+    """Combinar histogramas parciales generados con --sketch-out"""
+    builder = None
+    for path in args.sketches:
+        with open(path, encoding="utf-8") as f:
+            partial = NormBuilder.from_dict(json.load(f))
+        builder = partial if builder is None else builder.merge(partial)
+    return builder
+
+
+def write_outputs(builder, args):
+    if args.sketch_out:
+        with open(args.sketch_out, "w", encoding="utf-8") as f:
+            json.dump(builder.to_dict(), f)
+        print(f"📁 Histogramas guardados en {args.sketch_out}")
+
+    if args.out:
+        # Un grupo vacío no tiene baremos: el archivo no se podría cargar
+        empty = [group for group, count in builder.sessions.items() if count == 0]
+        if empty:
+            raise SystemExit(f"❌ Sin sesiones para {', '.join(empty)}: no se escribe {args.out}")
+        small = {group: count for group, count in builder.sessions.items() if count < args.min_sessions}
+        for group, count in small.items():
+            print(f"⚠️  Solo {count} sesiones para {group} (mínimo {args.min_sessions}); "
+                  f"los baremos pueden no ser representativos")
+        if small and not args.allow_few_sessions:
+            raise SystemExit(f"❌ No se escribe {args.out}: use --allow-few-sessions para escribirlo de todos modos")
+        table = {
+            "name": args.name or Path(args.out).stem,
+            "description": args.description or "",
+            "instrument_version": VERSION,
+            **builder.table(),
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False, indent=2)
+        print(f"📊 Baremos '{table['name']}' guardados en {args.out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construir baremos CASM-83 a partir de sesiones completadas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Leer sesiones de MongoDB")
+    build_parser.add_argument("--mongo-url", default=MONGO_URL)
+    build_parser.add_argument("--query", help="Filtro adicional en JSON (p. ej. por región o fecha)")
+    build_parser.add_argument("--batch-size", type=int, default=1000)
+
+    merge_parser = subparsers.add_parser("merge", help="Combinar histogramas parciales")
+    merge_parser.add_argument("sketches", nargs="+")
+
+    for sub in (build_parser, merge_parser):
+        sub.add_argument("--out", help="Archivo JSON de baremos (copiarlo en NORM_SETS_DIR para usarlo)")
+        sub.add_argument("--name", help="Nombre del conjunto de baremos; por defecto, el del archivo")
+        sub.add_argument("--description", help="Descripción (p. ej. región y periodo)")
+        sub.add_argument("--sketch-out", help="Archivo JSON con los histogramas (combinables)")
+        sub.add_argument("--min-sessions", type=int, default=300, help="Sesiones mínimas por sexo para --out")
+        sub.add_argument("--allow-few-sessions", action="store_true",
+                         help="Escribir --out aunque un sexo tenga menos de --min-sessions")
+
+    args = parser.parse_args(argv)
+    if not args.out and not args.sketch_out:
+        parser.error("Indica --out y/o --sketch-out")
+
+    builder = build(args) if args.command == "build" else merge(args)
+    write_outputs(builder, args)
+
+
+if __name__ == "__main__":
+    main()
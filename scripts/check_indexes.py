@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Diagnóstico de índices: ejecuta explain() sobre la consulta de cada endpoint
+y termina con error si alguna hace un COLLSCAN.
+
+Uso:
+    python scripts/check_indexes.py            # solo verificar
+    python scripts/check_indexes.py --create   # crear índices y verificar
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from pymongo import MongoClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from indexes import ENDPOINT_QUERIES, SESSION_INDEXES, uses_collscan  # noqa: E402
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+def check_indexes(mongo_url, create=False):
+    """Verificar el plan de consulta de cada endpoint"""
+    client = MongoClient(mongo_url)
+    collection = client.casm83.test_sessions
+
+    if create:
+        collection.create_indexes(SESSION_INDEXES)
+        print("🔧 Índices creados/verificados")
+
+    existing = collection.index_information()
+    missing = [index.document["name"] for index in SESSION_INDEXES if index.document["name"] not in existing]
+    for name in missing:
+        print(f"❌ Falta el índice {name}")
+
+    failures = len(missing)
+    for query in ENDPOINT_QUERIES:
+        cursor = collection.find(query["filter"])
+        if query.get("limit"):
+            cursor = cursor.limit(query["limit"])
+        if uses_collscan(cursor.explain()):
+            if query.get("allow_collscan"):
+                print(f"ℹ️  COLLSCAN esperado: {query['endpoint']}")
+                continue
+            print(f"❌ COLLSCAN: {query['endpoint']} {query['filter']}")
+            failures += 1
+        else:
+            print(f"✅ {query['endpoint']}")
+
+    client.close()
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificar que los endpoints usen índices")
+    parser.add_argument("--mongo-url", default=MONGO_URL)
+    parser.add_argument("--create", action="store_true", help="Crear los índices antes de verificar")
+    args = parser.parse_args()
+
+    failures = check_indexes(args.mongo_url, create=args.create)
+    print()
+    if failures:
+        print(f"⚠️  {failures} problemas de índices encontrados")
+        sys.exit(1)
+    print("🎉 Todas las consultas usan índices")
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Script para calificar hojas de respuestas en lote, sin la API ni MongoDB
+(p. ej. las hojas en papel leídas por el escáner).
+
+Lee NDJSON, CSV o Parquet y escribe los resultados en cualquiera de los
+tres formatos (según la extensión, o --input-format/--output-format). La
+lectura, la calificación y la escritura van por bloques de --chunk-size
+hojas: los bloques se califican en paralelo en un pool de procesos (uno por
+núcleo) con batch_scoring.score_sessions, y solo hay unos pocos bloques en
+memoria a la vez, así que 50k hojas ocupan lo mismo que 5k. El orden de
+salida es el de entrada.
+
+Entrada, una hoja por fila:
+    id, sex (masculino/femenino, o M/F), norm_set (opcional) y
+    q1 ... q143 con la opción marcada: "A", "B", "AB" o vacío (sin marcar).
+    En NDJSON también se acepta el documento de sesión de la API
+    ({"id", "sex", "responses": [{"question_number", "response"}]}).
+
+Salida:
+    NDJSON: el mismo documento que GET /api/results/{id}.
+    CSV/Parquet: una fila por hoja con id, sex, norm_set,
+    answered_questions, <escala>_score y <escala>_interpretation de cada
+    escala, y recommended (escalas recomendadas, separadas por comas).
+
+Una hoja inválida (sexo, baremos o marcas) detiene el proceso con su id y no
+deja el archivo de salida a medias. Parquet requiere `pyarrow` (opcional).
+
+Ejemplos:
+    python scripts/score_offline.py hojas.csv resultados.csv
+    python scripts/score_offline.py hojas.ndjson resultados.parquet --norm-set lima_2025
+    python scripts/score_offline.py hojas.parquet resultados.ndjson --workers 4 --chunk-size 2000
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from batch_scoring import score_sessions  # noqa: E402
+from instrument import DEFAULT_NORM_SET, NORM_SETS, SCALE_MAPPING, TOTAL_QUESTIONS, get_norm_set  # noqa: E402
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # only needed for .parquet files
+    pyarrow = parquet = None
+
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+QUESTION_COLUMNS = [f"q{q_num}" for q_num in range(1, TOTAL_QUESTIONS + 1)]
+# Lo que marca el escáner, ya convertido (el resto se interpreta celda por celda)
+MARKS = {"A": ["A"], "B": ["B"], "AB": ["A", "B"], "": [], None: []}
+SEXES = {"masculino": "masculino", "m": "masculino", "femenino": "femenino", "f": "femenino"}
+RESULT_COLUMNS = (
+    ["id", "sex", "norm_set", "answered_questions"]
+    + [f"{code}_{field}" for code in SCALE_MAPPING for field in ("score", "interpretation")]
+    + ["recommended"]
+)
+
+
+def detect_format(path, given):
+    if given:
+        return given
+    try:
+        return FORMATS[Path(path).suffix.lower()]
+    except KeyError:
+        raise SystemExit(f"❌ Formato desconocido para {path}: use --input-format/--output-format")
+
+
+def valid_response(entry):
+    """{"question_number": int, "response": [str, ...]}, como en la API"""
+    if not isinstance(entry, dict):
+        return False
+    number, response = entry.get("question_number"), entry.get("response")
+    return (isinstance(number, int) and not isinstance(number, bool)
+            and isinstance(response, list) and all(isinstance(option, str) for option in response))
+
+
+def to_session(record, default_norm_set):
+    """Documento de sesión (como en MongoDB) a partir de una fila de hoja"""
+    sex = SEXES.get(str(record.get("sex") or "").strip().lower())
+    record_id = record.get("id") or record.get("session_id")
+    if sex is None:
+        raise ValueError(f"hoja {record_id!r}: sexo no válido {record.get('sex')!r}")
+    norm_set = record.get("norm_set") or default_norm_set
+    if norm_set not in NORM_SETS:
+        raise ValueError(f"hoja {record_id!r}: baremos desconocidos {norm_set!r}")
+    if "responses" in record:
+        responses = record["responses"]
+        if not isinstance(responses, list):
+            raise ValueError(f"hoja {record_id!r}: responses no es una lista ({responses!r})")
+        for entry in responses:
+            if not valid_response(entry):
+                raise ValueError(f"hoja {record_id!r}: respuesta no válida {entry!r}")
+    else:
+        responses = []
+        for q_num, column in enumerate(QUESTION_COLUMNS, start=1):
+            marked = record.get(column)
+            if marked is not None and not isinstance(marked, str):
+                raise ValueError(f"hoja {record_id!r}: {column} no es texto ({marked!r})")
+            response = MARKS.get(marked)
+            if response is None and marked:
+                response = [option for option in "AB" if option in str(marked).upper()]
+            if response:
+                responses.append({"question_number": q_num, "response": response})
+    return {
+        "id": None if record_id is None else str(record_id),
+        "sex": sex,
+        "norm_set": norm_set,
+        "responses": responses,
+    }
+
+
+def to_row(result):
+    """Fila plana (CSV/Parquet) de un resultado"""
+    row = {
+        "id": result["session_id"],
+        "sex": result["sex"],
+        "norm_set": result["norm_set"],
+        "answered_questions": result["answered_questions"],
+    }
+    for code, data in result["scores"].items():
+        row[f"{code}_score"] = data["score"]
+        row[f"{code}_interpretation"] = data["interpretation"]
+    row["recommended"] = ",".join(scale["scale"] for scale in result["recommendations"]["top_scales"])
+    return row
+
+
+def score_chunk(records, default_norm_set, flat):
+    """Calificar un bloque de hojas (en un proceso del pool)"""
+    results = score_sessions([to_session(record, default_norm_set) for record in records])
+    return [to_row(result) for result in results] if flat else results
+
+
+# Lectores: iteran bloques (listas de registros) sin cargar el archivo completo
+
+def read_ndjson(path, chunk_size):
+    with open(path, encoding="utf-8") as f:
+        records = (json.loads(line) for line in f if line.strip())
+        while chunk := list(islice(records, chunk_size)):
+            yield chunk
+
+
+def read_csv(path, chunk_size):
+    with open(path, newline="", encoding="utf-8") as f:
+        records = csv.DictReader(f)
+        while chunk := list(islice(records, chunk_size)):
+            yield chunk
+
+
+def read_parquet(path, chunk_size):
+    for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+# Escritores: reciben bloques de resultados en orden
+
+class NdjsonWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, results):
+        self.file.writelines(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        # Esquema fijo: un bloque con todos los id nulos no cambia los tipos,
+        # y sin hojas queda un archivo válido con las columnas
+        self.schema = pyarrow.schema([
+            (column, pyarrow.int64() if column == "answered_questions" or column.endswith("_score")
+             else pyarrow.string())
+            for column in RESULT_COLUMNS
+        ])
+        self.writer = parquet.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        self.writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+READERS = {"ndjson": read_ndjson, "csv": read_csv, "parquet": read_parquet}
+WRITERS = {"ndjson": NdjsonWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def score_chunks(chunks, default_norm_set, flat, workers):
+    """Bloques de resultados en el orden de entrada, con a lo sumo 2 bloques por proceso en vuelo"""
+    if workers <= 1:
+        for chunk in chunks:
+            yield score_chunk(chunk, default_norm_set, flat)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk, default_norm_set, flat))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calificar hojas de respuestas en lote, sin la API")
+    parser.add_argument("input", help="Hojas de respuestas (.ndjson, .csv o .parquet)")
+    parser.add_argument("output", help="Resultados (.ndjson, .csv o .parquet)")
+    parser.add_argument("--input-format", choices=sorted(READERS))
+    parser.add_argument("--output-format", choices=sorted(WRITERS))
+    parser.add_argument("--norm-set", default=DEFAULT_NORM_SET,
+                        help="Baremos de las hojas sin columna norm_set (por defecto DEFAULT_NORM_SET)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos (1: sin pool)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Hojas por bloque")
+    args = parser.parse_args(argv)
+
+    input_format = detect_format(args.input, args.input_format)
+    output_format = detect_format(args.output, args.output_format)
+    if "parquet" in (input_format, output_format) and parquet is None:
+        raise SystemExit("❌ Parquet requiere pyarrow: pip install pyarrow")
+    try:
+        norm_set = get_norm_set(args.norm_set).name
+    except KeyError:
+        raise SystemExit(f"❌ Baremos desconocidos: {args.norm_set}")
+
+    start = time.perf_counter()
+    scored = 0
+    # Se escribe en un archivo temporal y solo se renombra si todo salió bien
+    partial = f"{args.output}.partial"
+    writer = WRITERS[output_format](partial)
+    try:
+        chunks = READERS[input_format](args.input, args.chunk_size)
+        for results in score_chunks(chunks, norm_set, output_format != "ndjson", args.workers):
+            writer.write(results)
+            scored += len(results)
+            if scored % 10000 < len(results):
+                print(f"   {scored} hojas calificadas...")
+        writer.close()
+        os.replace(partial, args.output)
+    except BaseException as e:
+        writer.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+        if isinstance(e, ValueError):
+            raise SystemExit(f"❌ {e}")
+        raise
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {scored} hojas calificadas en {elapsed:.1f} s ({scored / max(elapsed, 1e-9):.0f} hojas/s) → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
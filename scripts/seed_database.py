@@ -1,111 +1,227 @@
 #!/usr/bin/env python3
 """
-Script para insertar datos de prueba en la base de datos MongoDB
+Script para generar sesiones sintéticas en la base de datos MongoDB
+
+Genera desde unas pocas hasta millones de sesiones sin preguntar nada, con
+respuestas realistas: cada estudiante tiene un interés latente por escala
+(opcionalmente sesgado hacia ciertas escalas) que decide entre las opciones
+A y B de cada pregunta. Inserta en lotes desordenados (insert_many) desde
+varios procesos y reporta el rendimiento.
+
+Ejemplos:
+    python scripts/seed_database.py                       # 6 sesiones, como antes
+    python scripts/seed_database.py --sessions 2000000 --workers 8 --completion-ratio 0.6 --days 90
+    python scripts/seed_database.py --sessions 50000 --skew CCFM:1.5 --skew ARTE:1 --drop
+    python scripts/seed_database.py --sessions 1000 --profile uniform --seed 42
 """
 
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from multiprocessing import Pool
+from pathlib import Path
+
 from pymongo import MongoClient
-import uuid
-from datetime import datetime, timezone
-
-# Conexión a MongoDB
-MONGO_URL = "mongodb://localhost:27017"
-client = MongoClient(MONGO_URL)
-db = client.casm83
-
-def create_sample_session(sex, num_responses=143):
-    """Crear una sesión de prueba con respuestas aleatorias"""
-    import random
-    
-    session_id = str(uuid.uuid4())
-    
-    # Generar respuestas aleatorias
-    responses = []
-    for i in range(1, num_responses + 1):
-        # Elegir aleatoriamente: A, B, ambas, o ninguna
-        choice = random.choice([
-            ["A"],
-            ["B"],
-            ["A", "B"],
-            []
-        ])
-        responses.append({
-            "question_number": i,
-            "response": choice
-        })
-    
-    # Crear documento de sesión
-    session = {
-        "id": session_id,
-        "sex": sex,
-        "responses": responses,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "completed": True,
-        "completed_at": datetime.now(timezone.utc).isoformat()
-    }
-    
-    return session
 
-def seed_database():
-    """Insertar datos de prueba en la base de datos"""
-    
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from instrument import ITEM_SCALES, SCALE_MAPPING, TOTAL_QUESTIONS  # noqa: E402
+from session_ids import new_session_id  # noqa: E402
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+NO_SCALES = ((), ())
+
+
+class SessionGenerator:
+    """Genera documentos de sesión con la misma forma que TestSession"""
+
+    def __init__(self, loadings=ITEM_SCALES, profile="realistic", skew=None, completion_ratio=1.0,
+                 male_ratio=0.5, days=0.0, both_rate=0.08, none_rate=0.04, seed=None, now=None):
+        self.loadings = loadings
+        self.scales = sorted({s for a, b in loadings.values() for s in a + b})
+        self.profile = profile
+        self.skew = skew or {}
+        self.completion_ratio = completion_ratio
+        self.male_ratio = male_ratio
+        self.days = days
+        self.both_rate = both_rate
+        self.none_rate = none_rate
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.now = now or datetime.now(timezone.utc)
+
+    def answer(self, q_num, interests):
+        rng = self.rng
+        if self.profile == "uniform":
+            return rng.choice([["A"], ["B"], ["A", "B"], []])
+
+        roll = rng.random()
+        if roll < self.none_rate:
+            return []
+        if roll < self.none_rate + self.both_rate:
+            return ["A", "B"]
+        a_scales, b_scales = self.loadings.get(q_num, NO_SCALES)
+        a_interest = sum(interests[s] for s in a_scales)
+        b_interest = sum(interests[s] for s in b_scales)
+        p_a = 1 / (1 + math.exp(-(a_interest - b_interest)))
+        return ["A"] if rng.random() < p_a else ["B"]
+
+    def session(self, index=None):
+        """Sesión número `index`: con semilla, sus datos dependen solo de la semilla y del número"""
+        rng = self.rng
+        if self.seed is not None and index is not None:
+            rng.seed(self.seed * 1_000_003 + index)
+        interests = {s: rng.gauss(self.skew.get(s, 0.0), 1.0) for s in self.scales}
+        completed = rng.random() < self.completion_ratio
+        answered = TOTAL_QUESTIONS if completed else rng.randint(0, TOTAL_QUESTIONS - 1)
+
+        created_at = self.now - timedelta(seconds=rng.uniform(0, self.days * 86400))
+        return {
+            "id": new_session_id(),
+            "sex": "masculino" if rng.random() < self.male_ratio else "femenino",
+            "responses": [
+                {"question_number": q_num, "response": self.answer(q_num, interests)}
+                for q_num in range(1, answered + 1)
+            ],
+            "created_at": created_at.isoformat(),
+            "completed": completed,
+            "completed_at": (created_at + timedelta(minutes=rng.uniform(15, 45))).isoformat() if completed else None,
+        }
+
+
+# Estado por proceso (Pool initializer)
+_generator = None
+_mongo_url = None
+
+
+def _init_worker(mongo_url, options):
+    global _generator, _mongo_url
+    _generator = SessionGenerator(**options)
+    _mongo_url = mongo_url
+
+
+def _insert_chunk(task):
+    first, count, batch_size = task
+    start = time.perf_counter()
+    inserted = 0
+    # Semilla por número de sesión: los datos no dependen del reparto entre procesos
+    with MongoClient(_mongo_url) as client:
+        collection = client.casm83.test_sessions
+        while inserted < count:
+            size = min(batch_size, count - inserted)
+            collection.insert_many([_generator.session(first + inserted + i) for i in range(size)], ordered=False)
+            inserted += size
+    return inserted, time.perf_counter() - start
+
+
+def parse_skew(values):
+    skew = {}
+    for value in values or []:
+        scale, _, strength = value.partition(":")
+        skew[scale.upper()] = float(strength or 1.0)
+    return skew
+
+
+def seed_database(args):
+    """Insertar sesiones sintéticas en la base de datos"""
+    skew = parse_skew(args.skew)
+    unknown = set(skew) - set(SCALE_MAPPING)
+    if unknown:
+        raise ValueError(f"Escalas desconocidas en --skew: {', '.join(sorted(unknown))}")
+
     print("🌱 Insertando datos de prueba en MongoDB...")
     print(f"📊 Base de datos: casm83")
     print(f"📁 Colección: test_sessions")
+    print(f"👥 Sesiones: {args.sessions} ({args.workers} procesos, lotes de {args.batch_size})")
     print()
-    
-    # Limpiar datos existentes (opcional)
-    response = input("¿Deseas eliminar datos existentes? (s/n): ")
-    if response.lower() == 's':
+
+    client = MongoClient(args.mongo_url)
+    db = client.casm83
+    if args.drop:
         db.test_sessions.delete_many({})
         print("🗑️  Datos existentes eliminados")
-    
-    # Crear sesiones de prueba
-    sessions = []
-    
-    # 3 sesiones masculinas
-    for i in range(3):
-        session = create_sample_session("masculino")
-        sessions.append(session)
-        print(f"✅ Sesión {i+1}/6 creada (Masculino)")
-    
-    # 3 sesiones femeninas
-    for i in range(3):
-        session = create_sample_session("femenino")
-        sessions.append(session)
-        print(f"✅ Sesión {i+4}/6 creada (Femenino)")
-    
-    # Insertar en MongoDB
-    result = db.test_sessions.insert_many(sessions)
-    
+
+    options = {
+        "profile": args.profile,
+        "skew": skew,
+        "completion_ratio": args.completion_ratio,
+        "male_ratio": args.male_ratio,
+        "days": args.days,
+        "both_rate": args.both_rate,
+        "none_rate": args.none_rate,
+        "seed": args.seed,
+        "now": datetime.now(timezone.utc),  # la misma referencia en todos los procesos
+    }
+    chunk = max(args.batch_size, min(args.batch_size * 20, args.sessions // (args.workers * 4) or 1))
+    tasks = []
+    remaining = args.sessions
+    while remaining > 0:
+        tasks.append((args.sessions - remaining, min(chunk, remaining), args.batch_size))
+        remaining -= tasks[-1][1]
+
+    start = time.perf_counter()
+    inserted = 0
+    with Pool(args.workers, _init_worker, (args.mongo_url, options)) as pool:
+        for count, _ in pool.imap_unordered(_insert_chunk, tasks):
+            inserted += count
+            elapsed = time.perf_counter() - start
+            print(f"   {inserted}/{args.sessions} sesiones ({inserted / elapsed:,.0f} sesiones/s)")
+    elapsed = time.perf_counter() - start
+
     print()
-    print(f"✅ {len(result.inserted_ids)} sesiones insertadas exitosamente")
+    print(f"✅ {inserted} sesiones insertadas en {elapsed:.1f} s ({inserted / elapsed:,.0f} sesiones/s)")
     print()
-    
+
     # Mostrar estadísticas
-    total = db.test_sessions.count_documents({})
+    total = db.test_sessions.estimated_document_count()
     masculino = db.test_sessions.count_documents({"sex": "masculino"})
-    femenino = db.test_sessions.count_documents({"sex": "femenino"})
     completados = db.test_sessions.count_documents({"completed": True})
-    
+    client.close()
+
     print("📊 Estadísticas de la Base de Datos:")
     print(f"   Total de sesiones: {total}")
     print(f"   Masculino: {masculino}")
-    print(f"   Femenino: {femenino}")
+    print(f"   Femenino: {total - masculino}")
     print(f"   Completados: {completados}")
     print()
-    print("🎉 ¡Datos de prueba insertados exitosamente!")
-    print()
     print("🔍 Para ver los datos, ejecuta:")
     print("   mongosh")
     print("   use casm83")
     print("   db.test_sessions.find().pretty()")
 
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generar sesiones sintéticas CASM-83")
+    parser.add_argument("--mongo-url", default=MONGO_URL)
+    parser.add_argument("--sessions", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=1, help="Procesos generadores/inserción")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--profile", choices=["realistic", "uniform"], default="realistic",
+                        help="uniform: A, B, ambas o ninguna al azar (comportamiento anterior)")
+    parser.add_argument("--skew", action="append", metavar="ESCALA:FUERZA",
+                        help="Sesgar el interés hacia una escala, p. ej. CCFM:1.5 (se puede repetir)")
+    parser.add_argument("--completion-ratio", type=float, default=1.0, help="Fracción de sesiones completadas")
+    parser.add_argument("--male-ratio", type=float, default=0.5)
+    parser.add_argument("--days", type=float, default=0.0, help="Repartir created_at en los últimos N días")
+    parser.add_argument("--both-rate", type=float, default=0.08, help="Probabilidad de marcar A y B")
+    parser.add_argument("--none-rate", type=float, default=0.04, help="Probabilidad de no marcar nada")
+    parser.add_argument("--seed", type=int, help="Semilla para resultados reproducibles")
+    parser.add_argument("--drop", action="store_true", help="Eliminar las sesiones existentes antes de insertar")
+    args = parser.parse_args(argv)
+    seed_database(args)
+
+
 if __name__ == "__main__":
     try:
-        seed_database()
+        main()
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         print()
         print("Asegúrate de que:")
         print("1. MongoDB esté corriendo (mongod)")
         print("2. pymongo esté instalado (pip install pymongo)")
+        sys.exit(1)
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# Lifespan-managed test clients fail when a request blocks the event loop
+# (LOOP_MONITOR_STRICT=0 to turn it off while debugging)
+os.environ.setdefault("LOOP_MONITOR_STRICT", "1")
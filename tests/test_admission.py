@@ -0,0 +1,118 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from admission import AdmissionController, AdmissionMiddleware, Budget
+from metrics import HTTP_REQUESTS, MetricsMiddleware
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_budget_queues_then_sheds():
+    async def scenario():
+        budget = Budget("expensive", limit=1, max_queue=1, queue_timeout=0.05)
+        assert await budget.acquire()
+
+        waiter = asyncio.ensure_future(budget.acquire())
+        await asyncio.sleep(0)
+        assert budget.stats()["queue_depth"] == 1
+        assert not await budget.acquire()  # queue full: shed at once
+
+        budget.release()  # the slot goes to the waiter
+        assert await waiter
+        assert budget.active == 1
+        assert not await budget.acquire()  # waits 50 ms, then shed
+        budget.release()
+        assert budget.active == 0
+        return budget.stats()
+
+    stats = run(scenario())
+    assert (stats["admitted"], stats["queued"], stats["shed"], stats["queue_depth"]) == (2, 2, 2, 0)
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        budget = Budget("standard", limit=1, max_queue=4, queue_timeout=5)
+        await budget.acquire()
+        waiter = asyncio.ensure_future(budget.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        budget.release()
+        return budget.active, await budget.acquire()
+
+    assert run(scenario()) == (0, True)
+
+
+def test_slot_handed_over_as_the_wait_times_out_is_kept(monkeypatch):
+    async def scenario():
+        budget = Budget("expensive", limit=1, max_queue=4, queue_timeout=5)
+        await budget.acquire()
+
+        async def racing_wait_for(future, timeout):
+            # release() grants the slot, yet wait_for still reports the timeout
+            budget.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", racing_wait_for)
+        admitted = await budget.acquire()
+        monkeypatch.undo()
+        active = budget.active
+        budget.release()
+        return admitted, active, budget.stats()
+
+    admitted, active, stats = run(scenario())
+    assert admitted and active == 1
+    assert (stats["active"], stats["shed"], stats["admitted"]) == (0, 0, 2)
+
+
+def test_routes_are_classified():
+    controller = AdmissionController()
+
+    assert controller.budget_for("/api/save-response").name == "critical"
+    assert controller.budget_for("/api/test-session/abc").name == "critical"
+    assert controller.budget_for("/api/results/abc/pdf").name == "expensive"
+    assert controller.budget_for("/api/all-sessions").name == "expensive"
+    assert controller.budget_for("/api/results/abc").name == "standard"
+    assert controller.budget_for("/api/health") is None
+    assert AdmissionController.from_env({"ADMISSION_CONTROL": "0"}).budget_for("/api/all-sessions") is None
+    assert AdmissionController.from_env({"ADMISSION_EXPENSIVE_LIMIT": "2"}).budgets["expensive"].limit == 2
+
+
+def test_expensive_burst_is_shed_while_critical_path_runs():
+    controller = AdmissionController({"critical": (8, 8, 1.0), "standard": (8, 8, 1.0), "expensive": (1, 0, 1.0)})
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    app.add_middleware(MetricsMiddleware)
+    release = []
+
+    @app.get("/api/all-sessions")
+    async def export():
+        await release[0].wait()
+        return {"sessions": []}
+
+    @app.post("/api/save-response")
+    async def save():
+        return {"ok": True}
+
+    async def scenario():
+        release.append(asyncio.Event())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            running = asyncio.ensure_future(client.get("/api/all-sessions"))
+            await asyncio.sleep(0.01)
+            shed = await client.get("/api/all-sessions")
+            saved = await client.post("/api/save-response")
+            release[0].set()
+            return shed, saved, await running
+
+    shed_before = HTTP_REQUESTS.values.get(("GET", "shed:expensive", "503"), 0)
+    shed, saved, first = run(scenario())
+    assert shed.status_code == 503 and shed.headers["retry-after"] == "1"
+    assert saved.status_code == 200 and first.status_code == 200
+    assert controller.stats()["expensive"]["shed"] == 1
+    assert controller.stats()["expensive"]["active"] == 0
+    assert HTTP_REQUESTS.values[("GET", "shed:expensive", "503")] == shed_before + 1
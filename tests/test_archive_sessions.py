@@ -0,0 +1,204 @@
+"""
+archive_sessions.py against an in-memory stand-in for the pymongo database.
+"""
+
+import json
+import sys
+from argparse import Namespace
+from itertools import count
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import archive_sessions  # noqa: E402
+
+OLD = "2025-01-01T00:00:00+00:00"
+RECENT = "2999-01-01T00:00:00+00:00"
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$nin" in condition and value in condition["$nin"]:
+                return False
+            if "$lt" in condition and not value < condition["$lt"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class Cursor:
+    def __init__(self, docs, hide_id):
+        self.docs = docs
+        self.hide_id = hide_id
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter([{k: v for k, v in doc.items() if not (self.hide_id and k == "_id")} for doc in self.docs])
+
+
+class Collection:
+    ids = count(1)
+
+    def __init__(self):
+        self.docs = []
+
+    def create_indexes(self, indexes):
+        pass
+
+    def insert_many(self, docs, ordered=True):
+        self.docs += [dict(doc, _id=next(self.ids)) for doc in docs]
+        return SimpleNamespace(inserted_ids=[doc["_id"] for doc in self.docs[-len(docs):]])
+
+    def find(self, query, projection=None):
+        # Projections are ignored except for dropping _id
+        hide_id = projection is not None and projection.get("_id") == 0
+        return Cursor([doc for doc in self.docs if matches(doc, query)], hide_id)
+
+    def count_documents(self, query):
+        return sum(matches(doc, query) for doc in self.docs)
+
+    def replace_one(self, query, doc, upsert=False):
+        self.delete_one(query)
+        self.insert_many([doc])
+
+    def delete_one(self, query):
+        for index, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[index]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def delete_many(self, query):
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+
+class Database:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, Collection())
+
+    def __getattr__(self, name):
+        return self[name]
+
+    def create_collection(self, name, **options):
+        self[name]
+
+
+class Client:
+    def __init__(self):
+        self.casm83 = Database()
+
+    def close(self):
+        pass
+
+
+def session(session_id, created_at, responses=(), completed=False):
+    return {"id": session_id, "sex": "femenino", "created_at": created_at, "completed": completed,
+            "responses": [{"question_number": q, "response": r} for q, r in responses]}
+
+
+def event(session_id, question_number, response, ts, folded=False):
+    return {"session_id": session_id, "question_number": question_number, "response": response,
+            "ts": ts, "folded": folded}
+
+
+@pytest.mark.parametrize("to_files", [False, True])
+def test_archive_folds_pending_answer_events(tmp_path, to_files):
+    client = Client()
+    db = client.casm83
+    db.test_sessions.insert_many([
+        session("old", OLD, [(1, ["A"]), (2, ["B"])]),
+        session("recent", RECENT),
+        session("done", OLD, completed=True),
+    ])
+    db.answer_events.insert_many([
+        event("old", 1, ["A"], "2025-01-01T00:00:01", folded=True),
+        event("old", 2, ["A"], "2025-01-01T00:00:03"),
+        event("old", 3, ["A", "B"], "2025-01-01T00:00:02"),
+        event("recent", 1, ["B"], "2999-01-01T00:00:01"),
+    ])
+
+    args = Namespace(mongo_url=None, older_than_days=7, batch_size=1,
+                     to_files=str(tmp_path) if to_files else None)
+    archive_sessions.archive(args, client)
+
+    if to_files:
+        [path] = tmp_path.glob("sessions-*.ndjson.*")
+        with archive_sessions.open_archive_file(path, "r") as f:
+            archived = [json.loads(line) for line in f]
+    else:
+        archived = list(db[archive_sessions.ARCHIVE_COLLECTION].find({}, {"_id": 0}))
+    assert [doc["id"] for doc in archived] == ["old"]
+    # Pending events replace the snapshot's answers, in time order
+    assert archived[0]["responses"] == [{"question_number": 1, "response": ["A"]},
+                                        {"question_number": 3, "response": ["A", "B"]},
+                                        {"question_number": 2, "response": ["A"]}]
+
+    assert sorted(doc["id"] for doc in db.test_sessions.find({})) == ["done", "recent"]
+    assert [e["session_id"] for e in db.answer_events.find({})] == ["recent"]
+
+
+def test_sessions_changed_while_archiving_stay_for_the_next_run():
+    client = Client()
+    db = client.casm83
+    db.test_sessions.insert_many([
+        session("quiet", OLD, [(1, ["A"])]),
+        session("edited", OLD, [(1, ["A"])]),
+        session("logged", OLD),
+        session("finished", OLD),
+    ])
+    db.answer_events.insert_many([event("logged", 1, ["A"], "2025-01-01T00:00:01")])
+
+    archive_target = db[archive_sessions.ARCHIVE_COLLECTION]
+    copy = archive_target.replace_one
+
+    def copy_then_answer(query, doc, upsert=False):
+        # Answers saved between the copy and the delete
+        copy(query, doc, upsert)
+        [hot] = [d for d in db.test_sessions.docs if d["id"] == doc["id"]]
+        if doc["id"] == "edited":
+            hot["responses"] = hot["responses"] + [{"question_number": 2, "response": ["B"]}]
+        elif doc["id"] == "logged":
+            db.answer_events.insert_many([event("logged", 2, ["B"], "2025-01-01T00:00:02")])
+        elif doc["id"] == "finished":
+            hot["completed"] = True
+
+    archive_target.replace_one = copy_then_answer
+    args = Namespace(mongo_url=None, older_than_days=7, batch_size=1, to_files=None)
+    archive_sessions.archive(args, client)
+
+    assert [doc["id"] for doc in archive_target.find({})] == ["quiet"]
+    assert sorted(doc["id"] for doc in db.test_sessions.find({})) == ["edited", "finished", "logged"]
+    assert len(db.answer_events.docs) == 2
+
+    # Next run: nothing changes any more, so both are archived with every answer
+    archive_target.replace_one = copy
+    archive_sessions.archive(args, client)
+
+    archived = {doc["id"]: doc["responses"] for doc in archive_target.find({}, {"_id": 0})}
+    assert sorted(archived) == ["edited", "logged", "quiet"]
+    assert archived["edited"][-1] == {"question_number": 2, "response": ["B"]}
+    assert archived["logged"] == [{"question_number": 1, "response": ["A"]},
+                                  {"question_number": 2, "response": ["B"]}]
+    assert [doc["id"] for doc in db.test_sessions.find({})] == ["finished"]
+    assert db.answer_events.docs == []
@@ -0,0 +1,107 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+from cache import TTLCache
+from storage import CachedSessionStore, MemorySessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingStore(MemorySessionStore):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get(self, session_id, fields=None):
+        self.reads += 1
+        return await super().get(session_id, fields)
+
+
+def new_session(session_id):
+    return {"id": session_id, "sex": "femenino", "responses": [], "created_at": "2025-10-08T06:26:28+00:00",
+            "completed": False, "completed_at": None}
+
+
+def test_ttl_cache_expires_and_evicts():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    clock.now = 5
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_read_through_and_write_through():
+    async def scenario():
+        inner = CountingStore()
+        await inner.create_session(new_session("a"))
+        store = CachedSessionStore(inner, ttl=60)
+
+        assert (await store.get("a"))["responses"] == []
+        assert await store.get("a", ["sex"]) == {"sex": "femenino"}
+        assert inner.reads == 1
+
+        first = await store.get("a")
+        await store.save_response("a", 7, ["A"])
+        await store.complete("a", "2025-10-08T07:00:00+00:00")
+        cached = await store.get("a")
+
+        assert inner.reads == 1
+        assert cached == await inner.get("a")
+        assert first["responses"] == []  # documents handed out are not mutated
+        assert await store.get("missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_write_during_read_is_not_cached_stale():
+    async def scenario():
+        inner = CountingStore()
+        await inner.create_session(new_session("a"))
+        store = CachedSessionStore(inner, ttl=60)
+        release = asyncio.Event()
+        original_get = inner.get
+
+        async def slow_get(session_id, fields=None):
+            session = await original_get(session_id, fields)
+            await release.wait()
+            return session
+
+        inner.get = slow_get
+        reader = asyncio.create_task(store.get("a"))
+        await asyncio.sleep(0)
+        await store.save_response("a", 1, ["B"])
+        release.set()
+        await reader
+
+        inner.get = original_get
+        assert (await store.get("a"))["responses"] == [{"question_number": 1, "response": ["B"]}]
+
+    asyncio.run(scenario())
+
+
+def test_results_and_pdf_share_one_read(monkeypatch):
+    inner = CountingStore()
+    monkeypatch.setattr(server, "store", CachedSessionStore(inner, ttl=60))
+    with TestClient(server.app) as client:
+        session_id = client.post("/api/start-test", json={"sex": "masculino"}).json()["session_id"]
+        client.post("/api/save-response", json={"session_id": session_id, "question_number": 1, "response": ["A"]})
+        client.post("/api/complete-test", json={"session_id": session_id})
+        assert client.get(f"/api/test-session/{session_id}").json()["completed"] is True
+        assert client.get(f"/api/results/{session_id}").json()["answered_questions"] == 1
+        assert client.get(f"/api/results/{session_id}/pdf").status_code == 200
+
+    assert inner.reads == 0
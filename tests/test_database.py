@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from database import MongoSettings, PoolStats
+
+
+def test_settings_from_env():
+    settings = MongoSettings.from_env({
+        "MONGO_URL": "mongodb://db:27017",
+        "MONGO_MAX_POOL_SIZE": "20",
+        "MONGO_SOCKET_TIMEOUT_MS": "5000",
+        "MONGO_COMPRESSORS": "zstd, snappy",
+    })
+    options = settings.client_options()
+
+    assert settings.url == "mongodb://db:27017"
+    assert settings.db_name == "casm83"
+    assert options["maxPoolSize"] == 20
+    assert options["socketTimeoutMS"] == 5000
+    assert options["compressors"] == "zstd,snappy"
+    assert "waitQueueTimeoutMS" not in options
+
+
+def test_pool_stats_track_checkouts():
+    stats = PoolStats()
+    event = SimpleNamespace(address=("db", 27017))
+    stats.connection_created(event)
+    stats.connection_check_out_started(event)
+    stats.connection_checked_out(event)
+    stats.connection_check_out_started(event)
+
+    server = stats.snapshot(max_pool_size=1)["servers"]["db:27017"]
+    assert server["open"] == 1
+    assert server["checked_out"] == 1
+    assert server["waiting"] == 1
+    assert server["saturated"]
+
+    stats.connection_checked_in(event)
+    assert stats.snapshot(max_pool_size=1)["servers"]["db:27017"]["checked_out"] == 0
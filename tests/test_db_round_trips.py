@@ -0,0 +1,114 @@
+"""
+Counts the database operations each endpoint issues through the MongoDB
+store, against a recording stand-in for the Motor collection.
+"""
+
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from database import MongoConnection, MongoSettings
+from storage import MongoSessionStore
+
+SESSION = {
+    "id": "s-1",
+    "sex": "femenino",
+    "responses": [{"question_number": 1, "response": ["A"]}],
+    "created_at": "2025-10-08T06:26:28+00:00",
+    "completed": False,
+    "completed_at": None,
+}
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+
+class CountingCollection:
+    def __init__(self, docs):
+        self.docs = {doc["id"]: dict(doc) for doc in docs}
+        self.ops = Counter()
+        self.projections = []
+
+    def _lookup(self, filter, projection):
+        self.projections.append(projection)
+        doc = self.docs.get(filter.get("id"))
+        return dict(doc) if doc else None
+
+    async def insert_one(self, doc):
+        self.ops["insert_one"] += 1
+        self.docs[doc["id"]] = dict(doc)
+
+    async def find_one(self, filter, projection=None):
+        self.ops["find_one"] += 1
+        return self._lookup(filter, projection)
+
+    async def find_one_and_update(self, filter, update, projection=None, return_document=None):
+        self.ops["find_one_and_update"] += 1
+        return self._lookup(filter, projection)
+
+    async def update_one(self, filter, update):
+        self.ops["update_one"] += 1
+        return SimpleNamespace(matched_count=int(filter.get("id") in self.docs))
+
+    def find(self, filter=None, projection=None, batch_size=None):
+        self.ops["find"] += 1
+        self.projections.append(projection)
+        return _Cursor([dict(doc) for doc in self.docs.values()])
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = CountingCollection([SESSION])
+    store = MongoSessionStore(MongoConnection(MongoSettings()))
+    store.connection.db = SimpleNamespace(test_sessions=collection)
+    monkeypatch.setattr(server, "store", store)
+    return collection
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the recording collection replaces the real connection
+    return TestClient(server.app)
+
+
+ENDPOINTS = [
+    ("post", "/api/start-test", {"sex": "masculino"}),
+    ("post", "/api/save-response", {"session_id": "s-1", "question_number": 2, "response": ["B"]}),
+    ("post", "/api/complete-test", {"session_id": "s-1"}),
+    ("get", "/api/test-session/s-1", None),
+    ("get", "/api/all-sessions", None),
+    ("get", "/api/results/s-1", None),
+    ("get", "/api/results/s-1/pdf", None),
+    ("post", "/api/results/batch", {"session_ids": ["s-1", "s-2"]}),
+]
+
+
+@pytest.mark.parametrize("method,path,body", ENDPOINTS)
+def test_one_round_trip_per_request(collection, client, method, path, body):
+    response = getattr(client, method)(path, json=body) if body else getattr(client, method)(path)
+
+    assert response.status_code == 200, response.text
+    assert sum(collection.ops.values()) == 1, dict(collection.ops)
+    assert all(p and p.get("_id") == 0 for p in collection.projections)
+
+
+@pytest.mark.parametrize("method,path,body", [
+    ("post", "/api/save-response", {"session_id": "missing", "question_number": 1, "response": []}),
+    ("post", "/api/complete-test", {"session_id": "missing"}),
+    ("get", "/api/test-session/missing", None),
+    ("get", "/api/results/missing", None),
+])
+def test_missing_session_is_404_in_one_round_trip(collection, client, method, path, body):
+    response = getattr(client, method)(path, json=body) if body else getattr(client, method)(path)
+
+    assert response.status_code == 404
+    assert sum(collection.ops.values()) == 1
@@ -0,0 +1,23 @@
+from indexes import ENDPOINT_QUERIES, SESSION_INDEXES, uses_collscan
+
+
+def test_detects_collscan_in_nested_plans():
+    collscan = {"queryPlanner": {"winningPlan": {"stage": "LIMIT", "inputStage": {"stage": "COLLSCAN"}}}}
+    ixscan = {"queryPlanner": {"winningPlan": {
+        "queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "id_unique"}}}}}
+    or_plan = {"queryPlanner": {"winningPlan": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}}
+
+    assert uses_collscan(collscan)
+    assert not uses_collscan(ixscan)
+    assert uses_collscan(or_plan)
+
+
+def test_every_filtered_query_has_an_index_prefix():
+    prefixes = [[field for field, _ in index.document["key"].items()] for index in SESSION_INDEXES]
+
+    for query in ENDPOINT_QUERIES:
+        if query.get("allow_collscan"):
+            continue
+        fields = set(query["filter"])
+        assert any(keys[0] in fields for keys in prefixes), query["endpoint"]
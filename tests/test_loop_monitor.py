@@ -0,0 +1,72 @@
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+
+import server
+from loop_monitor import EventLoopBlocked, LoopMonitor
+from metrics import EVENT_LOOP_LAG_SECONDS
+from storage import MemorySessionStore
+
+
+def blocking_report():
+    time.sleep(0.15)
+    return {"ok": True}
+
+
+def monitored_app(monitor):
+    @asynccontextmanager
+    async def lifespan(app):
+        monitor.start()
+        yield
+        await monitor.stop()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/blocking")
+    async def blocking():
+        return blocking_report()
+
+    @app.get("/offloaded")
+    async def offloaded():
+        return await run_in_threadpool(blocking_report)
+
+    return app
+
+
+def test_strict_mode_reports_the_blocking_stack():
+    monitor = LoopMonitor(interval=0.01, threshold=0.05, strict=True)
+
+    with pytest.raises(EventLoopBlocked, match="blocking_report"):
+        with TestClient(monitored_app(monitor)) as client:
+            assert client.get("/blocking").status_code == 200
+
+    assert EVENT_LOOP_LAG_SECONDS.count() > 0
+
+
+def test_threadpool_work_does_not_block_the_loop():
+    monitor = LoopMonitor(interval=0.01, threshold=0.05, strict=True)
+
+    with TestClient(monitored_app(monitor)) as client:
+        assert client.get("/offloaded").status_code == 200
+
+    assert not monitor.blocks
+
+
+def test_pdf_is_built_off_the_event_loop(monkeypatch):
+    import pdf_report
+    generate_pdf = pdf_report.generate_pdf
+
+    def slow_generate_pdf(*args):
+        time.sleep(0.15)  # a large report on a busy worker
+        return generate_pdf(*args)
+
+    monkeypatch.setattr(pdf_report, "generate_pdf", slow_generate_pdf)
+    monkeypatch.setattr(server, "store", MemorySessionStore())
+    monkeypatch.setattr(server, "loop_monitor", LoopMonitor(interval=0.01, threshold=0.05, strict=True))
+    with TestClient(server.app) as client:
+        session_id = client.post("/api/start-test", json={"sex": "femenino"}).json()["session_id"]
+        assert client.get(f"/api/results/{session_id}/pdf").status_code == 200
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+import server
+from metrics import Counter, Histogram
+from storage import MemorySessionStore, TimedSessionStore
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/a")
+
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{route="/a",le="0.1"} 1',
+        'demo_seconds_bucket{route="/a",le="1"} 3',
+        'demo_seconds_bucket{route="/a",le="+Inf"} 4',
+        'demo_seconds_sum{route="/a"} 4.05',
+        'demo_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("demo_total", "Demo", ("path",))
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+
+    assert counter.render()[-1] == 'demo_total{path="a\\"b"} 3'
+
+
+def test_metrics_endpoint_reports_routes_store_and_scoring(monkeypatch):
+    monkeypatch.setattr(server, "store", TimedSessionStore(MemorySessionStore()))
+    with TestClient(server.app) as client:
+        session_id = client.post("/api/start-test", json={"sex": "femenino"}).json()["session_id"]
+        client.post("/api/save-response", json={"session_id": session_id, "question_number": 1, "response": ["A"]})
+        client.get(f"/api/results/{session_id}")
+        client.get("/api/results/missing")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    # Route templates, not raw session ids
+    assert 'casm83_http_requests_total{method="GET",route="/api/results/{session_id}",status="200"}' in body
+    assert 'casm83_http_requests_total{method="GET",route="/api/results/{session_id}",status="404"}' in body
+    assert session_id not in body
+    assert 'casm83_store_operation_duration_seconds_count{backend="memory",operation="get"}' in body
+    assert 'casm83_scoring_duration_seconds_bucket{function="calculate_scores",le="+Inf"}' in body
+    assert 'casm83_admission_active{class="critical"} 0' in body
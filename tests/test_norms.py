@@ -0,0 +1,114 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from instrument import SCALE_MAPPING, load_norm_sets
+from norms import CATEGORY_BANDS, MAX_RAW_SCORE, NormBuilder, ScoreSketch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import build_norms  # noqa: E402
+
+
+def make_sketch(scores):
+    sketch = ScoreSketch()
+    for score in scores:
+        sketch.add(score)
+    return sketch
+
+
+def test_merge_matches_single_pass():
+    scores = [i % 23 for i in range(1000)] + [5] * 200
+    whole = make_sketch(scores)
+    merged = make_sketch(scores[:400]).merge(make_sketch(scores[400:]))
+
+    assert merged.counts == whole.counts
+    assert merged.quantile(0.5) == whole.quantile(0.5)
+
+
+def test_quantile_and_percentile_ranks():
+    sketch = make_sketch(range(MAX_RAW_SCORE + 1))
+
+    assert sketch.quantile(0.0) == 0
+    assert sketch.quantile(1.0) == MAX_RAW_SCORE
+    ranks = sketch.percentile_ranks()
+    assert set(ranks) == set(range(MAX_RAW_SCORE + 1))
+    assert all(ranks[s] < ranks[s + 1] for s in range(MAX_RAW_SCORE))
+
+
+def test_baremos_cover_every_score_contiguously():
+    sketch = make_sketch([int(22 * (i / 999) ** 2) for i in range(1000)])
+    table = sketch.baremos()
+
+    names = [name for name, _ in CATEGORY_BANDS]
+    assert list(table) == [name for name in names if name in table]
+    bounds = list(table.values())
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == 99
+    for (_, prev_max), (next_min, _) in zip(bounds, bounds[1:]):
+        assert next_min == prev_max + 1
+
+
+def test_builder_round_trip_and_table_shape():
+    builder = NormBuilder(["CCFM", "CCSS"])
+    builder.add_scores("masculino", {"CCFM": {"score": 10}, "CCSS": {"score": 3}})
+    builder.add_scores("femenino", {"CCFM": {"score": 22}, "CCSS": {"score": 0}})
+
+    restored = NormBuilder.from_dict(builder.to_dict())
+    table = restored.merge(builder).table()
+
+    assert table["sessions"] == {"varones": 2, "mujeres": 2}
+    assert set(table["baremos"]["varones"]) == {"CCFM", "CCSS"}
+    assert table["percentiles"]["mujeres"]["CCFM"]["22"] == 50.0
+
+
+def sketch_file(tmp_path, sessions):
+    """build_norms.py --sketch-out file with `sessions` sessions per sex"""
+    builder = NormBuilder(SCALE_MAPPING)
+    for sex, count in sessions.items():
+        for i in range(count):
+            builder.add_scores(sex, {code: {"score": i % 23} for code in SCALE_MAPPING})
+    path = tmp_path / "parte.json"
+    path.write_text(json.dumps(builder.to_dict()))
+    return str(path)
+
+
+@pytest.mark.parametrize("sessions, extra", [
+    ({"masculino": 40}, ["--allow-few-sessions"]),  # no women: never loadable
+    ({"masculino": 40, "femenino": 5}, []),         # too few women without the override
+])
+def test_out_refuses_tables_that_are_empty_or_too_small(tmp_path, sessions, extra):
+    out = tmp_path / "region.json"
+    with pytest.raises(SystemExit) as exit:
+        build_norms.main(["merge", sketch_file(tmp_path, sessions), "--out", str(out), "--min-sessions", "10", *extra])
+
+    assert exit.value.code != 0
+    assert not out.exists()
+
+
+def test_small_table_with_override_loads(tmp_path):
+    (tmp_path / "norms").mkdir()
+    build_norms.main(["merge", sketch_file(tmp_path, {"masculino": 40, "femenino": 5}),
+                      "--out", str(tmp_path / "norms" / "region.json"), "--min-sessions", "10", "--allow-few-sessions"])
+
+    assert list(load_norm_sets([tmp_path / "norms"], SCALE_MAPPING)) == ["region"]
+
+
+def test_broken_extra_norm_set_is_skipped(tmp_path, caplog):
+    (tmp_path / "bueno.json").write_text(json.dumps({"name": "bueno", **make_table()}))
+    (tmp_path / "vacio.json").write_text(json.dumps({**make_table(), "baremos": {"varones": {}, "mujeres": {}}}))
+    (tmp_path / "roto.json").write_text("{")
+
+    norm_sets = load_norm_sets([], SCALE_MAPPING, [tmp_path])
+
+    assert list(norm_sets) == ["bueno"]
+    assert "vacio.json" in caplog.text and "roto.json" in caplog.text
+
+
+def make_table():
+    builder = NormBuilder(SCALE_MAPPING)
+    for sex in ("masculino", "femenino"):
+        builder.add_scores(sex, {code: {"score": 11} for code in SCALE_MAPPING})
+    return builder.table()
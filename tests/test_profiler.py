@@ -0,0 +1,55 @@
+import time
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from profiler import ProfilerMiddleware, RequestProfiler
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profiled_app(profiler):
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+    @app.get("/api/results/{session_id}/pdf")
+    async def pdf(session_id: str):
+        busy_wait(0.1)
+        return {"id": session_id}
+
+    return app
+
+
+def test_header_selects_request_and_writes_collapsed_stacks(tmp_path):
+    client = TestClient(profiled_app(RequestProfiler(str(tmp_path), sample_rate=0, interval=0.002)))
+
+    client.get("/api/results/abc/pdf")
+    assert not list(tmp_path.rglob("*.collapsed"))
+
+    client.get("/api/results/abc/pdf", headers={"X-Profile": "1"})
+    [profile] = (tmp_path / "api_results_session_id_pdf").glob("*-GET-200-*ms.collapsed")
+    lines = profile.read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    busy = [line for line in lines if "busy_wait" in line]
+    assert busy and all(line.startswith("[request];") for line in busy)
+
+
+def test_profiles_rotate_per_route(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), keep=2)
+    for status in (200, 201, 202):
+        profiler.write("/api/stats", "GET", status, 0.01, Counter({"[request];a;b": 3}))
+    profiler.write("/api/all-sessions", "GET", 200, 0.01, Counter())
+
+    kept = sorted(path.name for path in (tmp_path / "api_stats").iterdir())
+    assert [name.split("-")[2] for name in kept] == ["201", "202"]
+    assert len(list((tmp_path / "api_all_sessions").iterdir())) == 1
+
+
+def test_disabled_without_directory():
+    profiler = RequestProfiler.from_env({"PROFILE_SAMPLE_RATE": "1"})
+    assert not profiler.wants({"type": "http", "headers": [(b"x-profile", b"1")]})
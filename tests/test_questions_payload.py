@@ -0,0 +1,59 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from precompressed import PrecompressedPayload, accepted_encodings
+
+
+@pytest.fixture
+def client():
+    return TestClient(server.app)
+
+
+def test_questions_payload_matches_question_bank(client):
+    response = client.get("/api/questions", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.json() == {"questions": [dict(q) for q in server.QUESTIONS], "total": 143}
+    assert response.headers["ETag"].startswith('"')
+    assert "max-age" in response.headers["Cache-Control"]
+
+
+def test_gzip_variant_and_conditional_get(client):
+    payload = server.QUESTIONS_PAYLOAD
+    body, etag = payload.variants["gzip"]
+    assert json.loads(gzip.decompress(body)) == {"questions": [dict(q) for q in server.QUESTIONS], "total": 143}
+
+    response = client.get("/api/questions", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["ETag"] == etag
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    cached = client.get("/api/questions", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    stale = client.get("/api/questions", headers={"If-None-Match": '"something-else"'})
+    assert stale.status_code == 200
+
+    # A cached gzip body does not validate the identity variant
+    other_variant = client.get("/api/questions", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert other_variant.status_code == 200
+    assert other_variant.headers["ETag"] == payload.variants[None][1]
+
+
+def test_brotli_is_preferred_when_available():
+    brotli = pytest.importorskip("brotli")
+    payload = PrecompressedPayload({"a": 1})
+    assert payload.choose_encoding("gzip, br") == "br"
+    assert json.loads(brotli.decompress(payload.variants["br"][0])) == {"a": 1}
+
+
+def test_accept_encoding_parsing():
+    assert accepted_encodings("gzip;q=0, br;q=0.5, *") == {"gzip": 0.0, "br": 0.5, "*": 1.0}
+    payload = PrecompressedPayload({"a": 1})
+    assert payload.choose_encoding("gzip;q=0") is None
+    assert payload.choose_encoding(None) is None
@@ -0,0 +1,116 @@
+import csv
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+from instrument import DEFAULT_NORM_SET, TOTAL_QUESTIONS
+from scoring import build_result
+
+# Importable by name, so the process pool can pickle its functions
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import score_offline  # noqa: E402
+
+
+def answer_sheets(count):
+    rng = random.Random(7)
+    return [
+        {"id": f"h{i}", "sex": rng.choice(["M", "F", "femenino"]),
+         **{f"q{q}": rng.choice(["A", "B", "AB", "", "b"]) for q in range(1, TOTAL_QUESTIONS + 1)}}
+        for i in range(count)
+    ]
+
+
+def sheet_session(sheet):
+    """The session the API would hold for the same answers"""
+    responses = [
+        {"question_number": q, "response": [option for option in "AB" if option in sheet[f"q{q}"].upper()]}
+        for q in range(1, TOTAL_QUESTIONS + 1) if sheet[f"q{q}"]
+    ]
+    return {"id": sheet["id"], "sex": "masculino" if sheet["sex"] == "M" else "femenino", "responses": responses}
+
+
+def expected_result(sheet):
+    return build_result(sheet_session(sheet), DEFAULT_NORM_SET)
+
+
+def test_csv_sheets_scored_in_parallel_chunks_keep_order(tmp_path):
+    sheets = answer_sheets(25)
+    with open(tmp_path / "hojas.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(sheets[0]))
+        writer.writeheader()
+        writer.writerows(sheets)
+
+    score_offline.main([str(tmp_path / "hojas.csv"), str(tmp_path / "resultados.ndjson"),
+                        "--workers", "2", "--chunk-size", "4"])
+
+    lines = (tmp_path / "resultados.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [expected_result(sheet) for sheet in sheets]
+
+
+def test_api_session_documents_to_flat_csv(tmp_path):
+    sheets = answer_sheets(3)
+    (tmp_path / "sesiones.jsonl").write_text(
+        "".join(json.dumps(sheet_session(sheet)) + "\n" for sheet in sheets), encoding="utf-8")
+
+    score_offline.main([str(tmp_path / "sesiones.jsonl"), str(tmp_path / "resultados.csv"), "--workers", "1"])
+
+    with open(tmp_path / "resultados.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == score_offline.RESULT_COLUMNS
+    for row, result in zip(rows, map(expected_result, sheets)):
+        assert row["id"] == result["session_id"]
+        assert int(row["CCFM_score"]) == result["scores"]["CCFM"]["score"]
+        assert row["JURI_interpretation"] == result["scores"]["JURI"]["interpretation"]
+        assert row["recommended"] == ",".join(s["scale"] for s in result["recommendations"]["top_scales"])
+
+
+@pytest.mark.parametrize("bad", [
+    {"sex": "x"},
+    {"norm_set": "lima"},
+    {"q7": ["A"]},
+    {"responses": [{"q": 1}]},
+    {"responses": [{"question_number": "1", "response": "A"}]},
+])
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_invalid_sheet_stops_with_its_id_and_no_output(tmp_path, bad, workers):
+    sheets = [{"id": f"h{i}", "sex": "F", "q1": "A"} for i in range(10)]
+    sheets[9].update(bad)
+    (tmp_path / "hojas.ndjson").write_text("".join(json.dumps(sheet) + "\n" for sheet in sheets))
+
+    with pytest.raises(SystemExit, match="h9"):
+        score_offline.main([str(tmp_path / "hojas.ndjson"), str(tmp_path / "resultados.csv"),
+                            "--workers", workers, "--chunk-size", "3"])
+    assert list(tmp_path.iterdir()) == [tmp_path / "hojas.ndjson"]
+
+
+def test_parquet_round_trip(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    from pyarrow import parquet
+
+    sheets = answer_sheets(7)
+    parquet.write_table(pyarrow.Table.from_pylist(sheets), tmp_path / "hojas.parquet")
+
+    score_offline.main([str(tmp_path / "hojas.parquet"), str(tmp_path / "resultados.parquet"),
+                        "--workers", "1", "--chunk-size", "3"])
+
+    rows = parquet.read_table(tmp_path / "resultados.parquet").to_pylist()
+    assert rows == [score_offline.to_row(expected_result(sheet)) for sheet in sheets]
+
+
+@pytest.mark.parametrize("sheets", [[], [{"sex": "F", "q1": "A"}] * 3 + [{"id": "h3", "sex": "M"}]])
+def test_parquet_schema_is_fixed(tmp_path, sheets):
+    pytest.importorskip("pyarrow")
+    from pyarrow import parquet
+
+    (tmp_path / "hojas.ndjson").write_text("".join(json.dumps(sheet) + "\n" for sheet in sheets))
+
+    score_offline.main([str(tmp_path / "hojas.ndjson"), str(tmp_path / "resultados.parquet"),
+                        "--workers", "1", "--chunk-size", "3"])
+
+    table = parquet.read_table(tmp_path / "resultados.parquet")
+    assert table.schema.names == score_offline.RESULT_COLUMNS
+    assert table.column("id").to_pylist() == [sheet.get("id") for sheet in sheets]
@@ -0,0 +1,160 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import instrument
+import server
+from instrument import (
+    ITEM_SCALES,
+    NORM_SETS,
+    QUESTIONS,
+    SCALE_MAPPING,
+    InstrumentError,
+    compile_scales,
+    load_json,
+    load_norm_sets,
+)
+from norms import NormBuilder
+from scoring import build_result, calculate_scores, interpret_score, rescore, score_batch, score_session
+from storage import MemorySessionStore
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+
+def test_data_files_compile_to_read_only_lookups():
+    assert len(QUESTIONS) == 143
+    assert len(SCALE_MAPPING) == 11
+    with pytest.raises(TypeError):
+        SCALE_MAPPING["CCFM"]["column"] = ()
+    # Item 1 loads CCFM on both options; 142 and 143 load no scale
+    assert ITEM_SCALES[1] == (("CCFM",), ("CCFM",))
+    assert 142 not in ITEM_SCALES and 143 not in ITEM_SCALES
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda scales: scales["CCFM"]["column"].pop(),
+    lambda scales: scales["CCSS"]["row"].__setitem__(0, 144),
+    lambda scales: scales["JURI"]["row"].__setitem__(0, 0),
+])
+def test_structural_invariants_are_checked(mutate):
+    data = load_json("scales_r2014.json")
+    mutate(data["scales"])
+
+    with pytest.raises(InstrumentError):
+        compile_scales(data)
+
+
+def test_scores_first_answer_wins_and_ignores_unknown_items():
+    responses = [
+        {"question_number": 1, "response": ["A", "B"]},
+        {"question_number": 1, "response": []},
+        {"question_number": 14, "response": ["A"]},
+        {"question_number": 142, "response": ["A", "B"]},
+        {"question_number": 500, "response": ["A"]},
+    ]
+    scores = calculate_scores(responses)
+
+    assert list(scores) == list(SCALE_MAPPING)
+    assert scores["CCFM"] == {"name": "Ciencias Físicas Matemáticas", "score": 3, "max_score": 22}
+    assert sum(s["score"] for s in scores.values()) == 3
+
+
+def test_interpretation_uses_norm_group_and_falls_back():
+    assert interpret_score(22, "masculino", "CCFM") == "muy_alto"
+    assert interpret_score(22, "femenino", "CCFM") == "alto"
+    # CCSS varones starts at 1
+    assert interpret_score(0, "masculino", "CCSS") == "indeciso"
+    assert interpret_score(50, "masculino", "CCSS") == "muy_alto"
+
+    scores, recommendations = score_session([], "femenino")
+    assert all(s["interpretation"] == "desinteres" for s in scores.values())
+    assert recommendations["top_scales"] == []
+
+
+@pytest.mark.parametrize("module, heavy", [
+    ("scoring", ("fastapi", "motor", "reportlab", "pydantic")),
+    ("server", ("reportlab",)),  # only the first PDF request imports it
+])
+def test_imports_do_not_load_heavy_dependencies(module, heavy):
+    code = f"import sys, {module}; print(sorted(m for m in {heavy!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def regional_norm_sets(tmp_path):
+    """r2014 plus a norm set built the way build_norms.py builds one"""
+    builder = NormBuilder(SCALE_MAPPING)
+    for score in range(23):
+        for sex in ("masculino", "femenino"):
+            builder.add_scores(sex, {code: {"score": (score * 3) % 23} for code in SCALE_MAPPING})
+    (tmp_path / "baremos_region.json").write_text(json.dumps({"name": "region", **builder.table()}))
+    return load_norm_sets([instrument.DATA_DIR / "norms", tmp_path], SCALE_MAPPING)
+
+
+def test_norm_sets_load_build_norms_tables(tmp_path):
+    norm_sets = regional_norm_sets(tmp_path)
+
+    assert list(norm_sets) == ["r2014", "region"]
+    assert norm_sets["region"].interpret(0, "masculino", "CCFM") == "desinteres"
+    assert norm_sets["region"].interpret(22, "femenino", "ARTE") == "muy_alto"
+    with pytest.raises(InstrumentError):
+        load_norm_sets([instrument.DATA_DIR / "norms", instrument.DATA_DIR / "norms"], SCALE_MAPPING)
+
+
+def test_batch_rescore_matches_scoring_from_scratch(tmp_path):
+    region = regional_norm_sets(tmp_path)["region"]
+    sessions = [
+        {"id": f"s-{i}", "sex": sex, "responses": [{"question_number": q, "response": [option]} for q in range(1, 144)]}
+        for i, (sex, option) in enumerate([("masculino", "A"), ("femenino", "B"), ("femenino", "A")])
+    ]
+
+    results = list(score_batch(sessions))
+    assert {r["norm_set"] for r in results} == {"r2014"}
+    rescored = list(rescore(results, region))
+    assert rescored == [build_result(session, region) for session in sessions]
+    assert [r["norm_set"] for r in results] == ["r2014"] * 3
+
+
+def test_norm_set_is_chosen_per_session_and_recorded(monkeypatch, tmp_path):
+    norm_sets = regional_norm_sets(tmp_path)
+    monkeypatch.setattr(instrument, "NORM_SETS", norm_sets)
+    monkeypatch.setattr(server, "NORM_SETS", norm_sets)
+    monkeypatch.setattr(server, "store", MemorySessionStore())
+    with TestClient(server.app) as client:
+        default_id = client.post("/api/start-test", json={"sex": "femenino"}).json()["session_id"]
+        started = client.post("/api/start-test", json={"sex": "femenino", "norm_set": "region"}).json()
+        assert started["norm_set"] == "region"
+        assert client.post("/api/start-test", json={"sex": "femenino", "norm_set": "lima"}).status_code == 400
+
+        session = client.get(f"/api/test-session/{started['session_id']}").json()
+        assert (session["norm_set"], session["instrument_version"]) == ("region", "R2014")
+        assert client.get(f"/api/results/{default_id}").json()["norm_set"] == "r2014"
+        assert client.get(f"/api/results/{started['session_id']}").json()["norm_set"] == "region"
+        assert client.get(f"/api/results/{started['session_id']}", params={"norm_set": "r2014"}).json()["norm_set"] == "r2014"
+        assert client.get(f"/api/results/{default_id}/pdf", params={"norm_set": "nope"}).status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/api/results/{}", "/api/results/{}/pdf"])
+def test_session_norm_set_no_longer_loaded_is_a_clear_409(monkeypatch, path):
+    store = MemorySessionStore()
+    monkeypatch.setattr(server, "store", store)
+    with TestClient(server.app) as client:
+        session_id = client.post("/api/start-test", json={"sex": "femenino"}).json()["session_id"]
+        store.sessions[session_id]["norm_set"] = "lima_2020"
+
+        response = client.get(path.format(session_id))
+        assert response.status_code == 409
+        assert "lima_2020" in response.json()["detail"]
+        assert client.get(path.format(session_id), params={"norm_set": "r2014"}).status_code == 200
+
+
+def test_sessions_without_a_norm_set_use_r2014():
+    result = build_result({"id": "legacy", "sex": "masculino", "responses": []})
+
+    assert result["norm_set"] == "r2014"
+    assert NORM_SETS["r2014"].instrument_version == "R2014"
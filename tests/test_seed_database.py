@@ -0,0 +1,62 @@
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import seed_database  # noqa: E402
+from instrument import TOTAL_QUESTIONS  # noqa: E402
+
+NOW = datetime(2025, 10, 8, tzinfo=timezone.utc)
+OPTIONS = {"seed": 42, "now": NOW, "completion_ratio": 0.7, "days": 30, "skew": {"CCFM": 1.5}}
+
+
+class RecordingClient:
+    """MongoClient stand-in that keeps the inserted documents"""
+
+    inserted = []
+
+    def __init__(self, url):
+        self.casm83 = SimpleNamespace(test_sessions=SimpleNamespace(insert_many=self.insert_many))
+
+    def insert_many(self, docs, ordered=True):
+        self.inserted.extend(docs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+
+def without_ids(sessions):
+    return [{k: v for k, v in session.items() if k != "id"} for session in sessions]
+
+
+def seeded_run(monkeypatch, tasks):
+    monkeypatch.setattr(seed_database, "MongoClient", RecordingClient)
+    monkeypatch.setattr(RecordingClient, "inserted", [])
+    seed_database._init_worker("mongodb://test", OPTIONS)
+    for task in tasks:
+        seed_database._insert_chunk(task)
+    return sorted(without_ids(RecordingClient.inserted), key=lambda s: (s["created_at"], s["sex"]))
+
+
+def test_same_seed_gives_same_sessions_however_tasks_are_split(monkeypatch):
+    # 10 sessions as one task (1 worker) or as uneven tasks (several workers)
+    one_task = seeded_run(monkeypatch, [(0, 10, 4)])
+    split = seeded_run(monkeypatch, [(6, 4, 3), (0, 3, 2), (3, 3, 1)])
+
+    assert one_task == split
+    assert len({s["created_at"] for s in one_task}) == 10
+    assert all(len(s["responses"]) == TOTAL_QUESTIONS for s in one_task if s["completed"])
+
+
+def test_generator_uses_the_instrument_item_map():
+    generator = seed_database.SessionGenerator(seed=1, now=NOW)
+    session = generator.session(0)
+
+    assert generator.scales == sorted(seed_database.SCALE_MAPPING)
+    assert session == {**generator.session(0), "id": session["id"]}
+    assert session != {**generator.session(1), "id": session["id"]}
@@ -0,0 +1,38 @@
+import uuid
+
+import session_ids
+from session_ids import new_session_id, session_id_time, short_session_id, uuid7
+
+
+def test_uuid7_layout_and_order():
+    ids = [uuid7() for _ in range(5000)]
+
+    parsed = uuid.UUID(ids[0])
+    assert parsed.version == 7
+    assert parsed.variant == uuid.RFC_4122
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_schemes_and_embedded_time():
+    assert uuid.UUID(new_session_id("uuid4")).version == 4
+    assert len(new_session_id("objectid")) == 24
+
+    assert session_id_time(new_session_id("uuid4")) is None
+    assert session_id_time(new_session_id("uuid7")) is not None
+    assert session_id_time(new_session_id("objectid")) is not None
+    assert session_id_time("not-an-id") is None
+
+
+def test_short_ids_tell_sessions_created_together_apart():
+    assert short_session_id("894a7645-aeb8-4314-b0f9-671413a07ed9") == "894a7645"
+    assert short_session_id("legacy") == "legacy"
+    for scheme in ("uuid7", "objectid"):
+        ids = [new_session_id(scheme) for _ in range(100)]
+        assert len({short_session_id(session_id) for session_id in ids}) == 100
+        assert all(session_id.replace("-", "").endswith(short_session_id(session_id)) for session_id in ids)
+
+
+def test_default_scheme_comes_from_environment(monkeypatch):
+    monkeypatch.setattr(session_ids, "SESSION_ID_SCHEME", "uuid7")
+    assert uuid.UUID(new_session_id()).version == 7
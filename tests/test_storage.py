@@ -0,0 +1,263 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from storage import AnswerLogStore, MemorySessionStore, SQLiteSessionStore, create_store, merge_responses
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def new_session(session_id, sex="masculino", completed=False):
+    return {"id": session_id, "sex": sex, "responses": [], "created_at": "2025-10-08T06:26:28+00:00",
+            "completed": completed, "completed_at": None}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def factory():
+        if request.param == "memory":
+            return MemorySessionStore()
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    return factory
+
+
+def test_merge_responses_replaces_and_appends():
+    responses = [{"question_number": 1, "response": ["A"]}, {"question_number": 2, "response": ["B"]}]
+    merged = merge_responses(responses, [{"question_number": 1, "response": []},
+                                         {"question_number": 3, "response": ["A", "B"]}])
+
+    assert [r["question_number"] for r in merged] == [2, 1, 3]
+    assert merged[1]["response"] == []
+
+
+def test_store_contract(make_store):
+    async def scenario():
+        store = make_store()
+        await store.open()
+        try:
+            await store.create_session(new_session("a"))
+            await store.create_session(new_session("b", sex="femenino", completed=True))
+
+            assert await store.save_response("a", 1, ["A"]) == 1
+            assert await store.save_response("a", 2, ["B"]) == 2
+            assert await store.save_response("a", 1, ["A", "B"]) == 2
+            assert await store.save_responses("a", [{"question_number": 3, "response": []}]) == 3
+            assert await store.save_response("missing", 1, ["A"]) is None
+
+            assert await store.complete("a", "2025-10-08T07:00:00+00:00")
+            assert not await store.complete("missing", "2025-10-08T07:00:00+00:00")
+
+            session = await store.get("a")
+            assert session["completed"] is True
+            assert session["responses"][-2:] == [{"question_number": 1, "response": ["A", "B"]},
+                                                 {"question_number": 3, "response": []}]
+            assert await store.get("a", ["sex"]) == {"sex": "masculino"}
+            assert await store.get("missing") is None
+
+            females = [s["id"] async for s in store.iterate({"sex": "femenino"})]
+            everything = [s["id"] async for s in store.iterate(batch_size=1)]
+            assert females == ["b"]
+            assert sorted(everything) == ["a", "b"]
+
+            many = [s async for s in store.get_many(["b", "missing", "a", "b"], ["id", "sex"], batch_size=1)]
+            assert sorted(many, key=lambda s: s["id"]) == [{"id": "a", "sex": "masculino"},
+                                                           {"id": "b", "sex": "femenino"}]
+        finally:
+            await store.close()
+
+    run(scenario())
+
+
+def test_sqlite_store_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+
+    async def write():
+        store = SQLiteSessionStore(path)
+        await store.open()
+        await store.create_session(dict(new_session("a"), norm_set="r2014"))
+        await store.save_response("a", 5, ["B"])
+        await store.close()
+
+    async def read():
+        store = SQLiteSessionStore(path)
+        await store.open()
+        try:
+            return await store.get("a")
+        finally:
+            await store.close()
+
+    run(write())
+    session = run(read())
+    assert session["responses"] == [{"question_number": 5, "response": ["B"]}]
+    assert session["norm_set"] == "r2014"
+
+
+def test_create_store_from_environment(tmp_path):
+    assert create_store({"STORAGE_BACKEND": "memory"}).name == "memory"
+    assert create_store({"STORAGE_BACKEND": "sqlite", "SQLITE_PATH": str(tmp_path / "x.db")}).name == "sqlite"
+    assert isinstance(create_store({"STORAGE_BACKEND": "memory", "ANSWER_LOG": "1"}), AnswerLogStore)
+    with pytest.raises(ValueError):
+        create_store({"STORAGE_BACKEND": "redis"})
+
+
+def test_full_flow_without_mongo(monkeypatch):
+    monkeypatch.setattr(server, "store", MemorySessionStore())
+    with TestClient(server.app) as client:
+        session_id = client.post("/api/start-test", json={"sex": "femenino"}).json()["session_id"]
+        for number in range(1, 144):
+            client.post("/api/save-response",
+                        json={"session_id": session_id, "question_number": number, "response": ["A"]})
+        assert client.post("/api/complete-test", json={"session_id": session_id}).status_code == 200
+
+        results = client.get(f"/api/results/{session_id}").json()
+        assert results["answered_questions"] == 143
+        assert client.get("/api/health").json()["backend"] == "memory"
+        assert client.get("/api/all-sessions", params={"completed": True}).json()["total"] == 1
+
+
+@pytest.mark.parametrize("question_number", [-1, 0, 144, 10 ** 9])
+def test_invalid_question_numbers_are_rejected_before_logging(monkeypatch, question_number):
+    store = AnswerLogStore(MemorySessionStore())
+    monkeypatch.setattr(server, "store", store)
+    with TestClient(server.app) as client:
+        session_id = client.post("/api/start-test", json={"sex": "femenino"}).json()["session_id"]
+        response = client.post("/api/save-response",
+                               json={"session_id": session_id, "question_number": question_number, "response": ["A"]})
+
+        assert response.status_code == 422
+        assert run(store.answer_events([session_id], pending_only=False))[session_id] == []
+        saved = client.post("/api/save-response",
+                            json={"session_id": session_id, "question_number": 1, "response": ["A"]})
+        assert saved.json()["total_responses"] == 1
+
+
+def test_answer_log_folds_events(make_store):
+    async def scenario():
+        store = AnswerLogStore(make_store(), compact_every=3)
+        await store.open()
+        try:
+            await store.create_session(new_session("a"))
+            assert await store.save_response("a", 1, ["A"]) == 1
+            assert await store.save_response("a", 1, ["B"]) == 1
+            assert await store.save_response("missing", 1, ["A"]) is None
+
+            # Pending events are visible before compaction
+            assert (await store.get("a"))["responses"] == [{"question_number": 1, "response": ["B"]}]
+            assert (await store.inner.get("a"))["responses"] == []
+
+            # The third event reaches the threshold and folds the snapshot
+            assert await store.save_response("a", 2, []) == 2
+            assert len((await store.inner.get("a"))["responses"]) == 2
+            assert (await store.answer_events(["a"]))["a"] == []
+
+            await store.save_response("a", 3, ["A", "B"])
+            assert await store.complete("a", "2025-10-08T07:00:00+00:00")
+            snapshot = await store.inner.get("a")
+            assert [r["question_number"] for r in snapshot["responses"]] == [1, 2, 3]
+
+            history = (await store.answer_events(["a"], pending_only=False))["a"]
+            assert [(e["question_number"], e["response"]) for e in history] == [
+                (1, ["A"]), (1, ["B"]), (2, []), (3, ["A", "B"])]
+            assert [s["responses"] async for s in store.iterate(fields=["responses"])] == [snapshot["responses"]]
+        finally:
+            await store.close()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("count", [0, 1, 450])
+def test_export_streams_every_session(monkeypatch, count):
+    store = MemorySessionStore()
+    for i in range(count):
+        run(store.create_session(new_session(f"s-{i}", completed=i % 2 == 0)))
+    monkeypatch.setattr(server, "store", store)
+
+    export = TestClient(server.app).get("/api/all-sessions").json()
+    completed = TestClient(server.app).get("/api/all-sessions", params={"completed": True}).json()
+
+    assert export["total"] == count
+    assert [s["id"] for s in export["sessions"]] == [f"s-{i}" for i in range(count)]
+    assert completed["total"] == (count + 1) // 2
+
+
+class FailingStore(MemorySessionStore):
+    """Iteration fails after `fail_after` sessions"""
+
+    def __init__(self, fail_after):
+        super().__init__()
+        self.fail_after = fail_after
+
+    async def iterate(self, filter=None, fields=None, batch_size=1000):
+        yielded = 0
+        async for session in super().iterate(filter, fields, batch_size):
+            if yielded == self.fail_after:
+                raise RuntimeError("storage went away")
+            yield session
+            yielded += 1
+
+
+def test_export_storage_failures_are_not_silent(monkeypatch, caplog):
+    store = FailingStore(fail_after=0)
+    for i in range(450):
+        run(store.create_session(new_session(f"s-{i}")))
+    monkeypatch.setattr(server, "store", store)
+
+    # Failure while reading the first chunk: a plain 500
+    assert TestClient(server.app).get("/api/all-sessions").status_code == 500
+
+    # Failure after the 200 went out: logged, and the response is aborted
+    store.fail_after = server.EXPORT_CHUNK_SIZE + 50
+    with pytest.raises(Exception):  # RuntimeError, possibly wrapped in an ExceptionGroup
+        TestClient(server.app).get("/api/all-sessions")
+    assert "Session export failed after 200 sessions" in caplog.text
+    assert "storage went away" in caplog.text
+
+
+def test_batch_results_match_single_results(monkeypatch):
+    monkeypatch.setattr(server, "store", AnswerLogStore(MemorySessionStore(), compact_every=1000))
+    with TestClient(server.app) as client:
+        ids = []
+        for index, sex in enumerate(["masculino", "femenino", "femenino"]):
+            session_id = client.post("/api/start-test", json={"sex": sex}).json()["session_id"]
+            for number in range(1, 144, index + 1):
+                client.post("/api/save-response", json={"session_id": session_id, "question_number": number,
+                                                        "response": ["A"] if number % 3 else ["B"]})
+            ids.append(session_id)
+        client.post("/api/complete-test", json={"session_id": ids[0]})
+
+        batch = client.post("/api/results/batch", json={"session_ids": ids + ["missing"]}).json()
+        assert batch["total"] == 3 and batch["missing"] == ["missing"]
+        for session_id in ids:
+            assert batch["results"][session_id] == client.get(f"/api/results/{session_id}").json()
+
+        completed = client.post("/api/results/batch", json={"filter": {"completed": True}}).json()
+        assert list(completed["results"]) == [ids[0]]
+        assert client.post("/api/results/batch", json={"filter": {"sex": "otro"}}).json() == \
+            {"results": {}, "missing": [], "total": 0}
+        assert client.post("/api/results/batch", json={}).status_code == 400
+        assert client.post("/api/results/batch", json={"session_ids": ids, "norm_set": "x"}).status_code == 400
+
+
+def test_batch_results_failures_are_not_silent(monkeypatch, caplog):
+    store = FailingStore(fail_after=10 ** 6)
+    for i in range(server.BATCH_CHUNK_SIZE + 100):
+        run(store.create_session(new_session(f"s-{i}")))
+    monkeypatch.setattr(server, "store", store)
+    client = TestClient(server.app)
+
+    # A session in the first chunk records a norm set that is no longer loaded
+    store.sessions["s-3"]["norm_set"] = "lima_2020"
+    response = client.post("/api/results/batch", json={"filter": {}})
+    assert response.status_code == 409 and "lima_2020" in response.json()["detail"]
+    assert client.post("/api/results/batch", json={"filter": {}, "norm_set": "r2014"}).json()["total"] == 600
+
+    # Failure after the 200 went out: logged, and the response is aborted
+    store.fail_after = server.BATCH_CHUNK_SIZE + 50
+    with pytest.raises(Exception):  # RuntimeError, possibly wrapped in an ExceptionGroup
+        client.post("/api/results/batch", json={"filter": {}, "norm_set": "r2014"})
+    assert "Batch results failed after 500 sessions" in caplog.text
+    assert "storage went away" in caplog.text
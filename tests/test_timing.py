@@ -0,0 +1,63 @@
+import json
+import logging
+
+from fastapi.testclient import TestClient
+
+import server
+from storage import MemorySessionStore, TimedSessionStore
+from timing import RequestTimings, SlowRequestMiddleware, _CURRENT, annotate, span
+
+
+def test_spans_add_up_per_stage_only_inside_a_request():
+    @span("scoring")
+    def score():
+        return 42
+
+    with span("serialization"):
+        assert score() == 42  # no request: nothing to record into
+
+    timings = RequestTimings()
+    token = _CURRENT.set(timings)
+    try:
+        score()
+        score()
+        with span("serialization"):
+            annotate(session_id="s-1")
+    finally:
+        _CURRENT.reset(token)
+
+    assert set(timings.stages) == {"scoring", "serialization"}
+    assert timings.fields == {"session_id": "s-1"}
+
+
+def slow_lines(caplog):
+    return [json.loads(r.getMessage()) for r in caplog.records if r.name == "timing"]
+
+
+def test_slow_requests_log_their_stage_breakdown(monkeypatch, caplog):
+    monkeypatch.setattr(server, "store", TimedSessionStore(MemorySessionStore()))
+    caplog.set_level(logging.WARNING, logger="timing")
+    # Every request counts as slow
+    with TestClient(SlowRequestMiddleware(server.app, threshold=1e-9)) as client:
+        session_id = client.post("/api/start-test", json={"sex": "masculino"}).json()["session_id"]
+        client.post("/api/save-response", json={"session_id": session_id, "question_number": 1, "response": ["A"]})
+        client.get(f"/api/results/{session_id}")
+        client.get(f"/api/results/{session_id}/pdf")
+
+    start, save, results, pdf = slow_lines(caplog)
+    assert save["session_id"] == results["session_id"] == pdf["session_id"] == session_id
+    assert save["route"] == "/api/save-response" and "store.save_responses" in save["stages_ms"]
+    assert results["route"] == "/api/results/{session_id}" and results["status"] == 200
+    assert {"admission_wait", "store.get", "scoring", "interpretation", "recommendations",
+            "serialization"} <= set(results["stages_ms"])
+    assert {"store.get", "scoring", "pdf_build"} <= set(pdf["stages_ms"])
+    assert pdf["total_ms"] >= pdf["stages_ms"]["pdf_build"]
+
+
+def test_fast_requests_are_not_logged(monkeypatch, caplog):
+    monkeypatch.setattr(server, "store", MemorySessionStore())
+    caplog.set_level(logging.WARNING, logger="timing")
+    with TestClient(SlowRequestMiddleware(server.app, threshold=60)) as client:
+        client.get("/")
+
+    assert slow_lines(caplog) == []